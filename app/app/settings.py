@@ -43,9 +43,11 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'user',
     'receita',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentacao.instrumentacao_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,16 +81,156 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Com o pool (core.db), as conexões são devolvidas ao fim de cada
+# requisição e reaproveitadas; sem ele, CONN_MAX_AGE mantém a conexão
+# de cada thread aberta entre requisições.
+DB_POOL = bool(int(os.environ.get('DB_POOL', 1)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.db' if DB_POOL else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(
+            os.environ.get('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)
+        ),
+        'POOL': {
+            'MIN': int(os.environ.get('DB_POOL_MIN', 1)),
+            'MAX': int(os.environ.get('DB_POOL_MAX', 20)),
+            'VIDA_MAXIMA': int(os.environ.get('DB_POOL_VIDA_MAXIMA', 1800)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'VERIFICAR_APOS': float(
+                os.environ.get('DB_POOL_VERIFICAR_APOS', 30)
+            ),
+        },
     }
 }
 
+# Threads que executam as consultas das views assíncronas (core.assincrono).
+# Com 0, as consultas rodam na thread das views síncronas.
+ASYNC_DB_THREADS = int(
+    os.environ.get('ASYNC_DB_THREADS', DATABASES['default']['POOL']['MAX'])
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+#
+# O backend padrão é um cache LRU em memória local limitado por
+# entradas e bytes. Com vários processos, use um backend compartilhado
+# (ex.: django.core.cache.backends.db.DatabaseCache) via CACHE_BACKEND,
+# ou ao menos para as versões do cache de respostas, via
+# CACHE_VERSOES_BACKEND.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'core.cache.LRUCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'receitas-api'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+            'MAX_BYTES': int(
+                os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024)
+            ),
+        },
+    }
+}
+
+if os.environ.get('CACHE_VERSOES_BACKEND'):
+    CACHES['versoes'] = {
+        'BACKEND': os.environ['CACHE_VERSOES_BACKEND'],
+        'LOCATION': os.environ.get('CACHE_VERSOES_LOCATION', 'versoes'),
+        'TIMEOUT': None,
+    }
+
+# Alias do cache usado para as respostas da API de receitas.
+API_CACHE_ALIAS = 'default'
+
+# Alias do cache com a versão dos dados de cada usuário, incrementada a
+# cada escrita para invalidar as respostas em cache. Com a versão
+# compartilhada, as respostas podem ficar no cache local de cada
+# processo.
+API_CACHE_VERSOES_ALIAS = 'versoes' if 'versoes' in CACHES else 'default'
+
+# Com a versão em um cache local, uma escrita invalida só as respostas
+# do próprio processo e os outros continuam servindo dados antigos até
+# o TTL. Por isso o cache de respostas só fica ligado por padrão se a
+# versão está em um backend compartilhado; com um único processo (como
+# o runserver), ligue-o com API_CACHE_ATIVO=1.
+CACHES_LOCAIS = (
+    'core.cache.LRUCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+API_CACHE_ATIVO = bool(int(os.environ.get(
+    'API_CACHE_ATIVO',
+    CACHES[API_CACHE_VERSOES_ALIAS]['BACKEND'] not in CACHES_LOCAIS,
+)))
+
+# Cache da autenticação por token: um LRU em memória de cada processo
+# e, opcionalmente, um cache do Django compartilhado entre processos.
+# Remover um token ou desativar o usuário invalida o cache compartilhado
+# e o do processo que fez a alteração; nos outros, o token continua
+# aceito até a entrada local expirar. Por isso a validade local, em
+# segundos, é curta. No cache compartilhado a invalidação vale para
+# todos e as entradas podem durar mais.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 5))
+AUTH_TOKEN_CACHE_COMPARTILHADO_TIMEOUT = int(
+    os.environ.get('AUTH_TOKEN_CACHE_COMPARTILHADO_TIMEOUT', 300)
+)
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(
+    os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 1024)
+)
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get('AUTH_TOKEN_CACHE_ALIAS') or None
+
+
+# Instrumentação das requisições (core.instrumentacao): fração das
+# requisições medidas, de 0 a 1, e se as medidas vão no cabeçalho
+# Server-Timing. As medidas também vão para o log core.instrumentacao,
+# como WARNING nas requisições mais lentas que INSTRUMENTACAO_LENTA_MS
+# e como INFO nas demais.
+INSTRUMENTACAO_AMOSTRAGEM = float(
+    os.environ.get('INSTRUMENTACAO_AMOSTRAGEM', 1)
+)
+INSTRUMENTACAO_SERVER_TIMING = bool(
+    int(os.environ.get('INSTRUMENTACAO_SERVER_TIMING', 1))
+)
+INSTRUMENTACAO_LENTA_MS = float(
+    os.environ.get('INSTRUMENTACAO_LENTA_MS', 1000)
+)
+
+# Métricas no formato do Prometheus em /metrics (core.metricas). Com
+# METRICAS_ATIVAS, cada processo que atende requisições grava as suas em
+# um arquivo de METRICAS_DIR a cada METRICAS_INTERVALO segundos e o
+# endpoint soma os de todos os processos; desligado (o padrão, como nos
+# testes e comandos), nada é gravado e o endpoint exporta só o processo
+# atual. O diretório é esvaziado pelo comando limpar_metricas ao iniciar
+# o servidor. Com METRICAS_TOKEN, o endpoint exige o cabeçalho
+# Authorization: Bearer <token>; sem ele, só responde com DEBUG.
+METRICAS_ATIVAS = bool(int(os.environ.get('METRICAS_ATIVAS', 0)))
+METRICAS_DIR = os.environ.get('METRICAS_DIR', '/vol/web/metricas')
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', 1))
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN') or None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.instrumentacao': {
+            'handlers': ['console'],
+            'level': os.environ.get('INSTRUMENTACAO_LOG_NIVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -132,6 +274,17 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Arquivos enviados são guardados pelo hash do conteúdo, sem duplicatas.
+# Os que deixam de ser usados são removidos com o comando limpar_arquivos.
+DEFAULT_FILE_STORAGE = 'core.storage.ConteudoEnderecadoStorage'
+
+# Variantes das imagens das receitas, geradas por um pool de threads
+# depois do upload. Com IMAGENS_ASSINCRONO=0, são geradas na requisição.
+IMAGENS_ASSINCRONO = bool(int(os.environ.get('IMAGENS_ASSINCRONO', 1)))
+IMAGENS_WORKERS = int(os.environ.get('IMAGENS_WORKERS', 2))
+# Tamanho máximo, em bytes, de uma imagem enviada.
+IMAGEM_MAX_BYTES = int(os.environ.get('IMAGEM_MAX_BYTES', 10 * 1024 * 1024))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -141,8 +294,25 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Usam o orjson quando instalado, com as mesmas respostas do JSON
+    # padrão do DRF.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Tamanho padrão e limite do parâmetro page_size das listagens paginadas.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+# Quantidade máxima de operações em uma requisição ao lote de receitas.
+API_LOTE_MAX_OPERACOES = int(os.environ.get('API_LOTE_MAX_OPERACOES', 100))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
@@ -13,6 +13,11 @@ from django.urls import (
 from django.conf.urls.static import static
 from django.conf import settings 
 
+from core.views import (
+    InstrumentacaoView,
+    metricas,
+)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -23,6 +28,12 @@ urlpatterns = [
     ),
     path('api/user/', include('user.urls')),
     path('api/receita/', include('receita.urls')),
+    path(
+        'api/instrumentacao/',
+        InstrumentacaoView.as_view(),
+        name='instrumentacao'
+    ),
+    path('metrics', metricas, name='metricas'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,82 @@
+"""
+Clientes HTTP dos benchmarks da API.
+
+O cliente interno faz as requisições em processo e conta as consultas
+de cada uma; o cliente HTTP usa um servidor local já em execução.
+"""
+import json
+from urllib.error import HTTPError
+from urllib.request import (
+    Request,
+    urlopen,
+)
+
+from django.db import connection
+from django.test.client import (
+    BOUNDARY,
+    MULTIPART_CONTENT,
+    encode_multipart,
+)
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+
+class ClienteInterno:
+    """Faz as requisições em processo com o APIClient."""
+
+    def __init__(self, host='testserver'):
+        self.client = APIClient(SERVER_NAME=host)
+
+    def requisitar(self, metodo, caminho, dados=None, formato='json',
+                   token=None):
+        """Faz a requisição e retorna o status e as consultas feitas."""
+        extra = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        with CaptureQueriesContext(connection) as consultas:
+            res = getattr(self.client, metodo.lower())(
+                caminho, dados, format=formato, **extra
+            )
+
+        return res.status_code, len(consultas)
+
+
+class ClienteHttp:
+    """Faz as requisições a um servidor pela rede.
+
+    As consultas feitas pelo servidor não são conhecidas e vêm como
+    None.
+    """
+
+    def __init__(self, url_base, timeout=30):
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+
+    def requisitar(self, metodo, caminho, dados=None, formato='json',
+                   token=None):
+        """Faz a requisição e retorna o status e as consultas feitas."""
+        cabecalhos = {'Accept': 'application/json'}
+        if token:
+            cabecalhos['Authorization'] = f'Token {token}'
+
+        corpo = None
+        if dados is not None and metodo.upper() != 'GET':
+            if formato == 'multipart':
+                corpo = encode_multipart(BOUNDARY, dados)
+                cabecalhos['Content-Type'] = MULTIPART_CONTENT
+            else:
+                corpo = json.dumps(dados).encode()
+                cabecalhos['Content-Type'] = 'application/json'
+
+        requisicao = Request(
+            self.url_base + caminho,
+            data=corpo,
+            headers=cabecalhos,
+            method=metodo.upper(),
+        )
+        try:
+            with urlopen(requisicao, timeout=self.timeout) as res:
+                res.read()
+                return res.status, None
+        except HTTPError as exc:
+            exc.read()
+            return exc.code, None
@@ -0,0 +1,116 @@
+"""
+Geração de dados sintéticos para os benchmarks.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from core.models import (
+    Receita,
+    Categoria,
+    Ingrediente,
+)
+
+
+TAMANHO_LOTE = 5000
+
+PALAVRAS = (
+    'alho cebola tomate azeite sal pimenta farinha ovo leite manteiga '
+    'açúcar arroz feijão frango carne peixe batata cenoura queijo limão '
+    'assar cozinhar fritar refogar misturar bater picar temperar servir '
+    'forno panela frigideira fogo baixo médio alto minutos quente frio '
+    'molho caldo massa recheio cobertura crocante macio dourado suave'
+).split()
+
+
+def criar_usuario(email):
+    """Cria e retorna um usuário para o benchmark."""
+    return get_user_model().objects.create_user(email, 'benchmark123')
+
+
+def _descricao(rng):
+    """Gera uma descrição de receita com palavras aleatórias."""
+    return ' '.join(rng.choices(PALAVRAS, k=rng.randint(30, 80)))
+
+
+def _escolher(rng, ids, pesos, quantidade):
+    """Escolhe ids distintos, favorecendo os de maior peso."""
+    quantidade = min(quantidade, len(ids))
+    escolhidos = set()
+    while len(escolhidos) < quantidade:
+        escolhidos.update(rng.choices(ids, pesos, k=quantidade))
+
+    return list(escolhidos)[:quantidade]
+
+
+def _associar(campo, receita_ids, item_ids, por_receita, rng):
+    """Associa itens às receitas com popularidade de cauda longa."""
+    m2m = Receita._meta.get_field(campo)
+    Through = m2m.remote_field.through
+    coluna = f'{m2m.m2m_reverse_field_name()}_id'
+    pesos = [1 / (posicao + 1) for posicao in range(len(item_ids))]
+
+    lote = []
+    for receita_id in receita_ids:
+        for item_id in _escolher(rng, item_ids, pesos, por_receita):
+            lote.append(Through(receita_id=receita_id, **{coluna: item_id}))
+        if len(lote) >= TAMANHO_LOTE:
+            Through.objects.bulk_create(lote)
+            lote = []
+    Through.objects.bulk_create(lote)
+
+
+def criar_receitas(user, quantidade, categorias=20, ingredientes=50,
+                   categorias_por_receita=2, ingredientes_por_receita=6,
+                   seed=0):
+    """Cria receitas sintéticas do usuário com categorias e ingredientes.
+
+    Retorna um dicionário com os ids das receitas, categorias e
+    ingredientes criados.
+    """
+    rng = random.Random(seed)
+    categoria_ids = [item.id for item in Categoria.objects.bulk_get_or_create(
+        user, [f'Categoria {i}' for i in range(categorias)]
+    ).values()]
+    ingrediente_ids = [
+        item.id for item in Ingrediente.objects.bulk_get_or_create(
+            user, [f'Ingrediente {i}' for i in range(ingredientes)]
+        ).values()
+    ]
+
+    existentes = set(
+        Receita.objects.filter(user=user).values_list('id', flat=True)
+    )
+    Receita.objects.bulk_create(
+        (
+            Receita(
+                user=user,
+                nome=f'Receita {i}',
+                descricao=_descricao(rng),
+                tempo_preparo=rng.randint(5, 240),
+                preco=Decimal(rng.randint(100, 99999)) / 100,
+            )
+            for i in range(quantidade)
+        ),
+        batch_size=TAMANHO_LOTE,
+    )
+    receita_ids = sorted(
+        set(Receita.objects.filter(user=user).values_list('id', flat=True))
+        - existentes
+    )
+
+    _associar(
+        'categorias', receita_ids, categoria_ids,
+        categorias_por_receita, rng,
+    )
+    _associar(
+        'ingredientes', receita_ids, ingrediente_ids,
+        ingredientes_por_receita, rng,
+    )
+
+    return {
+        'receitas': receita_ids,
+        'categorias': categoria_ids,
+        'ingredientes': ingrediente_ids,
+    }
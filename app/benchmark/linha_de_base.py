@@ -0,0 +1,83 @@
+"""
+Linhas de base dos benchmarks, gravadas em JSON.
+
+Uma linha de base guarda as medidas de cada cenário, os parâmetros da
+execução e o commit medido, para comparar execuções entre commits.
+"""
+import json
+import subprocess
+
+from django.utils import timezone
+
+
+# Medidas comparadas e se um valor maior é pior.
+MEDIDAS_COMPARADAS = {
+    'p50': True,
+    'p95': True,
+    'p99': True,
+    'req_s': False,
+    'consultas': True,
+}
+
+
+def commit_atual():
+    """Retorna o commit atual do repositório, se houver."""
+    try:
+        resultado = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return resultado.stdout.strip() or None
+
+
+def salvar(caminho, cenarios, parametros):
+    """Grava as medidas dos cenários em um arquivo JSON."""
+    with open(caminho, 'w') as arquivo:
+        json.dump({
+            'commit': commit_atual(),
+            'data': timezone.now().isoformat(),
+            'parametros': parametros,
+            'cenarios': cenarios,
+        }, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def carregar(caminho):
+    """Lê uma linha de base gravada por `salvar`."""
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+
+def comparar(cenarios, base, tolerancia):
+    """Compara as medidas com a linha de base.
+
+    Retorna, para cada cenário e medida presentes nas duas, a tupla
+    (cenario, medida, valor_base, valor_atual, variacao_percentual,
+    regressao). Há regressão quando a medida piora mais que a
+    tolerância, em porcentagem; nas consultas, qualquer aumento.
+    """
+    linhas = []
+    for cenario, medidas in cenarios.items():
+        anteriores = base['cenarios'].get(cenario)
+        if anteriores is None:
+            continue
+        for medida, maior_pior in MEDIDAS_COMPARADAS.items():
+            atual, anterior = medidas.get(medida), anteriores.get(medida)
+            if atual is None or anterior is None:
+                continue
+            variacao = (
+                (atual - anterior) / anterior * 100 if anterior else 0.0
+            )
+            piora = variacao if maior_pior else -variacao
+            if medida == 'consultas':
+                regressao = atual > anterior
+            else:
+                regressao = piora > tolerancia
+            linhas.append(
+                (cenario, medida, anterior, atual, variacao, regressao)
+            )
+
+    return linhas
@@ -0,0 +1,353 @@
+"""
+Comando para medir a latência e as consultas dos endpoints da API.
+"""
+from io import BytesIO
+import time
+from urllib.parse import urlencode
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.test import override_settings
+from django.urls import reverse
+
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from receita.imagens import aguardar_variantes
+from benchmark import linha_de_base
+from benchmark.clientes import (
+    ClienteHttp,
+    ClienteInterno,
+)
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    host_permitido,
+    resumo,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+CENARIOS = (
+    'token', 'listar', 'listar_cache', 'filtrar', 'detalhes', 'criar',
+    'atualizar', 'upload',
+)
+SENHA = 'benchmark123'
+
+
+def _imagem():
+    """Retorna uma imagem PNG pequena para o upload."""
+    arquivo = BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(arquivo, 'PNG')
+
+    return arquivo.getvalue()
+
+
+class Command(BaseCommand):
+    """
+    Cria usuários com receitas, categorias e ingredientes sintéticos e
+    mede, requisição a requisição, os principais endpoints da API: a
+    latência (p50/p95/p99), as requisições por segundo de um cliente e
+    as consultas por requisição. Por padrão, as requisições são feitas
+    em processo; com --url, vão a um servidor local que use o mesmo
+    banco. Nos dois casos os dados são gravados e os usuários criados
+    são removidos ao final: as escritas fazem commit, então o trabalho
+    agendado para depois dele, como as variantes das imagens, também
+    entra na medição.
+
+    As medidas podem ser gravadas como linha de base em JSON (--salvar)
+    e comparadas com uma linha de base anterior (--comparar).
+    """
+    help = 'Mede a latência e as consultas dos endpoints da API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cenarios', type=lambda valor: valor.split(','),
+            default=list(CENARIOS),
+            help=f'Cenários separados por vírgula: {", ".join(CENARIOS)}.',
+        )
+        parser.add_argument('--usuarios', type=int, default=2)
+        parser.add_argument(
+            '--receitas', type=int, default=500,
+            help='Receitas de cada usuário.',
+        )
+        parser.add_argument('--categorias', type=int, default=20)
+        parser.add_argument('--ingredientes', type=int, default=50)
+        parser.add_argument(
+            '--por-receita', type=lista_de_inteiros, default=[2, 6],
+            help='Categorias e ingredientes por receita, separados por '
+                 'vírgula.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=50)
+        parser.add_argument('--aquecimento', type=int, default=3)
+        parser.add_argument(
+            '--url',
+            help='URL de um servidor local; sem ela, mede em processo.',
+        )
+        parser.add_argument(
+            '--salvar', metavar='ARQUIVO',
+            help='Grava as medidas como linha de base em JSON.',
+        )
+        parser.add_argument(
+            '--comparar', metavar='ARQUIVO',
+            help='Compara as medidas com uma linha de base em JSON.',
+        )
+        parser.add_argument(
+            '--tolerancia', type=float, default=20,
+            help='Piora, em porcentagem, considerada regressão.',
+        )
+        parser.add_argument(
+            '--falhar', action='store_true',
+            help='Termina com erro se houver regressões.',
+        )
+
+    def _semear(self, options, usuarios):
+        """Cria os usuários e seus dados, com um dict por usuário."""
+        categorias_por_receita, ingredientes_por_receita = (
+            options['por_receita']
+        )
+        for i in range(options['usuarios']):
+            user = criar_usuario(f'benchmark-api{i}@example.com')
+            usuarios.append({'user': user})
+            usuarios[-1].update(criar_receitas(
+                user,
+                options['receitas'],
+                categorias=options['categorias'],
+                ingredientes=options['ingredientes'],
+                categorias_por_receita=categorias_por_receita,
+                ingredientes_por_receita=ingredientes_por_receita,
+                seed=i,
+            ))
+            usuarios[-1]['token'] = Token.objects.create(user=user).key
+
+    def _cenarios(self, usuarios):
+        """Retorna uma função por cenário que monta a i-ésima requisição.
+
+        As leituras levam um parâmetro distinto a cada requisição para
+        não serem respondidas do cache, exceto em listar_cache.
+        """
+        imagem = _imagem()
+        lista = reverse('receita:receita-list')
+
+        def usuario(i):
+            return usuarios[i % len(usuarios)]
+
+        def receita(i):
+            receitas = usuario(i)['receitas']
+            return receitas[(i // len(usuarios)) % len(receitas)]
+
+        def get(i, caminho, **params):
+            return {
+                'metodo': 'GET',
+                'caminho': f'{caminho}?{urlencode({**params, "n": i})}',
+                'token': usuario(i)['token'],
+            }
+
+        def filtrar(i):
+            dados = usuario(i)
+            categorias = dados['categorias'][:2]
+            return get(
+                i, lista,
+                categorias=','.join(map(str, categorias)),
+                ingredientes=dados['ingredientes'][i % 5],
+            )
+
+        def criar(i):
+            return {
+                'metodo': 'POST',
+                'caminho': lista,
+                'dados': {
+                    'nome': f'Receita do benchmark {i}',
+                    'tempo_preparo': 30,
+                    'preco': '12.50',
+                    'categorias': [{'nome': 'Categoria 1'}],
+                    'ingredientes': [
+                        {'nome': f'Ingrediente {n}'} for n in range(4)
+                    ],
+                },
+                'token': usuario(i)['token'],
+                'esperado': 201,
+            }
+
+        def atualizar(i):
+            return {
+                'metodo': 'PATCH',
+                'caminho': reverse(
+                    'receita:receita-detail', args=[receita(i)]
+                ),
+                'dados': {
+                    'nome': f'Receita atualizada {i}',
+                    'ingredientes': [{'nome': f'Ingrediente {i % 10}'}],
+                },
+                'token': usuario(i)['token'],
+            }
+
+        def upload(i):
+            return {
+                'metodo': 'POST',
+                'caminho': reverse(
+                    'receita:receita-upload-imagem', args=[receita(i)]
+                ),
+                'dados': {'imagem': SimpleUploadedFile(
+                    'benchmark.png', imagem, 'image/png'
+                )},
+                'formato': 'multipart',
+                'token': usuario(i)['token'],
+            }
+
+        return {
+            'token': lambda i: {
+                'metodo': 'POST',
+                'caminho': reverse('user:token'),
+                'dados': {
+                    'email': usuario(i)['user'].email,
+                    'password': SENHA,
+                },
+            },
+            'listar': lambda i: get(i, lista),
+            'listar_cache': lambda i: {
+                'metodo': 'GET',
+                'caminho': lista,
+                'token': usuario(i)['token'],
+            },
+            'filtrar': filtrar,
+            'detalhes': lambda i: get(
+                i, reverse('receita:receita-detail', args=[receita(i)])
+            ),
+            'criar': criar,
+            'atualizar': atualizar,
+            'upload': upload,
+        }
+
+    def _medir(self, cliente, cenario, repeticoes, aquecimento):
+        """Executa o cenário e retorna suas medidas."""
+        duracoes, consultas, erros = [], [], 0
+        for i in range(-aquecimento, repeticoes):
+            # A requisição é montada fora da medição.
+            requisicao = cenario(i)
+            esperado = requisicao.pop('esperado', 200)
+            inicio = time.perf_counter()
+            status, quantidade = cliente.requisitar(**requisicao)
+            duracao = time.perf_counter() - inicio
+            if i < 0:
+                continue
+            duracoes.append(duracao)
+            if quantidade is not None:
+                consultas.append(quantidade)
+            if status != esperado:
+                erros += 1
+
+        medidas = resumo(duracoes)
+        medidas['req_s'] = len(duracoes) / sum(duracoes)
+        medidas['consultas'] = (
+            sum(consultas) / len(consultas) if consultas else None
+        )
+        medidas['erros'] = erros
+
+        return medidas
+
+    def _executar(self, cliente, options, usuarios):
+        """Semeia os dados e mede os cenários pedidos."""
+        self._semear(options, usuarios)
+        cenarios = self._cenarios(usuarios)
+        medidas = {}
+        # As imagens enviadas ficam no storage depois que os usuários
+        # são removidos. Como o storage guarda cada conteúdo uma vez só,
+        # elas podem ser as de outras receitas: as que ficarem sem
+        # referências são removidas pelo comando limpar_arquivos.
+        for nome in options['cenarios']:
+            medidas[nome] = self._medir(
+                cliente, cenarios[nome],
+                options['repeticoes'], options['aquecimento'],
+            )
+            self._escrever(nome, medidas[nome])
+
+        return medidas
+
+    def _escrever(self, nome, medidas):
+        consultas = medidas['consultas']
+        self.stdout.write(
+            f'{nome:>13} {medidas["p50"]:>8.2f} {medidas["p95"]:>8.2f} '
+            f'{medidas["p99"]:>8.2f} {medidas["req_s"]:>8.1f} '
+            f'{"-" if consultas is None else f"{consultas:.1f}":>9} '
+            f'{medidas["erros"]:>6}'
+        )
+
+    def _comparar(self, medidas, options):
+        """Escreve a comparação com a linha de base e as regressões."""
+        base = linha_de_base.carregar(options['comparar'])
+        self.stdout.write(
+            f'\nComparação com {base.get("commit") or "a linha de base"}:'
+        )
+        regressoes = []
+        for cenario, medida, anterior, atual, variacao, regressao in (
+            linha_de_base.comparar(medidas, base, options['tolerancia'])
+        ):
+            self.stdout.write(
+                f'{cenario:>13} {medida:>9} {anterior:>10.2f} '
+                f'{atual:>10.2f} {variacao:>+8.1f}%'
+                f'{"  REGRESSÃO" if regressao else ""}'
+            )
+            if regressao:
+                regressoes.append(f'{cenario} {medida}')
+
+        return regressoes
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        desconhecidos = set(options['cenarios']) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(
+                f'Cenários desconhecidos: {", ".join(sorted(desconhecidos))}'
+            )
+
+        self.stdout.write(
+            f'{"cenario":>13} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"req/s":>8} {"consultas":>9} {"erros":>6}'
+        )
+        usuarios = []
+        try:
+            if options['url']:
+                medidas = self._executar(
+                    ClienteHttp(options['url']), options, usuarios
+                )
+            else:
+                # Tudo roda neste processo, então o cache de respostas
+                # pode ficar ligado mesmo com a versão em memória local,
+                # e as métricas não vão para os arquivos do servidor.
+                with override_settings(
+                    API_CACHE_ATIVO=True, METRICAS_ATIVAS=False,
+                ):
+                    medidas = self._executar(
+                        ClienteInterno(host_permitido()), options, usuarios
+                    )
+        finally:
+            # As variantes dos uploads em processo são geradas depois do
+            # commit; os usuários só são removidos quando terminam.
+            aguardar_variantes()
+            for dados in usuarios:
+                dados['user'].delete()
+
+        parametros = {
+            nome: options[nome] for nome in (
+                'usuarios', 'receitas', 'categorias', 'ingredientes',
+                'por_receita', 'repeticoes', 'url',
+            )
+        }
+        if options['salvar']:
+            linha_de_base.salvar(options['salvar'], medidas, parametros)
+            self.stdout.write(f'Linha de base gravada em {options["salvar"]}')
+
+        if options['comparar']:
+            regressoes = self._comparar(medidas, options)
+            if regressoes and options['falhar']:
+                raise CommandError(
+                    f'Regressões: {", ".join(regressoes)}'
+                )
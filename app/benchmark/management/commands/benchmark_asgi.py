@@ -0,0 +1,248 @@
+"""
+Comando para comparar as leituras da API sob WSGI e sob ASGI.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Receita
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    host_permitido,
+    resumo,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+ENDPOINTS = ('receitas', 'receita', 'me')
+
+
+class Command(BaseCommand):
+    """
+    Simula muitos clientes lentos simultâneos contra a aplicação, em
+    processo, e compara o servidor WSGI com um número fixo de threads,
+    o ASGI com as views síncronas e o ASGI com as views assíncronas.
+    Cada resposta leva --latencia ms para ser enviada ao cliente: sob
+    WSGI a thread fica ocupada nesse tempo, sob ASGI não.
+    """
+    help = 'Compara as leituras da API sob WSGI e sob ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clientes', type=lista_de_inteiros, default=[10, 100],
+            help='Clientes simultâneos, separados por vírgula.',
+        )
+        parser.add_argument(
+            '--requisicoes', type=int, default=5,
+            help='Requisições seguidas de cada cliente.',
+        )
+        parser.add_argument(
+            '--latencia', type=float, default=50,
+            help='Tempo em ms que o cliente leva para receber a resposta.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Threads do servidor WSGI.',
+        )
+        parser.add_argument('--receitas', type=int, default=200)
+        parser.add_argument(
+            '--endpoints', type=lambda valor: valor.split(','),
+            default=list(ENDPOINTS),
+            help=f'Endpoints separados por vírgula: {", ".join(ENDPOINTS)}.',
+        )
+        parser.add_argument(
+            '--sem-cache', action='store_true',
+            help='Usa URLs distintas para não responder do cache.',
+        )
+
+    def _urls(self, receita_id):
+        """Retorna as URLs síncrona e assíncrona de cada endpoint."""
+        return {
+            'receitas': (
+                reverse('receita:receita-list'),
+                reverse('receita:async-receita-list'),
+            ),
+            'receita': (
+                reverse('receita:receita-detail', args=[receita_id]),
+                reverse('receita:async-receita-detail', args=[receita_id]),
+            ),
+            'me': (reverse('user:me'), reverse('user:async-me')),
+        }
+
+    def _caminhos(self, url, clientes, requisicoes):
+        """Gera o caminho de cada requisição de cada cliente."""
+        for cliente in range(clientes):
+            caminhos = []
+            for requisicao in range(requisicoes):
+                query = ''
+                if self.sem_cache:
+                    query = urlencode({'n': f'{cliente}-{requisicao}'})
+                caminhos.append((url, query))
+            yield caminhos
+
+    def _wsgi(self, url, clientes, requisicoes):
+        """Executa a carga no servidor WSGI e retorna as durações."""
+        aplicacao = get_wsgi_application()
+        duracoes, erros = [], []
+
+        def atender(caminho, query):
+            status = []
+            corpo = aplicacao({
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': caminho,
+                'QUERY_STRING': query,
+                'SERVER_NAME': self.host,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': self.host,
+                'HTTP_AUTHORIZATION': self.autorizacao,
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(),
+            }, lambda situacao, cabecalhos: status.append(situacao))
+            try:
+                for _parte in corpo:
+                    # O cliente lento segura a thread do servidor.
+                    time.sleep(self.latencia)
+            finally:
+                corpo.close()
+            return status[0]
+
+        with ThreadPoolExecutor(self.threads) as servidor:
+            def cliente(caminhos):
+                for caminho, query in caminhos:
+                    inicio = time.perf_counter()
+                    status = servidor.submit(atender, caminho, query).result()
+                    duracoes.append(time.perf_counter() - inicio)
+                    if not status.startswith('200'):
+                        erros.append(status)
+
+            threads = [
+                threading.Thread(target=cliente, args=(caminhos,))
+                for caminhos in self._caminhos(url, clientes, requisicoes)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return duracoes, erros
+
+    def _asgi(self, url, clientes, requisicoes):
+        """Executa a carga no servidor ASGI e retorna as durações."""
+        aplicacao = get_asgi_application()
+        duracoes, erros = [], []
+
+        async def atender(caminho, query):
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(mensagem):
+                if mensagem['type'] == 'http.response.start':
+                    status.append(mensagem['status'])
+                else:
+                    # O cliente lento não ocupa nenhuma thread.
+                    await asyncio.sleep(self.latencia)
+
+            await aplicacao({
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': caminho,
+                'raw_path': caminho.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': [
+                    (b'host', self.host.encode()),
+                    (b'authorization', self.autorizacao.encode()),
+                ],
+                'client': ('127.0.0.1', 50000),
+                'server': (self.host, 80),
+            }, receive, send)
+            return status[0]
+
+        async def cliente(caminhos):
+            for caminho, query in caminhos:
+                inicio = time.perf_counter()
+                status = await atender(caminho, query)
+                duracoes.append(time.perf_counter() - inicio)
+                if status != 200:
+                    erros.append(status)
+
+        async def carga():
+            await asyncio.gather(*(
+                cliente(caminhos)
+                for caminhos in self._caminhos(url, clientes, requisicoes)
+            ))
+
+        asyncio.run(carga())
+        return duracoes, erros
+
+    # Os servidores rodam neste processo, então o cache de respostas pode
+    # ficar ligado mesmo com a versão em memória local, e as métricas não
+    # vão para os arquivos do servidor.
+    @override_settings(API_CACHE_ATIVO=True, METRICAS_ATIVAS=False)
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        self.latencia = options['latencia'] / 1000
+        self.threads = options['threads']
+        self.sem_cache = options['sem_cache']
+        self.host = host_permitido()
+
+        user = criar_usuario('asgi@example.com')
+        try:
+            criar_receitas(user, options['receitas'])
+            self.autorizacao = f'Token {Token.objects.create(user=user).key}'
+            receita_id = Receita.objects.filter(user=user).first().id
+            urls = self._urls(receita_id)
+            modos = (
+                ('wsgi', self._wsgi, 0),
+                ('asgi', self._asgi, 0),
+                ('asgi-async', self._asgi, 1),
+            )
+
+            self.stdout.write(
+                f'{"endpoint":>9} {"clientes":>9} {"servidor":>11} '
+                f'{"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"erros":>6}'
+            )
+            for endpoint in options['endpoints']:
+                for clientes in options['clientes']:
+                    for nome, executar, indice in modos:
+                        caches[settings.API_CACHE_ALIAS].clear()
+                        inicio = time.perf_counter()
+                        duracoes, erros = executar(
+                            urls[endpoint][indice],
+                            clientes,
+                            options['requisicoes'],
+                        )
+                        total = time.perf_counter() - inicio
+                        medidas = resumo(duracoes)
+                        self.stdout.write(
+                            f'{endpoint:>9} {clientes:>9} {nome:>11} '
+                            f'{len(duracoes) / total:>8.1f} '
+                            f'{medidas["p50"]:>9.2f} '
+                            f'{medidas["p95"]:>9.2f} {len(erros):>6}'
+                        )
+        finally:
+            user.delete()
@@ -0,0 +1,70 @@
+"""
+Comando para medir a busca textual nas receitas.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from receita.views import ReceitaViewSet
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    cronometrar,
+    resumo,
+    transacao_descartada,
+    queryset_da_view,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+class Command(BaseCommand):
+    """
+    Mede a latência da busca (parâmetro q) variando o número de receitas
+    do usuário, para verificar que ela não cresce com o acervo.
+    """
+    help = 'Mede a busca textual nas receitas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--receitas', type=lista_de_inteiros,
+            default=[1000, 10000, 100000],
+            help='Quantidades de receitas, separadas por vírgula.',
+        )
+        parser.add_argument(
+            '--termos', nargs='+', default=['frango', 'molho crocante'],
+            help='Termos buscados.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument(
+            '--pagina', type=int, default=settings.API_PAGE_SIZE,
+            help='Receitas lidas por consulta, como em uma página da API.',
+        )
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        pagina = options['pagina']
+        self.stdout.write(f'banco: {connection.vendor}')
+        self.stdout.write(
+            f'{"receitas":>9} {"termo":>16} {"p50 ms":>9} {"p95 ms":>9}'
+        )
+        for quantidade in options['receitas']:
+            with transacao_descartada():
+                user = criar_usuario(f'busca{quantidade}@example.com')
+                criar_receitas(user, quantidade)
+                for termo in options['termos']:
+                    queryset = queryset_da_view(
+                        ReceitaViewSet, user, {'q': termo}
+                    ).prefetch_related(None)
+                    duracoes = cronometrar(
+                        lambda: list(queryset.all()[:pagina]),
+                        options['repeticoes'],
+                    )
+                    medidas = resumo(duracoes)
+                    self.stdout.write(
+                        f'{quantidade:>9} {termo:>16} '
+                        f'{medidas["p50"]:>9.2f} {medidas["p95"]:>9.2f}'
+                    )
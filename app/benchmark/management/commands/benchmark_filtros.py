@@ -0,0 +1,90 @@
+"""
+Comando para medir os filtros de receitas por atributos.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Receita
+from receita.views import ReceitaViewSet
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    cronometrar,
+    resumo,
+    transacao_descartada,
+    queryset_da_view,
+)
+
+
+def lista_de_inteiros(valor):
+    """Converte uma lista separada por vírgula em inteiros."""
+    return [int(item) for item in valor.split(',')]
+
+
+class Command(BaseCommand):
+    """
+    Compara a latência do filtro por categorias com JOIN + DISTINCT e
+    com EXISTS, variando o número de receitas e de categorias.
+    """
+    help = 'Mede os filtros de receitas por categorias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--receitas', type=lista_de_inteiros, default=[1000, 10000],
+            help='Quantidades de receitas, separadas por vírgula.',
+        )
+        parser.add_argument(
+            '--tags', type=lista_de_inteiros, default=[1, 5, 20],
+            help='Quantidades de categorias no filtro.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument(
+            '--pagina', type=int, default=settings.API_PAGE_SIZE,
+            help='Receitas lidas por consulta, como em uma página da API.',
+        )
+
+    def _estrategias(self, user, ids):
+        """Retorna os querysets comparados para o filtro."""
+        return {
+            'join+distinct': Receita.objects.filter(
+                user=user,
+                categorias__id__in=ids,
+            ).order_by('-id').distinct(),
+            'exists': queryset_da_view(
+                ReceitaViewSet,
+                user,
+                {'categorias': ','.join(str(i) for i in ids)},
+            ).prefetch_related(None),
+        }
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        pagina = options['pagina']
+        self.stdout.write(
+            f'{"receitas":>9} {"tags":>5} {"estrategia":>14} '
+            f'{"p50 ms":>9} {"p95 ms":>9}'
+        )
+        for quantidade in options['receitas']:
+            with transacao_descartada():
+                user = criar_usuario(f'filtros{quantidade}@example.com')
+                dados = criar_receitas(
+                    user,
+                    quantidade,
+                    categorias=max(options['tags']) * 2,
+                    categorias_por_receita=3,
+                )
+                for tags in options['tags']:
+                    ids = dados['categorias'][:tags]
+                    estrategias = self._estrategias(user, ids)
+                    for nome, queryset in estrategias.items():
+                        duracoes = cronometrar(
+                            lambda: list(queryset.all()[:pagina]),
+                            options['repeticoes'],
+                        )
+                        medidas = resumo(duracoes)
+                        self.stdout.write(
+                            f'{quantidade:>9} {tags:>5} {nome:>14} '
+                            f'{medidas["p50"]:>9.2f} {medidas["p95"]:>9.2f}'
+                        )
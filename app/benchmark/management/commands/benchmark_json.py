@@ -0,0 +1,77 @@
+"""
+Comando para medir a renderização em JSON de listagens grandes.
+"""
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import (
+    JSONRapidoRenderer,
+    orjson,
+)
+from receita.views import ReceitaViewSet
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    cronometrar,
+    resumo,
+    transacao_descartada,
+    view_da_requisicao,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compara o JSONRenderer do DRF com o JSONRapidoRenderer na
+    renderização dos detalhes de muitas receitas, já serializados, e
+    confere se as respostas são idênticas byte a byte.
+    """
+    help = 'Mede a renderização em JSON de listagens de receitas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--receitas', type=lista_de_inteiros, default=[1000, 10000],
+            help='Receitas renderizadas por vez, separadas por vírgula.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        self.stdout.write(
+            f'orjson: {orjson.__version__ if orjson else "não instalado"}'
+        )
+        self.stdout.write(
+            f'{"receitas":>9} {"renderer":>10} {"p50 ms":>9} '
+            f'{"MB/s":>8} {"iguais":>7}'
+        )
+        renderers = {'drf': JSONRenderer(), 'rapido': JSONRapidoRenderer()}
+        for quantidade in options['receitas']:
+            with transacao_descartada():
+                user = criar_usuario(f'json{quantidade}@example.com')
+                criar_receitas(user, quantidade)
+                view = view_da_requisicao(
+                    ReceitaViewSet, user, action='retrieve'
+                )
+                dados = view.get_serializer(
+                    view.get_queryset(), many=True
+                ).data
+
+            iguais = len({
+                renderer.render(dados) for renderer in renderers.values()
+            }) == 1
+            tamanho = len(renderers['drf'].render(dados))
+            for nome, renderer in renderers.items():
+                medidas = resumo(cronometrar(
+                    lambda: renderer.render(dados), options['repeticoes']
+                ))
+                mb_por_segundo = tamanho / medidas['p50'] / 1000
+                self.stdout.write(
+                    f'{quantidade:>9} {nome:>10} {medidas["p50"]:>9.2f} '
+                    f'{mb_por_segundo:>8.1f} '
+                    f'{"sim" if iguais else "NÃO":>7}'
+                )
@@ -0,0 +1,117 @@
+"""
+Comando para medir os filtros de receitas com todos os ingredientes e
+pelos ingredientes da despensa.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from core.models import Receita
+from receita.views import ReceitaViewSet
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    cronometrar,
+    resumo,
+    transacao_descartada,
+    queryset_da_view,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compara o filtro "match=all" agrupado (HAVING count = n) com uma
+    cadeia de EXISTS por ingrediente, e mede o filtro de despensa,
+    variando o número de receitas e de ingredientes.
+    """
+    help = 'Mede os filtros de receitas com todos os ingredientes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--receitas', type=lista_de_inteiros, default=[100000],
+            help='Quantidades de receitas, separadas por vírgula.',
+        )
+        parser.add_argument(
+            '--tags', type=lista_de_inteiros, default=[2, 3, 5],
+            help='Quantidades de ingredientes no filtro.',
+        )
+        parser.add_argument(
+            '--despensa', type=int, default=25,
+            help='Quantidade de ingredientes na despensa.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument(
+            '--pagina', type=int, default=settings.API_PAGE_SIZE,
+            help='Receitas lidas por consulta, como em uma página da API.',
+        )
+
+    def _exists_encadeados(self, user, ids):
+        """Retorna o filtro "todos" com um EXISTS por ingrediente."""
+        Through = Receita.ingredientes.through
+        queryset = Receita.objects.filter(user=user)
+        for ingrediente_id in ids:
+            queryset = queryset.filter(Exists(Through.objects.filter(
+                receita=OuterRef('pk'),
+                ingrediente=ingrediente_id,
+            )))
+
+        return queryset.order_by('-id')
+
+    def _estrategias(self, user, ids, despensa):
+        """Retorna os querysets comparados para os filtros."""
+        return {
+            'having': queryset_da_view(
+                ReceitaViewSet,
+                user,
+                {
+                    'ingredientes': ','.join(str(i) for i in ids),
+                    'match': 'all',
+                },
+            ).prefetch_related(None),
+            'exists*n': self._exists_encadeados(user, ids),
+            'despensa': queryset_da_view(
+                ReceitaViewSet,
+                user,
+                {'despensa': ','.join(str(i) for i in despensa)},
+            ).prefetch_related(None),
+        }
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        pagina = options['pagina']
+        self.stdout.write(
+            f'{"receitas":>9} {"tags":>5} {"estrategia":>14} '
+            f'{"linhas":>7} {"p50 ms":>9} {"p95 ms":>9}'
+        )
+        for quantidade in options['receitas']:
+            with transacao_descartada():
+                user = criar_usuario(f'match{quantidade}@example.com')
+                dados = criar_receitas(
+                    user,
+                    quantidade,
+                    ingredientes=max(
+                        max(options['tags']), options['despensa']
+                    ) * 2,
+                    ingredientes_por_receita=4,
+                )
+                despensa = dados['ingredientes'][:options['despensa']]
+                for tags in options['tags']:
+                    ids = dados['ingredientes'][:tags]
+                    estrategias = self._estrategias(user, ids, despensa)
+                    for nome, queryset in estrategias.items():
+                        linhas = len(list(queryset.all()[:pagina]))
+                        duracoes = cronometrar(
+                            lambda: list(queryset.all()[:pagina]),
+                            options['repeticoes'],
+                        )
+                        medidas = resumo(duracoes)
+                        self.stdout.write(
+                            f'{quantidade:>9} {tags:>5} {nome:>14} '
+                            f'{linhas:>7} '
+                            f'{medidas["p50"]:>9.2f} {medidas["p95"]:>9.2f}'
+                        )
@@ -0,0 +1,97 @@
+"""
+Comando para medir a serialização das leituras de receitas.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from receita.views import ReceitaViewSet
+from benchmark.dados import (
+    criar_usuario,
+    criar_receitas,
+)
+from benchmark.medicao import (
+    cronometrar,
+    resumo,
+    transacao_descartada,
+    view_da_requisicao,
+)
+from benchmark.management.commands.benchmark_filtros import (
+    lista_de_inteiros,
+)
+
+
+class ReceitaModelSerializerViewSet(ReceitaViewSet):
+    """ReceitaViewSet com as leituras pelos ModelSerializers."""
+    serializers_leitura = {}
+
+
+class Command(BaseCommand):
+    """
+    Compara a leitura de receitas pelos ModelSerializers com os
+    serializers de leitura rápida, que montam a resposta a partir de
+    values(). Mede consulta, serialização e renderização em JSON, e
+    confere se as respostas são idênticas byte a byte.
+    """
+    help = 'Mede a serialização das receitas na listagem e nos detalhes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--receitas', type=lista_de_inteiros, default=[50, 500],
+            help='Receitas serializadas por vez, separadas por vírgula.',
+        )
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def _renderizar(self, view_class, user, acao, quantidade):
+        """Retorna uma função que lê, serializa e renderiza as receitas."""
+        view = view_da_requisicao(view_class, user, action=acao)
+        queryset = view.get_queryset()
+        if view_class.serializers_leitura.get(acao) and not isinstance(
+            queryset.first(), dict
+        ):
+            raise CommandError(
+                f'A leitura rápida de {acao} não recebeu linhas de values().'
+            )
+        serializer_class = view.get_serializer_class()
+        contexto = view.get_serializer_context()
+
+        def renderizar():
+            receitas = queryset.all()[:quantidade]
+            dados = serializer_class(receitas, many=True, context=contexto)
+            return JSONRenderer().render(dados.data)
+
+        return renderizar
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        self.stdout.write(
+            f'{"receitas":>9} {"acao":>9} {"serializer":>10} '
+            f'{"p50 ms":>9} {"objetos/s":>10} {"iguais":>7}'
+        )
+        for quantidade in options['receitas']:
+            with transacao_descartada():
+                user = criar_usuario(f'serializacao{quantidade}@example.com')
+                criar_receitas(user, quantidade)
+                for acao in ('list', 'retrieve'):
+                    funcoes = {
+                        'model': self._renderizar(
+                            ReceitaModelSerializerViewSet,
+                            user, acao, quantidade,
+                        ),
+                        'rapido': self._renderizar(
+                            ReceitaViewSet, user, acao, quantidade,
+                        ),
+                    }
+                    iguais = len({
+                        funcao() for funcao in funcoes.values()
+                    }) == 1
+                    for nome, funcao in funcoes.items():
+                        medidas = resumo(
+                            cronometrar(funcao, options['repeticoes'])
+                        )
+                        por_segundo = quantidade / medidas['p50'] * 1000
+                        self.stdout.write(
+                            f'{quantidade:>9} {acao:>9} {nome:>10} '
+                            f'{medidas["p50"]:>9.2f} {por_segundo:>10.0f} '
+                            f'{"sim" if iguais else "NÃO":>7}'
+                        )
@@ -0,0 +1,88 @@
+"""
+Ferramentas de medição para os benchmarks.
+"""
+from contextlib import contextmanager
+import math
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+def cronometrar(funcao, repeticoes, aquecimento=1):
+    """Executa a função várias vezes e retorna as durações em segundos."""
+    for _ in range(aquecimento):
+        funcao()
+
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append(time.perf_counter() - inicio)
+
+    return duracoes
+
+
+def percentil(valores, p):
+    """Retorna o percentil p (0-100) dos valores pelo método nearest-rank."""
+    ordenados = sorted(valores)
+    posicao = max(math.ceil(p / 100 * len(ordenados)) - 1, 0)
+
+    return ordenados[posicao]
+
+
+def resumo(duracoes):
+    """Resume as durações em milissegundos."""
+    return {
+        'media': sum(duracoes) / len(duracoes) * 1000,
+        'p50': percentil(duracoes, 50) * 1000,
+        'p95': percentil(duracoes, 95) * 1000,
+        'p99': percentil(duracoes, 99) * 1000,
+        'max': max(duracoes) * 1000,
+    }
+
+
+def host_permitido():
+    """Retorna um host aceito pelo ALLOWED_HOSTS para as requisições."""
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*']
+
+    return hosts[0].lstrip('.') if hosts else 'localhost'
+
+
+@contextmanager
+def transacao_descartada():
+    """Executa o bloco em uma transação desfeita ao final.
+
+    Os dados sintéticos criados pelo benchmark não ficam no banco.
+    """
+    with transaction.atomic():
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True)
+
+
+def view_da_requisicao(view_class, user, params=None, action='list'):
+    """Retorna a view preparada para uma requisição GET do usuário.
+
+    A requisição é negociada como JSON, como as da API, para que a view
+    siga o mesmo caminho de consulta.
+    """
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = user
+    request.accepted_renderer = JSONRenderer()
+    request.accepted_media_type = JSONRenderer.media_type
+    view = view_class(
+        request=request, action=action, kwargs={}, format_kwarg=None
+    )
+
+    return view
+
+
+def queryset_da_view(view_class, user, params=None, action='list'):
+    """Retorna o queryset que a view monta para o usuário e parâmetros."""
+    return view_da_requisicao(view_class, user, params, action).get_queryset()
@@ -0,0 +1,178 @@
+"""
+Testes para os comandos de benchmark.
+"""
+from io import StringIO
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.models import Receita
+from benchmark import linha_de_base
+from benchmark.management.commands.benchmark_api import CENARIOS
+
+
+class BenchmarkCommandTests(TestCase):
+    """Testa os comandos de benchmark com dados pequenos."""
+
+    def test_benchmark_filtros(self):
+        """Testa se o benchmark de filtros mede todas as combinações."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_filtros',
+            receitas=[20],
+            tags=[1, 3],
+            repeticoes=2,
+            stdout=saida,
+        )
+
+        linhas = saida.getvalue().splitlines()
+        self.assertEqual(len(linhas), 5)
+        self.assertIn('exists', linhas[-1])
+        self.assertFalse(Receita.objects.exists())
+
+    def test_benchmark_match(self):
+        """Testa se as estratégias do filtro "todos" concordam."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_match',
+            receitas=[50],
+            tags=[1, 2],
+            despensa=3,
+            repeticoes=2,
+            stdout=saida,
+        )
+
+        linhas = [linha.split() for linha in saida.getvalue().splitlines()]
+        self.assertEqual(len(linhas), 7)
+        for having, exists in ((linhas[1], linhas[2]), (linhas[4], linhas[5])):
+            self.assertEqual(having[2], 'having')
+            self.assertEqual(having[3], exists[3])
+        self.assertFalse(Receita.objects.exists())
+
+    def test_benchmark_busca(self):
+        """Testa se o benchmark de busca mede todos os termos."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_busca',
+            receitas=[10, 20],
+            termos=['frango'],
+            repeticoes=2,
+            stdout=saida,
+        )
+
+        linhas = saida.getvalue().splitlines()
+        self.assertEqual(len(linhas), 4)
+        self.assertIn('frango', linhas[-1])
+        self.assertFalse(Receita.objects.exists())
+
+    def test_benchmark_serializacao(self):
+        """Testa se as duas serializações produzem a mesma resposta."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_serializacao',
+            receitas=[10],
+            repeticoes=2,
+            stdout=saida,
+        )
+
+        linhas = [linha.split() for linha in saida.getvalue().splitlines()]
+        self.assertEqual(len(linhas), 5)
+        self.assertTrue(all(linha[-1] == 'sim' for linha in linhas[1:]))
+        self.assertFalse(Receita.objects.exists())
+
+    def test_benchmark_json(self):
+        """Testa se os dois renderers produzem a mesma resposta."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_json',
+            receitas=[10],
+            repeticoes=2,
+            stdout=saida,
+        )
+
+        linhas = [linha.split() for linha in saida.getvalue().splitlines()]
+        self.assertEqual(len(linhas), 4)
+        self.assertTrue(all(linha[-1] == 'sim' for linha in linhas[2:]))
+        self.assertFalse(Receita.objects.exists())
+
+    def test_benchmark_api(self):
+        """Testa a medição dos cenários e a linha de base em JSON."""
+        saida = StringIO()
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = os.path.join(diretorio, 'base.json')
+
+            call_command(
+                'benchmark_api',
+                usuarios=2,
+                receitas=5,
+                repeticoes=2,
+                aquecimento=0,
+                salvar=arquivo,
+                comparar=arquivo,
+                stdout=saida,
+            )
+
+            with open(arquivo) as base:
+                cenarios = json.load(base)['cenarios']
+
+        self.assertEqual(set(cenarios), set(CENARIOS))
+        for nome, medidas in cenarios.items():
+            with self.subTest(cenario=nome):
+                self.assertEqual(medidas['erros'], 0)
+                self.assertIsNotNone(medidas['consultas'])
+        self.assertNotIn('REGRESSÃO', saida.getvalue())
+        self.assertFalse(Receita.objects.exists())
+
+    def test_comparar_linha_de_base(self):
+        """Testa a detecção de regressões na comparação."""
+        base = {'cenarios': {'listar': {'p95': 10.0, 'consultas': 4}}}
+
+        linhas = linha_de_base.comparar(
+            {'listar': {'p95': 11.0, 'consultas': 5}}, base, tolerancia=20
+        )
+
+        self.assertEqual(linhas, [
+            ('listar', 'p95', 10.0, 11.0, 10.0, False),
+            ('listar', 'consultas', 4, 5, 25.0, True),
+        ])
+
+
+@override_settings(ASYNC_DB_THREADS=2)
+class BenchmarkAsgiTests(TransactionTestCase):
+    """Testa o benchmark de carga, que usa dados gravados no banco."""
+
+    def test_benchmark_asgi(self):
+        """Testa se os três servidores respondem a todas as requisições."""
+        saida = StringIO()
+
+        call_command(
+            'benchmark_asgi',
+            clientes=[2],
+            requisicoes=2,
+            latencia=0,
+            threads=2,
+            receitas=5,
+            sem_cache=True,
+            stdout=saida,
+        )
+
+        linhas = [linha.split() for linha in saida.getvalue().splitlines()]
+        self.assertEqual(len(linhas), 10)
+        self.assertEqual(
+            {linha[2] for linha in linhas[1:]},
+            {'wsgi', 'asgi', 'asgi-async'},
+        )
+        self.assertTrue(all(linha[-1] == '0' for linha in linhas[1:]))
+        self.assertFalse(Receita.objects.exists())
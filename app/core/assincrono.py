@@ -0,0 +1,197 @@
+"""
+Views assíncronas sobre as views do DRF.
+
+O Django 3.2 não tem ORM assíncrono e, sob ASGI, executa as views
+síncronas uma de cada vez em uma única thread. As views assíncronas
+resolvem no event loop o que não depende do banco, como a autenticação
+por token em cache e as respostas já guardadas em cache, e levam as
+consultas a um executor com ASYNC_DB_THREADS threads, cada uma com a
+sua conexão. Com ASYNC_DB_THREADS igual a 0, as consultas rodam na
+thread das views síncronas, como nos testes.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _obter_executor():
+    """Retorna o executor das consultas, criando-o no primeiro uso."""
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_DB_THREADS,
+                thread_name_prefix='banco',
+            )
+
+    return _executor
+
+
+def _com_conexoes(func, *args, **kwargs):
+    """Executa a função descartando as conexões vencidas da thread.
+
+    Sem CONN_MAX_AGE, a conexão é fechada ao final, voltando ao pool
+    quando o backend tem um.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def no_banco(func, *args, **kwargs):
+    """Executa em uma thread uma função que usa o banco de dados."""
+    if not settings.ASYNC_DB_THREADS:
+        return await sync_to_async(func)(*args, **kwargs)
+
+    contexto = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _obter_executor(),
+        functools.partial(contexto.run, _com_conexoes, func, *args, **kwargs),
+    )
+
+
+class AutenticacaoPrevia(BaseAuthentication):
+    """Entrega ao DRF a autenticação feita pela view assíncrona."""
+
+    def authenticate(self, request):
+        resultado, _autenticador = request._request.autenticacao_previa
+        if isinstance(resultado, APIException):
+            raise resultado
+
+        return resultado
+
+    def authenticate_header(self, request):
+        _resultado, autenticador = request._request.autenticacao_previa
+        if autenticador is None:
+            return None
+
+        return autenticador.authenticate_header(request)
+
+
+async def _autenticar(autenticadores, request):
+    """Retorna o resultado da autenticação e o primeiro autenticador."""
+    drf_request = Request(request)
+    resultado = None
+    for autenticador in autenticadores:
+        metodo = getattr(autenticador, 'autenticar_assincrono', None)
+        try:
+            if metodo is not None:
+                resultado = await metodo(drf_request)
+            else:
+                resultado = await no_banco(
+                    autenticador.authenticate, drf_request
+                )
+        except APIException as exc:
+            resultado = exc
+        if resultado is not None:
+            break
+
+    return resultado, autenticadores[0] if autenticadores else None
+
+
+def _resposta_simples(response):
+    """Renderiza a resposta do DRF e a copia para uma HttpResponse.
+
+    Sem o método render, o handler ASGI não leva a resposta de volta
+    à thread das views síncronas.
+    """
+    if not hasattr(response, 'render'):
+        return response
+
+    response.render()
+    resposta = HttpResponse(response.content, status=response.status_code)
+    for cabecalho, valor in response.items():
+        resposta[cabecalho] = valor
+
+    return resposta
+
+
+def _responder_no_loop(view, no_loop, request, args, kwargs):
+    """Tenta responder sem o banco; retorna None se não for possível."""
+    instancia = view.cls(**view.initkwargs)
+    if getattr(view, 'actions', None):
+        acoes = dict(view.actions)
+        if 'get' in acoes:
+            acoes.setdefault('head', acoes['get'])
+        instancia.action_map = acoes
+        for metodo, acao in acoes.items():
+            setattr(instancia, metodo, getattr(instancia, acao))
+    instancia.args, instancia.kwargs = args, kwargs
+    drf_request = instancia.initialize_request(request, *args, **kwargs)
+    instancia.request = drf_request
+    instancia.headers = instancia.default_response_headers
+
+    try:
+        instancia.initial(drf_request, *args, **kwargs)
+        # Outros renderers, como o da API navegável, podem consultar o
+        # banco.
+        if not isinstance(drf_request.accepted_renderer, JSONRenderer):
+            return None
+        response = no_loop(instancia, drf_request, *args, **kwargs)
+    except Exception:
+        # Erros são respondidos pelo caminho normal, em uma thread.
+        return None
+    if response is None:
+        return None
+
+    return _resposta_simples(
+        instancia.finalize_response(drf_request, response, *args, **kwargs)
+    )
+
+
+def _responder(view, request, *args, **kwargs):
+    """Executa a view do DRF e renderiza a resposta."""
+    return _resposta_simples(view(request, *args, **kwargs))
+
+
+def visao_assincrona(view_class, actions=None, no_loop=None, **initkwargs):
+    """Cria uma view assíncrona a partir de uma view do DRF.
+
+    A autenticação usa autenticar_assincrono das classes de
+    autenticação da view, quando existe. `no_loop`, se informado,
+    recebe a view do DRF já inicializada e a requisição e retorna a
+    resposta quando puder ser dada sem acessar o banco, ou None.
+    """
+    autenticadores = [
+        classe() for classe in view_class.authentication_classes
+    ]
+    initkwargs['authentication_classes'] = [AutenticacaoPrevia]
+    if actions is not None:
+        view = view_class.as_view(actions, **initkwargs)
+    else:
+        view = view_class.as_view(**initkwargs)
+
+    async def visao(request, *args, **kwargs):
+        request.autenticacao_previa = await _autenticar(
+            autenticadores, request
+        )
+        if no_loop is not None and request.method in ('GET', 'HEAD'):
+            resposta = _responder_no_loop(view, no_loop, request, args, kwargs)
+            if resposta is not None:
+                return resposta
+
+        return await no_banco(_responder, view, request, *args, **kwargs)
+
+    # Assim como nas views do DRF; csrf_exempt não aceita corrotinas.
+    visao.csrf_exempt = True
+
+    return visao
@@ -0,0 +1,90 @@
+"""
+Backends de cache do projeto.
+"""
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# Tamanho das entradas de cada cache nomeado, compartilhado entre as
+# instâncias de cada thread assim como os dados do LocMemCache.
+_tamanhos = {}
+
+
+class LRUCache(LocMemCache):
+    """Cache em memória local com descarte LRU por entradas e bytes.
+
+    Além de MAX_ENTRIES, aceita a opção MAX_BYTES, que limita a soma
+    dos tamanhos serializados das entradas. Ao ultrapassar o limite,
+    as entradas usadas há mais tempo são descartadas.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', 0))
+        self._tamanhos = _tamanhos.setdefault(
+            name, {'entradas': {}, 'total': 0}
+        )
+
+    @property
+    def total_bytes(self):
+        """Soma dos tamanhos das entradas armazenadas."""
+        return self._tamanhos['total']
+
+    @property
+    def total_entradas(self):
+        """Quantidade de entradas armazenadas."""
+        return len(self._tamanhos['entradas'])
+
+    def _contabilizar(self, key, tamanho):
+        entradas = self._tamanhos['entradas']
+        self._tamanhos['total'] += tamanho - entradas.get(key, 0)
+        entradas[key] = tamanho
+
+    def _descontar(self, key):
+        self._tamanhos['total'] -= self._tamanhos['entradas'].pop(key, 0)
+
+    def _remover_menos_recente(self):
+        key, _ = self._cache.popitem()
+        del self._expire_info[key]
+        self._descontar(key)
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        if self._max_bytes and len(value) > self._max_bytes:
+            self._delete(key)
+            return
+        super()._set(key, value, timeout)
+        self._contabilizar(key, len(value))
+        while self._max_bytes and self.total_bytes > self._max_bytes:
+            self._remover_menos_recente()
+
+    def incr(self, key, delta=1, version=None):
+        novo_valor = super().incr(key, delta, version)
+        key = self.make_key(key, version=version)
+        with self._lock:
+            if key in self._cache:
+                self._contabilizar(key, len(self._cache[key]))
+        return novo_valor
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._limpar()
+        else:
+            for _ in range(len(self._cache) // self._cull_frequency):
+                self._remover_menos_recente()
+
+    def _delete(self, key):
+        removido = super()._delete(key)
+        if removido:
+            self._descontar(key)
+        return removido
+
+    def _limpar(self):
+        self._cache.clear()
+        self._expire_info.clear()
+        self._tamanhos['entradas'].clear()
+        self._tamanhos['total'] = 0
+
+    def clear(self):
+        with self._lock:
+            self._limpar()
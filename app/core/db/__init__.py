@@ -0,0 +1,6 @@
+"""
+Backend PostgreSQL com pool de conexões.
+
+Use 'core.db' como ENGINE. As opções do pool ficam na chave POOL das
+configurações do banco.
+"""
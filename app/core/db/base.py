@@ -0,0 +1,114 @@
+"""
+Backend PostgreSQL que retira as conexões de um pool.
+
+Em vez de abrir uma conexão a cada requisição e fechá-la ao final, o
+Django retira uma conexão do pool e a devolve ao "fechar". Com
+CONN_MAX_AGE, cada thread mantém a conexão retirada pelo tempo
+configurado, como no backend padrão.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+from psycopg2.extras import register_default_jsonb
+
+from core.db.creation import DatabaseCreation
+from core.db.pool import (
+    PoolConexoes,
+    PoolEsgotado,
+    obter_pool,
+    pools,
+)
+
+
+Database = base.Database
+
+# Opções da chave POOL das configurações do banco e seus padrões.
+OPCOES_POOL = {
+    'MIN': 0,
+    'MAX': 10,
+    'VIDA_MAXIMA': 1800,
+    'TIMEOUT': 10,
+    'VERIFICAR_APOS': 30,
+}
+
+
+def _verificar(conexao):
+    """Confirma que a conexão ainda responde."""
+    with conexao.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not conexao.autocommit:
+        conexao.rollback()
+
+
+def _redefinir(conexao):
+    """Desfaz uma transação deixada aberta na conexão devolvida."""
+    status = conexao.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        raise Database.InterfaceError('Conexão em estado desconhecido.')
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        conexao.rollback()
+
+
+def metricas_pools():
+    """Retorna as métricas dos pools do processo, por alias e banco."""
+    return {
+        f'{alias}/{dict(parametros).get("database", "")}': pool.metricas()
+        for (alias, parametros), pool in pools().items()
+    }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """DatabaseWrapper do PostgreSQL com pool de conexões."""
+    creation_class = DatabaseCreation
+
+    _pool_conexoes = None
+
+    def _pool(self, conn_params):
+        """Retorna o pool para os parâmetros de conexão."""
+        opcoes = {**OPCOES_POOL, **self.settings_dict.get('POOL', {})}
+        chave = (
+            self.alias,
+            tuple(sorted((nome, repr(valor))
+                         for nome, valor in conn_params.items())),
+        )
+
+        return obter_pool(chave, lambda: PoolConexoes(
+            conectar=lambda: Database.connect(**conn_params),
+            minimo=opcoes['MIN'],
+            maximo=opcoes['MAX'],
+            vida_maxima=opcoes['VIDA_MAXIMA'],
+            timeout=opcoes['TIMEOUT'],
+            verificar=_verificar,
+            verificar_apos=opcoes['VERIFICAR_APOS'],
+            redefinir=_redefinir,
+        ))
+
+    def get_new_connection(self, conn_params):
+        """Retira uma conexão do pool e a prepara como o backend padrão."""
+        pool = self._pool(conn_params)
+        try:
+            conexao = pool.obter()
+        except PoolEsgotado as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        self._pool_conexoes = pool
+
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', conexao.isolation_level
+        )
+        if self.isolation_level != conexao.isolation_level:
+            conexao.set_session(isolation_level=self.isolation_level)
+        # Como no backend padrão, o jsonb é lido como texto e
+        # convertido pelo JSONField.
+        register_default_jsonb(conn_or_curs=conexao, loads=lambda x: x)
+
+        return conexao
+
+    def _close(self):
+        """Devolve a conexão ao pool em vez de fechá-la."""
+        if self.connection is None:
+            return
+
+        with self.wrap_database_errors:
+            if self._pool_conexoes is None:
+                return self.connection.close()
+            return self._pool_conexoes.devolver(self.connection)
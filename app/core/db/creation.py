@@ -0,0 +1,22 @@
+"""
+Criação dos bancos de teste com o backend com pool.
+"""
+from django.db.backends.postgresql import creation
+
+from core.db.pool import fechar_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Fecha os pools antes de clonar ou remover bancos de teste.
+
+    O PostgreSQL recusa essas operações enquanto houver conexões
+    abertas com o banco, mesmo que ociosas no pool.
+    """
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        fechar_pools()
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        fechar_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,265 @@
+"""
+Pool de conexões com o banco de dados.
+
+As conexões são reaproveitadas entre requisições e threads do mesmo
+processo, evitando abrir uma conexão (TCP, autenticação e um processo
+novo no servidor) a cada requisição.
+"""
+from collections import Counter, deque
+import os
+import threading
+import time
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera."""
+
+
+class _Entrada:
+    """Conexão do pool com os instantes de criação e de último uso."""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.criada = time.monotonic()
+        self.usada = self.criada
+
+
+class PoolConexoes:
+    """Pool de conexões seguro entre threads.
+
+    conectar abre uma conexão nova. Na retirada, conexões fechadas,
+    mais velhas que vida_maxima ou que falham em verificar (chamado se
+    a conexão ficou ociosa por verificar_apos segundos) são descartadas.
+    Na devolução, redefinir desfaz o estado deixado pela requisição;
+    se falhar, a conexão é descartada. Com maximo conexões em uso, a
+    retirada espera até timeout segundos e levanta PoolEsgotado.
+    """
+
+    def __init__(self, conectar, minimo=0, maximo=10, vida_maxima=None,
+                 timeout=10, verificar=None, verificar_apos=0,
+                 redefinir=None):
+        self.conectar = conectar
+        self.minimo = minimo
+        self.maximo = maximo
+        self.vida_maxima = vida_maxima
+        self.timeout = timeout
+        self.verificar = verificar
+        self.verificar_apos = verificar_apos
+        self.redefinir = redefinir
+
+        self._condicao = threading.Condition()
+        # Pilha: as conexões usadas há menos tempo saem primeiro e as
+        # ociosas envelhecem até serem descartadas.
+        self._livres = deque()
+        self._em_uso = {}
+        self._total = 0
+        self._preenchido = False
+        self._metricas = Counter()
+
+    def _reservar(self, prazo):
+        """Retira uma conexão livre ou reserva a criação de uma nova."""
+        with self._condicao:
+            esperou = False
+            while True:
+                if self._livres:
+                    return self._livres.pop()
+                if self._total < self.maximo:
+                    self._total += 1
+                    return None
+
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    self._metricas['esgotado'] += 1
+                    raise PoolEsgotado(
+                        f'Nenhuma das {self.maximo} conexões do pool ficou '
+                        f'livre em {self.timeout} s.'
+                    )
+                if not esperou:
+                    self._metricas['esperas'] += 1
+                    esperou = True
+                self._condicao.wait(restante)
+
+    def _criar(self):
+        """Abre uma conexão para uma vaga já reservada."""
+        try:
+            entrada = _Entrada(self.conectar())
+        except Exception:
+            with self._condicao:
+                self._total -= 1
+                self._condicao.notify()
+            raise
+
+        self._metricas['criadas'] += 1
+        return entrada
+
+    def _expirada(self, entrada):
+        return (
+            self.vida_maxima is not None
+            and time.monotonic() - entrada.criada > self.vida_maxima
+        )
+
+    def _utilizavel(self, entrada):
+        """Indica se uma conexão livre pode ser entregue."""
+        if entrada.conexao.closed:
+            return False
+        if self._expirada(entrada):
+            self._metricas['expiradas'] += 1
+            return False
+
+        ociosa = time.monotonic() - entrada.usada
+        if self.verificar is not None and ociosa >= self.verificar_apos:
+            try:
+                self.verificar(entrada.conexao)
+            except Exception:
+                self._metricas['falhas_verificacao'] += 1
+                return False
+
+        return True
+
+    def _descartar(self, entrada):
+        """Fecha a conexão e libera sua vaga no pool."""
+        try:
+            entrada.conexao.close()
+        except Exception:
+            pass
+
+        with self._condicao:
+            self._total -= 1
+            self._metricas['descartadas'] += 1
+            self._condicao.notify()
+
+    def preencher(self):
+        """Abre conexões até o pool ter o mínimo de conexões."""
+        while True:
+            with self._condicao:
+                if self._total >= min(self.minimo, self.maximo):
+                    return
+                self._total += 1
+
+            entrada = self._criar()
+            with self._condicao:
+                self._livres.appendleft(entrada)
+                self._condicao.notify()
+
+    def obter(self):
+        """Retira uma conexão do pool, abrindo uma nova se preciso."""
+        if not self._preenchido:
+            self._preenchido = True
+            self.preencher()
+
+        inicio = time.monotonic()
+        prazo = inicio + self.timeout
+        while True:
+            entrada = self._reservar(prazo)
+            if entrada is None:
+                entrada = self._criar()
+            elif not self._utilizavel(entrada):
+                self._descartar(entrada)
+                continue
+            else:
+                self._metricas['reutilizadas'] += 1
+            break
+
+        with self._condicao:
+            self._em_uso[id(entrada.conexao)] = entrada
+            self._metricas['tempo_espera'] += time.monotonic() - inicio
+
+        return entrada.conexao
+
+    def devolver(self, conexao, descartar=False):
+        """Devolve uma conexão retirada do pool."""
+        with self._condicao:
+            entrada = self._em_uso.pop(id(conexao), None)
+        if entrada is None:
+            # Não pertence a este pool (por exemplo, aberta antes de um
+            # fork): apenas fecha.
+            conexao.close()
+            return
+
+        if not descartar and self.redefinir is not None:
+            try:
+                self.redefinir(conexao)
+            except Exception:
+                descartar = True
+        if descartar or conexao.closed or self._expirada(entrada):
+            self._descartar(entrada)
+            return
+
+        entrada.usada = time.monotonic()
+        with self._condicao:
+            self._livres.append(entrada)
+            self._condicao.notify()
+
+    def fechar(self):
+        """Fecha as conexões livres.
+
+        As conexões em uso são fechadas quando devolvidas.
+        """
+        with self._condicao:
+            livres = list(self._livres)
+            self._livres.clear()
+            self._em_uso.clear()
+            self._total = 0
+        for entrada in livres:
+            try:
+                entrada.conexao.close()
+            except Exception:
+                pass
+
+    def metricas(self):
+        """Retorna o estado e os contadores do pool."""
+        with self._condicao:
+            return {
+                'conexoes': self._total,
+                'em_uso': len(self._em_uso),
+                'livres': len(self._livres),
+                'maximo': self.maximo,
+                'criadas': self._metricas['criadas'],
+                'reutilizadas': self._metricas['reutilizadas'],
+                'descartadas': self._metricas['descartadas'],
+                'expiradas': self._metricas['expiradas'],
+                'falhas_verificacao': self._metricas['falhas_verificacao'],
+                'esperas': self._metricas['esperas'],
+                'esgotado': self._metricas['esgotado'],
+                'tempo_espera': self._metricas['tempo_espera'],
+            }
+
+
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+def obter_pool(chave, criar):
+    """Retorna o pool da chave no processo atual, criando-o se preciso.
+
+    Os pools são por processo: após um fork, o processo filho abre as
+    suas próprias conexões.
+    """
+    chave = (os.getpid(), chave)
+    with _lock_pools:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = _pools[chave] = criar()
+
+    return pool
+
+
+def pools():
+    """Retorna os pools do processo atual por chave."""
+    pid = os.getpid()
+    with _lock_pools:
+        return {
+            chave: pool for (dono, chave), pool in _pools.items()
+            if dono == pid
+        }
+
+
+def fechar_pools():
+    """Fecha e descarta os pools do processo atual."""
+    pid = os.getpid()
+    with _lock_pools:
+        fechados = [
+            _pools.pop(chave) for chave in list(_pools) if chave[0] == pid
+        ]
+    for pool in fechados:
+        pool.fechar()
@@ -0,0 +1,305 @@
+"""
+Instrumentação do tempo das requisições.
+
+O middleware mede, em uma amostra das requisições, o tempo total, as
+consultas ao banco e o seu tempo, a autenticação e a serialização da
+resposta, dos serializers à codificação. As medidas vão para o
+cabeçalho Server-Timing, para uma linha de log em JSON e para
+histogramas por rota, lidos no endpoint de instrumentação. Etapas podem
+se sobrepor: consultas feitas durante a autenticação ou a serialização
+contam nas duas. Todas as requisições e consultas, fora da amostra
+também, entram nas métricas do Prometheus (core.metricas).
+"""
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+from core.metricas import (
+    registrar_consulta,
+    registrar_requisicao,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores, em ms, das faixas dos histogramas; a última faixa
+# recebe o que passar de todos eles.
+FAIXAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_medicao = contextvars.ContextVar('medicao', default=None)
+
+
+class Medicao:
+    """Medidas, em segundos, da requisição em andamento."""
+    __slots__ = (
+        'consultas', 'banco', 'autenticacao', 'serializacao', 'serializando',
+    )
+
+    def __init__(self):
+        self.consultas = 0
+        self.banco = 0.0
+        self.autenticacao = 0.0
+        self.serializacao = 0.0
+        self.serializando = False
+
+
+@contextmanager
+def etapa(nome):
+    """Soma o tempo do bloco à etapa `nome` da requisição medida."""
+    medicao = _medicao.get()
+    if medicao is None:
+        yield
+        return
+
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(
+            medicao, nome,
+            getattr(medicao, nome) + time.perf_counter() - inicio,
+        )
+
+
+class SerializacaoMedidaMixin:
+    """Soma o to_representation do serializer à etapa de serialização.
+
+    Só a chamada mais externa é medida, para que o tempo dos
+    serializers aninhados não seja somado duas vezes.
+    """
+
+    def to_representation(self, instance):
+        medicao = _medicao.get()
+        if medicao is None or medicao.serializando:
+            return super().to_representation(instance)
+
+        medicao.serializando = True
+        try:
+            with etapa('serializacao'):
+                return super().to_representation(instance)
+        finally:
+            medicao.serializando = False
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """Contabiliza a consulta nas métricas e na requisição medida."""
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracao = time.perf_counter() - inicio
+        registrar_consulta(context['connection'].alias, duracao)
+        medicao = _medicao.get()
+        if medicao is not None:
+            medicao.consultas += 1
+            medicao.banco += duracao
+
+
+@receiver(connection_created)
+def instalar_na_conexao(sender, connection, **kwargs):
+    """Mede as consultas de cada conexão aberta, em qualquer thread.
+
+    A medição da requisição chega às threads das views assíncronas
+    pelo contexto copiado em no_banco.
+    """
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+def _quantil(faixas, contagem, maximo, q):
+    """Estima o quantil pelo limite da faixa em que ele cai."""
+    alvo = q * contagem
+    acumulado = 0
+    for limite, quantidade in zip(FAIXAS_MS, faixas):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return min(limite, maximo)
+
+    return maximo
+
+
+class _Histogramas:
+    """Histogramas de latência e médias das etapas por rota."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, rota, status, total, medicao):
+        """Contabiliza uma requisição medida, com durações em segundos."""
+        total_ms = total * 1000
+        faixa = bisect_left(FAIXAS_MS, total_ms)
+        with self._lock:
+            dados = self._rotas.get(rota)
+            if dados is None:
+                dados = self._rotas[rota] = {
+                    'contagem': 0,
+                    'erros': 0,
+                    'faixas': [0] * (len(FAIXAS_MS) + 1),
+                    'total': 0.0,
+                    'maximo': 0.0,
+                    'consultas': 0,
+                    'banco': 0.0,
+                    'autenticacao': 0.0,
+                    'serializacao': 0.0,
+                }
+            dados['contagem'] += 1
+            dados['erros'] += status >= 500
+            dados['faixas'][faixa] += 1
+            dados['total'] += total_ms
+            dados['maximo'] = max(dados['maximo'], total_ms)
+            dados['consultas'] += medicao.consultas
+            dados['banco'] += medicao.banco * 1000
+            dados['autenticacao'] += medicao.autenticacao * 1000
+            dados['serializacao'] += medicao.serializacao * 1000
+
+    def metricas(self):
+        """Retorna, por rota, a latência e a média de cada etapa."""
+        with self._lock:
+            rotas = {
+                rota: {**dados, 'faixas': list(dados['faixas'])}
+                for rota, dados in self._rotas.items()
+            }
+
+        ret = {}
+        for rota, dados in sorted(rotas.items()):
+            contagem, maximo = dados['contagem'], dados['maximo']
+            ret[rota] = {
+                'contagem': contagem,
+                'erros': dados['erros'],
+                'media_ms': dados['total'] / contagem,
+                'p50_ms': _quantil(dados['faixas'], contagem, maximo, 0.5),
+                'p95_ms': _quantil(dados['faixas'], contagem, maximo, 0.95),
+                'p99_ms': _quantil(dados['faixas'], contagem, maximo, 0.99),
+                'max_ms': maximo,
+                'consultas_media': dados['consultas'] / contagem,
+                'banco_ms_media': dados['banco'] / contagem,
+                'autenticacao_ms_media': dados['autenticacao'] / contagem,
+                'serializacao_ms_media': dados['serializacao'] / contagem,
+                'faixas': dict(zip(
+                    [str(limite) for limite in FAIXAS_MS] + ['+Inf'],
+                    dados['faixas'],
+                )),
+            }
+
+        return ret
+
+    def limpar(self):
+        """Descarta os histogramas."""
+        with self._lock:
+            self._rotas.clear()
+
+
+histogramas = _Histogramas()
+
+
+def _rota(request):
+    """Identifica a rota pelo método e pelo nome da view."""
+    match = getattr(request, 'resolver_match', None)
+    nome = match.view_name if match is not None else '<sem rota>'
+
+    return f'{request.method} {nome}'
+
+
+def server_timing(total, medicao):
+    """Monta o cabeçalho Server-Timing com as durações em ms."""
+    return (
+        f'banco;dur={medicao.banco * 1000:.2f};'
+        f'desc="{medicao.consultas} consultas", '
+        f'autenticacao;dur={medicao.autenticacao * 1000:.2f}, '
+        f'serializacao;dur={medicao.serializacao * 1000:.2f}, '
+        f'total;dur={total * 1000:.2f}'
+    )
+
+
+def _iniciar():
+    """Sorteia se a requisição é medida e começa a medição."""
+    taxa = settings.INSTRUMENTACAO_AMOSTRAGEM
+    if taxa <= 0 or (taxa < 1 and random.random() >= taxa):
+        return None, None
+
+    medicao = Medicao()
+    return medicao, _medicao.set(medicao)
+
+
+def _finalizar(request, response, medicao, total):
+    """Registra as medidas da requisição e as põe na resposta."""
+    rota = _rota(request)
+    histogramas.registrar(rota, response.status_code, total, medicao)
+
+    if settings.INSTRUMENTACAO_SERVER_TIMING:
+        cabecalho = server_timing(total, medicao)
+        if response.has_header('Server-Timing'):
+            cabecalho = f'{response["Server-Timing"]}, {cabecalho}'
+        response['Server-Timing'] = cabecalho
+
+    total_ms = total * 1000
+    nivel = (
+        logging.WARNING if total_ms >= settings.INSTRUMENTACAO_LENTA_MS
+        else logging.INFO
+    )
+    if logger.isEnabledFor(nivel):
+        dados = {
+            'rota': rota,
+            'caminho': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'consultas': medicao.consultas,
+            'banco_ms': round(medicao.banco * 1000, 2),
+            'autenticacao_ms': round(medicao.autenticacao * 1000, 2),
+            'serializacao_ms': round(medicao.serializacao * 1000, 2),
+        }
+        logger.log(
+            nivel, json.dumps(dados, sort_keys=True),
+            extra={'instrumentacao': dados},
+        )
+
+
+def _concluir(request, response, medicao, inicio):
+    """Registra a requisição atendida nas métricas e na amostra."""
+    total = time.perf_counter() - inicio
+    registrar_requisicao(request, response, total)
+    if medicao is not None:
+        _finalizar(request, response, medicao, total)
+
+
+@sync_and_async_middleware
+def instrumentacao_middleware(get_response):
+    """Mede as requisições; deve ser o primeiro middleware."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            medicao, token = _iniciar()
+            inicio = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                if token is not None:
+                    _medicao.reset(token)
+            _concluir(request, response, medicao, inicio)
+
+            return response
+    else:
+        def middleware(request):
+            medicao, token = _iniciar()
+            inicio = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                if token is not None:
+                    _medicao.reset(token)
+            _concluir(request, response, medicao, inicio)
+
+            return response
+
+    return middleware
@@ -0,0 +1,79 @@
+"""
+Comando para remover os arquivos enviados que não são mais usados.
+"""
+from datetime import timedelta
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.storage import (
+    contar_referencias,
+    referenciado,
+)
+
+
+def listar_arquivos(storage, pasta):
+    """Lista recursivamente os arquivos de uma pasta do storage."""
+    if not storage.exists(pasta):
+        return
+    pastas, arquivos = storage.listdir(pasta)
+    for arquivo in arquivos:
+        yield os.path.join(pasta, arquivo)
+    for subpasta in pastas:
+        yield from listar_arquivos(storage, os.path.join(pasta, subpasta))
+
+
+class Command(BaseCommand):
+    """
+    Remove os arquivos que nenhuma receita referencia mais, como imagens
+    trocadas ou de receitas apagadas. Arquivos recentes são mantidos
+    durante a carência, pois podem pertencer a um upload ainda não
+    registrado no banco.
+    """
+    help = 'Remove os arquivos de imagens sem referências.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pasta', default=os.path.join('uploads', 'receita'),
+            help='Pasta do storage a ser verificada.',
+        )
+        parser.add_argument(
+            '--carencia', type=float, default=24,
+            help='Idade mínima, em horas, de um arquivo removido.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas lista os arquivos que seriam removidos.',
+        )
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        storage = default_storage
+        referencias = contar_referencias()
+        limite = timezone.now() - timedelta(hours=options['carencia'])
+
+        removidos = 0
+        liberados = 0
+        for nome in listar_arquivos(storage, options['pasta']):
+            if referencias[nome]:
+                continue
+            # Confere de novo logo antes de remover: um upload do mesmo
+            # conteúdo pode ter reaproveitado o arquivo depois da
+            # contagem. A data é lida por último, pois o storage a
+            # renova antes de o registro ser gravado no banco.
+            if referenciado(nome) or storage.get_modified_time(nome) > limite:
+                continue
+
+            liberados += storage.size(nome)
+            removidos += 1
+            if options['dry_run']:
+                self.stdout.write(nome)
+            else:
+                storage.delete(nome)
+
+        acao = 'seriam removidos' if options['dry_run'] else 'removidos'
+        self.stdout.write(self.style.SUCCESS(
+            f'{removidos} arquivos {acao} ({liberados} bytes).'
+        ))
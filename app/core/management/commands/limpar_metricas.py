@@ -0,0 +1,31 @@
+"""
+Comando para descartar as métricas gravadas pelos processos.
+"""
+import glob
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Remove os arquivos de métricas de METRICAS_DIR. Deve ser executado
+    antes de iniciar o servidor: sem isso, os contadores dos processos
+    de uma execução anterior continuam somados em /metrics.
+    """
+    help = 'Remove as métricas gravadas pelos processos.'
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        removidos = 0
+        for caminho in glob.glob(
+            os.path.join(settings.METRICAS_DIR, '*.json*')
+        ):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                continue
+            removidos += 1
+
+        self.stdout.write(f'{removidos} arquivos de métricas removidos.')
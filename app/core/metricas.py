@@ -0,0 +1,464 @@
+"""
+Métricas da API no formato de texto do Prometheus.
+
+Cada processo acumula os seus contadores e histogramas em memória. Com
+METRICAS_ATIVAS, os processos que atendem requisições os gravam, a cada
+METRICAS_INTERVALO segundos, em um arquivo JSON próprio em
+METRICAS_DIR, e o endpoint /metrics soma os arquivos de todos os
+processos, como os workers do gunicorn, sem depender de nenhum serviço
+externo. Sem METRICAS_ATIVAS nada é gravado e o endpoint exporta só o
+processo atual. Os contadores de processos encerrados continuam na
+soma; os valores instantâneos (gauges), só os de processos vivos. Por
+isso o diretório deve ser esvaziado quando o servidor reinicia, com o
+comando limpar_metricas.
+"""
+import atexit
+from bisect import bisect_left
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.cache import LRUCache
+from core.db.pool import pools
+
+
+logger = logging.getLogger(__name__)
+
+FAIXAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FAIXAS_BYTES = tuple(
+    kib * 1024 for kib in (16, 64, 256, 1024, 4 * 1024, 16 * 1024)
+)
+
+# Métricas exportadas: tipo, descrição e, nos histogramas, os limites
+# superiores das faixas.
+METRICAS = {
+    'api_requisicoes_total': (
+        'counter', 'Requisições atendidas por view, método e status.', None,
+    ),
+    'api_requisicao_duracao_segundos': (
+        'histogram', 'Duração das requisições por view e método.',
+        FAIXAS_SEGUNDOS,
+    ),
+    'api_banco_consultas_total': (
+        'counter', 'Consultas SQL executadas.', None,
+    ),
+    'api_banco_consultas_segundos_total': (
+        'counter', 'Tempo gasto nas consultas SQL.', None,
+    ),
+    'api_banco_conexoes_abertas_total': (
+        'counter', 'Conexões com o banco abertas pelo Django.', None,
+    ),
+    'api_banco_pool_conexoes': (
+        'gauge', 'Conexões do pool por estado.', None,
+    ),
+    'api_banco_pool_maximo': (
+        'gauge', 'Máximo de conexões de cada pool.', None,
+    ),
+    'api_banco_pool_eventos_total': (
+        'counter', 'Eventos dos pools de conexões.', None,
+    ),
+    'api_banco_pool_espera_segundos_total': (
+        'counter', 'Tempo de espera por uma conexão livre do pool.', None,
+    ),
+    'api_upload_imagem_bytes': (
+        'histogram', 'Tamanho das imagens recebidas.', FAIXAS_BYTES,
+    ),
+    'api_upload_imagem_recusadas_total': (
+        'counter', 'Imagens recusadas por motivo.', None,
+    ),
+    'api_cache_requisicoes_total': (
+        'counter', 'Leituras dos caches por resultado.', None,
+    ),
+    'api_cache_tokens_acertos_compartilhados_total': (
+        'counter', 'Tokens encontrados no cache compartilhado.', None,
+    ),
+    'api_cache_entradas': (
+        'gauge', 'Entradas guardadas em cada cache.', None,
+    ),
+    'api_cache_bytes': (
+        'gauge', 'Bytes guardados em cada cache.', None,
+    ),
+}
+
+# Contadores dos pools exportados como eventos.
+EVENTOS_POOL = (
+    'criadas', 'reutilizadas', 'descartadas', 'expiradas',
+    'falhas_verificacao', 'esperas', 'esgotado',
+)
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted(
+        (rotulo, str(valor)) for rotulo, valor in rotulos.items()
+    ))
+
+
+class _Registro:
+    """Métricas do processo, gravadas periodicamente em arquivo.
+
+    Além dos contadores e histogramas atualizados durante as
+    requisições, funções registradas com `coletor` informam, no momento
+    da gravação, valores mantidos por outras partes do código.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._coletores = []
+        self._alterado = False
+        self._pid = None
+        self._gravando = False
+        self._saida_registrada = False
+
+    def _verificar_processo(self):
+        """Recomeça as métricas em um processo novo.
+
+        Após um fork, o filho não herda a thread de gravação nem deve
+        somar outra vez o que o processo pai já contou.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._gravando = False
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def iniciar_gravacao(self):
+        """Inicia a gravação periódica das métricas do processo."""
+        self._verificar_processo()
+        if self._gravando:
+            return
+
+        with self._lock:
+            if self._gravando:
+                return
+            self._gravando = True
+            registrar_saida = not self._saida_registrada
+            self._saida_registrada = True
+
+        threading.Thread(
+            target=self._gravar_periodicamente, args=(os.getpid(),),
+            name='metricas', daemon=True,
+        ).start()
+        if registrar_saida:
+            atexit.register(self._gravar_ao_sair)
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """Soma o valor a um contador."""
+        self._verificar_processo()
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+            self._alterado = True
+
+    def observar(self, nome, valor, **rotulos):
+        """Registra um valor em um histograma."""
+        self._verificar_processo()
+        faixas = METRICAS[nome][2]
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            dados = self._histogramas.get(chave)
+            if dados is None:
+                # Contagem de cada faixa, com a última acima de todas,
+                # seguida da soma dos valores.
+                dados = self._histogramas[chave] = (
+                    [0] * (len(faixas) + 1) + [0]
+                )
+            dados[bisect_left(faixas, valor)] += 1
+            dados[-1] += valor
+            self._alterado = True
+
+    def coletor(self, func):
+        """Registra uma função que gera (nome, rotulos, valor).
+
+        Pode ser usado como decorador.
+        """
+        self._coletores.append(func)
+
+        return func
+
+    def _coletar(self):
+        amostras = []
+        for coletor in self._coletores:
+            try:
+                amostras.extend(
+                    [nome, dict(rotulos), valor]
+                    for nome, rotulos, valor in coletor()
+                )
+            except Exception:
+                logger.exception('Falha no coletor de métricas %r', coletor)
+
+        return amostras
+
+    def estado(self):
+        """Retorna as métricas do processo em um dict serializável."""
+        with self._lock:
+            contadores = [
+                [nome, dict(rotulos), valor]
+                for (nome, rotulos), valor in self._contadores.items()
+            ]
+            histogramas = [
+                [nome, dict(rotulos), list(dados)]
+                for (nome, rotulos), dados in self._histogramas.items()
+            ]
+            self._alterado = False
+
+        return {
+            'pid': os.getpid(),
+            'contadores': contadores,
+            'histogramas': histogramas,
+            'coletados': self._coletar(),
+        }
+
+    def gravar(self):
+        """Grava as métricas do processo no seu arquivo."""
+        diretorio = settings.METRICAS_DIR
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f'{os.getpid()}.json')
+        temporario = f'{caminho}.tmp'
+        with self._lock_gravacao:
+            with open(temporario, 'w') as arquivo:
+                json.dump(self.estado(), arquivo)
+            # A troca é atômica: quem lê nunca vê um arquivo pela metade.
+            os.replace(temporario, caminho)
+
+    def _gravar_periodicamente(self, pid):
+        while os.getpid() == pid:
+            time.sleep(settings.METRICAS_INTERVALO)
+            if not self._alterado:
+                continue
+            try:
+                self.gravar()
+            except OSError:
+                logger.warning('Falha ao gravar as métricas', exc_info=True)
+
+    def _gravar_ao_sair(self):
+        if self._gravando and self._pid == os.getpid():
+            try:
+                self.gravar()
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Zera os contadores e histogramas do processo."""
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+
+registro = _Registro()
+
+
+def _vivo(pid):
+    """Indica se o processo ainda existe."""
+    if pid == os.getpid() or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def _estados_gravados():
+    """Lê as métricas gravadas, gravando antes as do processo atual."""
+    registro.gravar()
+    for caminho in glob.glob(os.path.join(settings.METRICAS_DIR, '*.json')):
+        try:
+            with open(caminho) as arquivo:
+                estado = json.load(arquivo)
+        except (OSError, ValueError):
+            continue
+        yield estado
+
+
+def coletar():
+    """Soma as métricas de todos os processos.
+
+    Sem METRICAS_ATIVAS, retorna só as do processo atual. Retorna um
+    dict de (nome, rotulos) para o valor, ou para a lista de faixas e
+    soma nos histogramas.
+    """
+    if settings.METRICAS_ATIVAS:
+        estados = _estados_gravados()
+    else:
+        estados = [registro.estado()]
+
+    amostras = {}
+    for estado in estados:
+        vivo = _vivo(estado['pid'])
+        for nome, rotulos, valor in (
+            estado['contadores'] + estado['coletados']
+        ):
+            if nome not in METRICAS:
+                continue
+            if METRICAS[nome][0] == 'gauge' and not vivo:
+                continue
+            chave = _chave(nome, rotulos)
+            amostras[chave] = amostras.get(chave, 0) + valor
+        for nome, rotulos, dados in estado['histogramas']:
+            if nome not in METRICAS:
+                continue
+            chave = _chave(nome, rotulos)
+            anteriores = amostras.get(chave)
+            amostras[chave] = dados if anteriores is None else [
+                anterior + atual
+                for anterior, atual in zip(anteriores, dados)
+            ]
+
+    return amostras
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        return repr(valor)
+
+    return str(valor)
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+
+    pares = ','.join(
+        '{}="{}"'.format(rotulo, valor.replace('\\', r'\\').replace(
+            '\n', r'\n').replace('"', r'\"'))
+        for rotulo, valor in rotulos
+    )
+    return f'{{{pares}}}'
+
+
+def exportar(amostras):
+    """Escreve as amostras no formato de texto do Prometheus."""
+    por_nome = {}
+    for (nome, rotulos), valor in amostras.items():
+        por_nome.setdefault(nome, []).append((rotulos, valor))
+
+    linhas = []
+    for nome, (tipo, descricao, faixas) in METRICAS.items():
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        for rotulos, valor in sorted(por_nome.get(nome, [])):
+            if tipo != 'histogram':
+                linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+                continue
+
+            acumulado = 0
+            limites = [repr(float(limite)) for limite in faixas] + ['+Inf']
+            for limite, quantidade in zip(limites, valor):
+                acumulado += quantidade
+                linhas.append(
+                    f'{nome}_bucket{_rotulos(rotulos + (("le", limite),))} '
+                    f'{acumulado}'
+                )
+            linhas.append(
+                f'{nome}_sum{_rotulos(rotulos)} {_numero(valor[-1])}'
+            )
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+
+    return '\n'.join(linhas) + '\n'
+
+
+def nome_da_view(request):
+    """Nomeia a view da requisição; nas do DRF, classe e ação."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<sem rota>'
+
+    classe = getattr(match.func, 'cls', None)
+    if classe is None:
+        return match.view_name
+
+    metodo = request.method.lower()
+    acoes = getattr(match.func, 'actions', None) or {}
+    acao = acoes.get(metodo)
+    if acao is None and metodo == 'head':
+        acao = acoes.get('get')
+
+    return f'{classe.__name__}.{acao or metodo}'
+
+
+def registrar_requisicao(request, response, duracao):
+    """Contabiliza uma requisição atendida e a sua duração em segundos.
+
+    Com METRICAS_ATIVAS, inicia a gravação no primeiro atendimento do
+    processo: comandos como migrate não gravam métricas.
+    """
+    if settings.METRICAS_ATIVAS:
+        registro.iniciar_gravacao()
+    view = nome_da_view(request)
+    registro.incrementar(
+        'api_requisicoes_total', view=view, metodo=request.method,
+        status=response.status_code,
+    )
+    registro.observar(
+        'api_requisicao_duracao_segundos', duracao, view=view,
+        metodo=request.method,
+    )
+
+
+def registrar_consulta(alias, duracao):
+    """Contabiliza uma consulta SQL e a sua duração em segundos."""
+    registro.incrementar('api_banco_consultas_total', banco=alias)
+    registro.incrementar(
+        'api_banco_consultas_segundos_total', duracao, banco=alias
+    )
+
+
+@receiver(connection_created)
+def _contar_conexao(sender, connection, **kwargs):
+    registro.incrementar(
+        'api_banco_conexoes_abertas_total', banco=connection.alias
+    )
+
+
+@registro.coletor
+def _metricas_pools():
+    for (alias, _parametros), pool in pools().items():
+        dados = pool.metricas()
+        for estado in ('em_uso', 'livres'):
+            yield (
+                'api_banco_pool_conexoes',
+                {'banco': alias, 'estado': estado},
+                dados[estado],
+            )
+        yield 'api_banco_pool_maximo', {'banco': alias}, dados['maximo']
+        for evento in EVENTOS_POOL:
+            yield (
+                'api_banco_pool_eventos_total',
+                {'banco': alias, 'evento': evento},
+                dados[evento],
+            )
+        yield (
+            'api_banco_pool_espera_segundos_total',
+            {'banco': alias},
+            dados['tempo_espera'],
+        )
+
+
+@registro.coletor
+def _metricas_cache_respostas():
+    cache = caches[settings.API_CACHE_ALIAS]
+    if isinstance(cache, LRUCache):
+        yield 'api_cache_entradas', {'cache': 'respostas'}, (
+            cache.total_entradas
+        )
+        yield 'api_cache_bytes', {'cache': 'respostas'}, cache.total_bytes
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:58
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def unificar_repetidos(apps, schema_editor):
+    """Une categorias e ingredientes repetidos antes da restrição única."""
+    Receita = apps.get_model('core', 'Receita')
+
+    for campo in ('categorias', 'ingredientes'):
+        m2m = Receita._meta.get_field(campo)
+        Model = m2m.related_model
+        Through = m2m.remote_field.through
+        coluna = f'{m2m.m2m_reverse_field_name()}_id'
+
+        grupos = Model.objects.values('user', 'nome').annotate(
+            total=Count('id'),
+            manter=Min('id'),
+        ).filter(total__gt=1)
+
+        for grupo in grupos:
+            repetidos = list(
+                Model.objects.filter(user=grupo['user'], nome=grupo['nome'])
+                .exclude(id=grupo['manter'])
+                .values_list('id', flat=True)
+            )
+            ligadas = set(
+                Through.objects.filter(**{coluna: grupo['manter']})
+                .values_list('receita_id', flat=True)
+            )
+            for linha in Through.objects.filter(**{
+                f'{coluna}__in': repetidos
+            }):
+                if linha.receita_id in ligadas:
+                    linha.delete()
+                else:
+                    setattr(linha, coluna, grupo['manter'])
+                    linha.save()
+                    ligadas.add(linha.receita_id)
+
+            Model.objects.filter(id__in=repetidos).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_rename_image_receita_imagem'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_repetidos, migrations.RunPython.noop),
+    ]
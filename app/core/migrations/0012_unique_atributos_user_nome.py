@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_unificar_atributos_repetidos'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='categoria',
+            constraint=models.UniqueConstraint(fields=('user', 'nome'), name='unique_categoria_user_nome'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingrediente',
+            constraint=models.UniqueConstraint(fields=('user', 'nome'), name='unique_ingrediente_user_nome'),
+        ),
+    ]
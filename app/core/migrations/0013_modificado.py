@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_unique_atributos_user_nome'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='modificado',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ingrediente',
+            name='modificado',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='receita',
+            name='modificado',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
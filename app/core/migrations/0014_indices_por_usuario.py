@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_modificado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='receita',
+            index=models.Index(fields=['user', '-id'], name='receita_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receita',
+            index=models.Index(fields=['user', 'modificado'], name='receita_user_modificado_idx'),
+        ),
+        # As tabelas intermediárias são criadas pelo Django, então os
+        # índices para o filtro por atributo (atributo -> receita) são
+        # criados diretamente.
+        migrations.RunSQL(
+            'CREATE INDEX receita_categorias_categoria_idx '
+            'ON core_receita_categorias (categoria_id, receita_id)',
+            'DROP INDEX receita_categorias_categoria_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX receita_ingredientes_ingrediente_idx '
+            'ON core_receita_ingredientes (ingrediente_id, receita_id)',
+            'DROP INDEX receita_ingredientes_ingrediente_idx',
+        ),
+    ]
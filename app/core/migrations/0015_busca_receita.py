@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+VETOR = (
+    "setweight(to_tsvector('portuguese', coalesce({0}.nome, '')), 'A') || "
+    "setweight(to_tsvector('portuguese', coalesce({0}.descricao, '')), 'B')"
+)
+
+CRIAR_BUSCA = [
+    f'''
+    CREATE FUNCTION receita_busca_atualizar() RETURNS trigger AS $$
+    BEGIN
+        NEW.busca := {VETOR.format('NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER receita_busca_trigger
+    BEFORE INSERT OR UPDATE OF nome, descricao, busca ON core_receita
+    FOR EACH ROW EXECUTE FUNCTION receita_busca_atualizar()
+    ''',
+    f'UPDATE core_receita SET busca = {VETOR.format("core_receita")}',
+    'CREATE INDEX receita_busca_idx ON core_receita USING gin (busca)',
+]
+
+REMOVER_BUSCA = [
+    'DROP INDEX IF EXISTS receita_busca_idx',
+    'DROP TRIGGER IF EXISTS receita_busca_trigger ON core_receita',
+    'DROP FUNCTION IF EXISTS receita_busca_atualizar()',
+]
+
+
+def _executar(comandos):
+    """Executa os comandos apenas no PostgreSQL."""
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for comando in comandos:
+            schema_editor.execute(comando)
+
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_indices_por_usuario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receita',
+            name='busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # O tsvector é mantido por trigger, o que cobre também inserções
+        # em lote, e indexado com GIN. Outros bancos não têm busca
+        # textual e usam a busca por substring (receita.busca).
+        migrations.RunPython(
+            _executar(CRIAR_BUSCA),
+            _executar(REMOVER_BUSCA),
+        ),
+    ]
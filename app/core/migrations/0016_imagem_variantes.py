@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_busca_receita'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receita',
+            name='imagem_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def registrar_existentes(apps, schema_editor):
+    """Registra os itens já existentes, para a primeira sincronização."""
+    User = apps.get_model('core', 'User')
+    RevisaoUsuario = apps.get_model('core', 'RevisaoUsuario')
+    Alteracao = apps.get_model('core', 'Alteracao')
+    modelos = [
+        (tipo, apps.get_model('core', tipo.capitalize()))
+        for tipo in ('categoria', 'ingrediente', 'receita')
+    ]
+
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        itens = [
+            (tipo, objeto_id)
+            for tipo, Model in modelos
+            for objeto_id in Model.objects.filter(
+                user_id=user_id
+            ).order_by('id').values_list('id', flat=True)
+        ]
+        Alteracao.objects.bulk_create([
+            Alteracao(
+                user_id=user_id,
+                tipo=tipo,
+                objeto_id=objeto_id,
+                revisao=revisao,
+            )
+            for revisao, (tipo, objeto_id) in enumerate(itens, start=1)
+        ], batch_size=1000)
+        RevisaoUsuario.objects.create(user_id=user_id, revisao=len(itens))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_imagem_variantes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevisaoUsuario',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.user')),
+                ('revisao', models.BigIntegerField(default=0)),
+                ('compactado', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Alteracao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('categoria', 'Categoria'), ('ingrediente', 'Ingrediente')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('revisao', models.BigIntegerField()),
+                ('removido', models.BooleanField(default=False)),
+                ('modificado', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alteracao',
+            index=models.Index(fields=['user', 'revisao'], name='alteracao_user_revisao_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='alteracao',
+            constraint=models.UniqueConstraint(fields=('user', 'tipo', 'objeto_id'), name='unique_alteracao_user_tipo_objeto'),
+        ),
+        migrations.RunPython(
+            registrar_existentes, migrations.RunPython.noop
+        ),
+    ]
@@ -1,16 +1,21 @@
 """
 Models para o Banco de Dados
 """
+from collections import defaultdict
+from contextlib import contextmanager
+import threading
 import uuid
 import os
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
+from django.contrib.postgres.search import SearchVectorField
 
 def imagem_receita_file_path(instance, filename):
     '''Gera um caminho para o arquivo de imagem da receita.'''
@@ -43,6 +48,45 @@ class UserManager(BaseUserManager):
         return user
 
 
+class AtributoReceitaManager(models.Manager):
+    """Administrador de categorias e ingredientes."""
+
+    def bulk_get_or_create(self, user, nomes):
+        """Recupera ou cria em lote os itens do usuário pelo nome.
+
+        Retorna um dicionário de nome para objeto. A unicidade de
+        (user, nome) garante que requisições concorrentes não criem
+        itens repetidos.
+        """
+        nomes = list(dict.fromkeys(nomes))
+        if not nomes:
+            return {}
+
+        itens = {
+            item.nome: item
+            for item in self.filter(user=user, nome__in=nomes)
+        }
+        faltantes = [nome for nome in nomes if nome not in itens]
+        if faltantes:
+            self.bulk_create(
+                [self.model(user=user, nome=nome) for nome in faltantes],
+                ignore_conflicts=True,
+            )
+            criados = {
+                item.nome: item
+                for item in self.filter(user=user, nome__in=faltantes)
+            }
+            itens.update(criados)
+            # O bulk_create não dispara os sinais que registram a criação.
+            Alteracao.objects.registrar(
+                user.id,
+                self.model._meta.model_name,
+                [item.id for item in criados.values()],
+            )
+
+        return itens
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """Usuário do sistema."""
     email = models.EmailField(max_length=255, unique=True)
@@ -69,6 +113,25 @@ class Receita(models.Model):
     categorias = models.ManyToManyField('Categoria')
     ingredientes = models.ManyToManyField('Ingrediente')
     imagem = models.ImageField(null=True, upload_to=imagem_receita_file_path)
+    # Variantes redimensionadas da imagem: {variante: {formato: caminho}}.
+    imagem_variantes = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
+    modificado = models.DateTimeField(auto_now=True)
+    # Mantido por trigger no PostgreSQL; o índice GIN é criado na migração.
+    busca = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='receita_user_id_idx',
+            ),
+            models.Index(
+                fields=['user', 'modificado'],
+                name='receita_user_modificado_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.nome
@@ -81,6 +144,17 @@ class Categoria(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    modificado = models.DateTimeField(auto_now=True)
+
+    objects = AtributoReceitaManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'nome'],
+                name='unique_categoria_user_nome',
+            ),
+        ]
 
     def __str__(self):
         return self.nome
@@ -93,6 +167,191 @@ class Ingrediente(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    modificado = models.DateTimeField(auto_now=True)
+
+    objects = AtributoReceitaManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'nome'],
+                name='unique_ingrediente_user_nome',
+            ),
+        ]
 
     def __str__(self):
         return self.nome
+
+
+_registro = threading.local()
+
+
+class AlteracaoManager(models.Manager):
+    """Administrador do registro de alterações para a sincronização."""
+
+    def _alocar(self, user_id, quantidade):
+        """Reserva revisões do usuário e retorna a anterior à primeira.
+
+        O UPDATE bloqueia o contador do usuário até o fim da transação,
+        então as revisões de um usuário são gravadas em ordem: quem lê a
+        revisão N já enxerga todas as anteriores.
+        """
+        contadores = RevisaoUsuario.objects.filter(user_id=user_id)
+        incremento = models.F('revisao') + quantidade
+        if not contadores.update(revisao=incremento):
+            RevisaoUsuario.objects.get_or_create(user_id=user_id)
+            contadores.update(revisao=incremento)
+
+        return contadores.values_list('revisao', flat=True).get() - quantidade
+
+    def _gravar(self, pendentes):
+        """Grava as alterações pendentes, uma transação por usuário."""
+        por_usuario = defaultdict(dict)
+        for (user_id, tipo, objeto_id), removido in pendentes.items():
+            por_usuario[user_id][tipo, objeto_id] = removido
+
+        for user_id, itens in por_usuario.items():
+            with transaction.atomic(using=self.db):
+                revisao = self._alocar(user_id, len(itens))
+                filtro = models.Q()
+                for tipo in {tipo for tipo, _ in itens}:
+                    filtro |= models.Q(tipo=tipo, objeto_id__in=[
+                        objeto_id for t, objeto_id in itens if t == tipo
+                    ])
+                existentes = {
+                    (alteracao.tipo, alteracao.objeto_id): alteracao
+                    for alteracao in self.filter(filtro, user_id=user_id)
+                }
+
+                agora = timezone.now()
+                novas, atualizadas = [], []
+                for (tipo, objeto_id), removido in itens.items():
+                    revisao += 1
+                    alteracao = existentes.get((tipo, objeto_id))
+                    if alteracao is None:
+                        novas.append(self.model(
+                            user_id=user_id,
+                            tipo=tipo,
+                            objeto_id=objeto_id,
+                            revisao=revisao,
+                            removido=removido,
+                        ))
+                        continue
+                    alteracao.revisao = revisao
+                    alteracao.removido = removido
+                    # O bulk_update não aplica o auto_now.
+                    alteracao.modificado = agora
+                    atualizadas.append(alteracao)
+
+                self.bulk_update(
+                    atualizadas, ['revisao', 'removido', 'modificado']
+                )
+                self.bulk_create(novas)
+
+    def registrar(self, user_id, tipo, ids, removido=False):
+        """Registra a alteração ou remoção de itens do usuário.
+
+        Cada item recebe uma nova revisão e mantém apenas a última
+        alteração. Dentro de em_lote, o registro é adiado até o fim do
+        bloco.
+        """
+        if user_id in getattr(_registro, 'suspensos', ()):
+            return
+        pendentes = getattr(_registro, 'pendentes', None)
+        alteracoes = {
+            (user_id, tipo, objeto_id): removido for objeto_id in ids
+        }
+        if not alteracoes:
+            return
+        if pendentes is not None:
+            pendentes.update(alteracoes)
+        else:
+            self._gravar(alteracoes)
+
+    @contextmanager
+    def em_lote(self):
+        """Acumula os registros do bloco e os grava ao final.
+
+        Deve ser usado dentro da transação das alterações, para que o
+        registro seja gravado junto com elas.
+        """
+        if getattr(_registro, 'pendentes', None) is not None:
+            yield
+            return
+
+        _registro.pendentes = {}
+        try:
+            yield
+            pendentes = _registro.pendentes
+        finally:
+            _registro.pendentes = None
+        self._gravar(pendentes)
+
+    def suspender(self, user_id):
+        """Deixa de registrar as alterações do usuário nesta thread.
+
+        Usado na exclusão do usuário, cujo registro é removido junto.
+        """
+        if not hasattr(_registro, 'suspensos'):
+            _registro.suspensos = set()
+        _registro.suspensos.add(user_id)
+
+    def retomar(self, user_id):
+        """Volta a registrar as alterações do usuário."""
+        getattr(_registro, 'suspensos', set()).discard(user_id)
+
+
+class RevisaoUsuario(models.Model):
+    """Última revisão dos dados de um usuário."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    revisao = models.BigIntegerField(default=0)
+    # Remoções até esta revisão já foram descartadas pela compactação.
+    compactado = models.BigIntegerField(default=0)
+
+
+class Alteracao(models.Model):
+    """Última alteração de um item do usuário, para a sincronização.
+
+    Há no máximo uma linha por item: cada alteração move o item para
+    uma revisão nova. Itens removidos ficam como remoções até serem
+    compactados. As associações entre receitas e atributos alteram a
+    revisão da receita.
+    """
+    TIPOS = [
+        ('receita', 'Receita'),
+        ('categoria', 'Categoria'),
+        ('ingrediente', 'Ingrediente'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    objeto_id = models.BigIntegerField()
+    revisao = models.BigIntegerField()
+    removido = models.BooleanField(default=False)
+    modificado = models.DateTimeField(auto_now=True)
+
+    objects = AlteracaoManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'tipo', 'objeto_id'],
+                name='unique_alteracao_user_tipo_objeto',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'revisao'],
+                name='alteracao_user_revisao_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} {self.objeto_id} ({self.revisao})'
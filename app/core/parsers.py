@@ -0,0 +1,40 @@
+"""
+Parsers da API.
+"""
+from io import BytesIO
+
+from django.conf import settings
+
+from rest_framework.parsers import JSONParser
+
+from core.renderers import (
+    JSONRapidoRenderer,
+    orjson,
+)
+
+
+class JSONRapidoParser(JSONParser):
+    """Parser JSON que usa o orjson quando instalado.
+
+    Corpos em UTF-8 são lidos pelo orjson, que recusa NaN e Infinity
+    como o JSONParser estrito. Outras codificações, ou documentos que o
+    orjson recusa, passam pelo JSONParser, que também produz as
+    mensagens de erro.
+    """
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        corpo = stream.read() if stream is not None else b''
+        try:
+            return orjson.loads(corpo)
+        except orjson.JSONDecodeError:
+            # Números fora de 64 bits e substitutos isolados são aceitos
+            # pelo json da biblioteca padrão.
+            return super().parse(
+                BytesIO(corpo), media_type, parser_context
+            )
@@ -0,0 +1,83 @@
+"""
+Renderers da API.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from core.instrumentacao import etapa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Tipos que o orjson converteria de outro jeito são repassados ao
+# encoder do DRF, que define o formato das respostas.
+OPCOES_ORJSON = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+) if orjson is not None else 0
+
+_padrao = encoders.JSONEncoder().default
+
+
+def codificar(dados):
+    """Codifica os dados em JSON compacto com o orjson.
+
+    Produz os mesmos bytes que o JSONRenderer do DRF com as
+    configurações padrão. Retorna None se o orjson não estiver
+    instalado ou não puder codificar os dados.
+    """
+    if orjson is None:
+        return None
+
+    try:
+        ret = orjson.dumps(dados, default=_padrao, option=OPCOES_ORJSON)
+    except (orjson.JSONEncodeError, TypeError):
+        return None
+
+    # Como o DRF, escapa U+2028 e U+2029 para manter o JSON um
+    # subconjunto de JavaScript.
+    return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+        b'\xe2\x80\xa9', b'\\u2029'
+    )
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """Renderer JSON que usa o orjson quando instalado.
+
+    As respostas são idênticas às do JSONRenderer: Decimal, datas e
+    demais tipos passam pelo encoder do DRF. Com indentação (como na
+    API navegável), saída não compacta, ensure_ascii ou um encoder
+    próprio, usa o JSONRenderer. Diferenças conhecidas do orjson:
+    floats muito grandes ou pequenos são escritos sem o expoente com
+    sinal (1e16 em vez de 1e+16) e NaN vira null em vez de erro.
+    """
+
+    def _usa_padrao(self, accepted_media_type, renderer_context):
+        """Indica se a resposta deve ser gerada pelo JSONRenderer."""
+        return (
+            self.get_indent(accepted_media_type, renderer_context)
+            is not None
+            or not self.compact
+            or self.ensure_ascii
+            or self.encoder_class is not encoders.JSONEncoder
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        with etapa('serializacao'):
+            if not self._usa_padrao(
+                accepted_media_type, renderer_context or {}
+            ):
+                ret = codificar(data)
+                if ret is not None:
+                    return ret
+
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
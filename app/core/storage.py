@@ -0,0 +1,95 @@
+"""
+Storage de arquivos do projeto.
+"""
+from collections import Counter
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+
+class ConteudoEnderecadoStorage(FileSystemStorage):
+    """Storage em disco que guarda cada conteúdo uma única vez.
+
+    O arquivo é gravado em ``<pasta>/ab/cd/<sha256><ext>``, em que a
+    pasta e a extensão vêm do nome pedido (upload_to) e o SHA-256 é o do
+    conteúdo. Um conteúdo já existente não é gravado de novo e o mesmo
+    caminho é retornado, então vários registros podem apontar para o
+    mesmo arquivo. Por isso os arquivos não devem ser removidos
+    diretamente, e sim pelo comando limpar_arquivos, que só apaga os que
+    não são mais referenciados.
+    """
+
+    def _hash(self, content):
+        """Retorna o SHA-256 do conteúdo.
+
+        Usa o hash calculado durante o upload (ImagemUploadHandler),
+        quando houver, ou lê o conteúdo em blocos.
+        """
+        sha256 = getattr(content, 'sha256', None)
+        if sha256:
+            return sha256
+
+        hash = hashlib.sha256()
+        for chunk in content.chunks():
+            hash.update(chunk)
+
+        return hash.hexdigest()
+
+    def caminho_conteudo(self, name, sha256):
+        """Retorna o caminho do conteúdo com o hash informado."""
+        pasta = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+
+        return os.path.join(pasta, sha256[:2], sha256[2:4], sha256 + ext)
+
+    def _save(self, name, content):
+        name = self.caminho_conteudo(name, self._hash(content))
+        if self.exists(name):
+            # Renova a carência do limpar_arquivos: o arquivo pode estar
+            # sem referências até o novo registro ser gravado.
+            os.utime(self.path(name))
+            return name
+
+        return super()._save(name, content)
+
+
+def contar_referencias():
+    """Conta as referências a cada arquivo das receitas.
+
+    Considera a imagem de cada receita e as variantes geradas a partir
+    dela.
+    """
+    from core.models import Receita
+
+    referencias = Counter()
+    registros = Receita.objects.exclude(imagem='').exclude(
+        imagem__isnull=True
+    ).values_list('imagem', 'imagem_variantes')
+    for imagem, variantes in registros.iterator():
+        referencias[imagem] += 1
+        for formatos in (variantes or {}).values():
+            referencias.update(formatos.values())
+
+    return referencias
+
+
+def referenciado(nome):
+    """Verifica no banco se alguma receita usa o arquivo agora.
+
+    Usado antes de remover cada arquivo, pois a contagem de
+    contar_referencias pode ter ficado desatualizada.
+    """
+    from core.models import Receita
+
+    receitas = Receita.objects.exclude(imagem='').exclude(
+        imagem__isnull=True
+    )
+    if receitas.filter(imagem=nome).exists():
+        return True
+
+    return receitas.annotate(
+        variantes=Cast('imagem_variantes', TextField()),
+    ).filter(variantes__contains=f'"{nome}"').exists()
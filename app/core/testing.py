@@ -0,0 +1,137 @@
+"""
+Utilitários de teste para orçamentos de consultas SQL e de tempo.
+
+Os testes declaram quantas consultas e quanto tempo uma requisição
+pode gastar, inclusive em função do tamanho dos dados, para que
+consultas por linha (N+1) e lentidões falhem nos testes. O tempo
+depende da máquina, então só é verificado com a variável de ambiente
+TESTES_FATOR_TEMPO, que multiplica os orçamentos de tempo (1 usa os
+valores declarados). Sem ela, como na CI, só as consultas contam.
+"""
+from contextlib import ContextDecorator
+import os
+import time
+
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connections,
+)
+from django.test.utils import CaptureQueriesContext
+
+
+def _fator_tempo():
+    return float(os.environ.get('TESTES_FATOR_TEMPO', 0))
+
+
+def _valor(orcamento, tamanho):
+    """Resolve um orçamento fixo ou em função do tamanho dos dados."""
+    return orcamento(tamanho) if callable(orcamento) else orcamento
+
+
+def formatar_consultas(consultas):
+    """Formata as consultas capturadas, uma por linha, numeradas."""
+    return '\n'.join(
+        f'{posicao}. {consulta["sql"]}'
+        for posicao, consulta in enumerate(consultas, 1)
+    )
+
+
+class orcamento(ContextDecorator):
+    """Verifica o máximo de consultas SQL e o tempo de um bloco.
+
+    Usado como gerenciador de contexto ou como decorador. Ao exceder
+    o orçamento, falha com AssertionError listando as consultas feitas.
+    Depois do bloco, `consultas` e `duracao_ms` guardam o que foi
+    medido.
+    """
+
+    def __init__(self, consultas=None, tempo_ms=None, using=DEFAULT_DB_ALIAS,
+                 descricao=''):
+        self.max_consultas = consultas
+        self.tempo_ms = tempo_ms
+        self.using = using
+        self.descricao = descricao
+        self.consultas = []
+        self.duracao_ms = None
+
+    def __enter__(self):
+        self._captura = CaptureQueriesContext(connections[self.using])
+        self._captura.__enter__()
+        self._inicio = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duracao_ms = (time.perf_counter() - self._inicio) * 1000
+        self._captura.__exit__(exc_type, exc_value, traceback)
+        self.consultas = self._captura.captured_queries
+        if exc_type is not None:
+            return False
+
+        erros = []
+        if (self.max_consultas is not None
+                and len(self.consultas) > self.max_consultas):
+            erros.append(
+                f'{len(self.consultas)} consultas, mais que o orçamento '
+                f'de {self.max_consultas}.'
+            )
+        fator = _fator_tempo()
+        if (self.tempo_ms is not None and fator
+                and self.duracao_ms > self.tempo_ms * fator):
+            erros.append(
+                f'{self.duracao_ms:.1f} ms, mais que o orçamento de '
+                f'{self.tempo_ms * fator:.1f} ms.'
+            )
+        if erros:
+            prefixo = f'{self.descricao}: ' if self.descricao else ''
+            raise AssertionError(
+                prefixo + ' '.join(erros) + '\nConsultas:\n'
+                + formatar_consultas(self.consultas)
+            )
+
+        return False
+
+
+class OrcamentoMixin:
+    """Asserções de orçamento para TestCases."""
+
+    def assertOrcamento(self, consultas=None, tempo_ms=None,
+                        using=DEFAULT_DB_ALIAS):
+        """Verifica as consultas e o tempo do bloco `with`."""
+        return orcamento(consultas, tempo_ms, using)
+
+    def assertEscala(self, preparar, executar, tamanhos=(2, 20),
+                     consultas=None, tempo_ms=None, constante=True,
+                     using=DEFAULT_DB_ALIAS):
+        """Verifica o orçamento de uma operação com dados crescentes.
+
+        Para cada tamanho n, em ordem, chama preparar(n) para deixar os
+        dados com esse tamanho e executa executar(n) dentro do
+        orçamento. `consultas` e `tempo_ms` são números ou funções de
+        n. Com `constante`, o número de consultas também não pode
+        crescer com n. Retorna as medidas por tamanho.
+        """
+        medidas = {}
+        for tamanho in tamanhos:
+            preparar(tamanho)
+            with orcamento(
+                _valor(consultas, tamanho),
+                _valor(tempo_ms, tamanho),
+                using,
+                descricao=f'n={tamanho}',
+            ) as medida:
+                executar(tamanho)
+            medidas[tamanho] = medida
+
+        if constante:
+            menor, maior = medidas[tamanhos[0]], medidas[tamanhos[-1]]
+            if len(maior.consultas) > len(menor.consultas):
+                self.fail(
+                    f'As consultas cresceram de {len(menor.consultas)} '
+                    f'(n={tamanhos[0]}) para {len(maior.consultas)} '
+                    f'(n={tamanhos[-1]}).\nConsultas com '
+                    f'n={tamanhos[-1]}:\n'
+                    + formatar_consultas(maior.consultas)
+                )
+
+        return medidas
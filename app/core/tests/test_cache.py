@@ -0,0 +1,74 @@
+"""
+Testes para os backends de cache do projeto.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+def create_cache(nome, **opcoes):
+    """Cria e retorna um cache LRU limpo."""
+    cache = LRUCache(nome, {'OPTIONS': opcoes})
+    cache.clear()
+    return cache
+
+
+class LRUCacheTestes(SimpleTestCase):
+    """Testa o cache LRU em memória."""
+
+    def test_limite_de_bytes(self):
+        """Testa se o total de bytes não ultrapassa o limite."""
+        cache = create_cache('teste-bytes', MAX_BYTES=2000)
+
+        for i in range(50):
+            cache.set(f'chave{i}', 'x' * 100)
+
+        self.assertLessEqual(cache.total_bytes, 2000)
+        self.assertIsNotNone(cache.get('chave49'))
+        self.assertIsNone(cache.get('chave0'))
+
+    def test_descarta_menos_recente(self):
+        """Testa se a entrada usada há mais tempo é descartada."""
+        cache = create_cache('teste-lru', MAX_BYTES=400)
+        cache.set('a', 'x' * 100)
+        cache.set('b', 'x' * 100)
+        cache.set('c', 'x' * 100)
+
+        cache.get('a')
+        cache.set('d', 'x' * 100)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+
+    def test_valor_maior_que_limite(self):
+        """Testa se valores maiores que o limite não são guardados."""
+        cache = create_cache('teste-grande', MAX_BYTES=100)
+        cache.set('grande', 'x' * 1000)
+
+        self.assertIsNone(cache.get('grande'))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_exclusao_desconta_bytes(self):
+        """Testa se excluir e limpar entradas atualiza o total."""
+        cache = create_cache('teste-exclusao', MAX_BYTES=1000)
+        cache.set('a', 'x' * 100)
+        cache.set('b', 'x' * 100)
+
+        cache.delete('a')
+        self.assertLess(cache.total_bytes, 200)
+        cache.clear()
+        self.assertEqual(cache.total_bytes, 0)
+
+    @patch('django.core.cache.backends.locmem.time.time')
+    def test_ttl(self, patched_time):
+        """Testa se as entradas expiram após o timeout."""
+        patched_time.return_value = 1000
+        cache = create_cache('teste-ttl')
+        cache.set('a', 1, timeout=10)
+
+        patched_time.return_value = 1011
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.total_bytes, 0)
@@ -0,0 +1,231 @@
+"""
+Testes para o pool de conexões e o backend PostgreSQL com pool.
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.db.utils import (
+    ConnectionHandler,
+    OperationalError,
+)
+from django.test import SimpleTestCase
+
+from psycopg2 import extensions
+
+from core.db.pool import (
+    PoolConexoes,
+    PoolEsgotado,
+    fechar_pools,
+)
+
+
+class ConexaoFalsa:
+    """Conexão falsa que registra se foi fechada."""
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class PoolConexoesTestes(SimpleTestCase):
+    """Testa o pool de conexões."""
+
+    def _pool(self, **opcoes):
+        self.conexoes = []
+
+        def conectar():
+            conexao = ConexaoFalsa()
+            self.conexoes.append(conexao)
+            return conexao
+
+        return PoolConexoes(conectar, **opcoes)
+
+    def test_reaproveita_conexoes(self):
+        """Testa se uma conexão devolvida é entregue de novo."""
+        pool = self._pool()
+
+        conexao = pool.obter()
+        pool.devolver(conexao)
+
+        self.assertIs(pool.obter(), conexao)
+        metricas = pool.metricas()
+        self.assertEqual(metricas['criadas'], 1)
+        self.assertEqual(metricas['reutilizadas'], 1)
+        self.assertEqual(metricas['em_uso'], 1)
+
+    def test_minimo_de_conexoes(self):
+        """Testa se o pool abre o mínimo de conexões na primeira retirada."""
+        pool = self._pool(minimo=3)
+
+        pool.obter()
+
+        self.assertEqual(len(self.conexoes), 3)
+        self.assertEqual(pool.metricas()['livres'], 2)
+
+    def test_pool_esgotado(self):
+        """Testa a espera e o erro com todas as conexões em uso."""
+        pool = self._pool(maximo=1, timeout=0.01)
+        pool.obter()
+
+        with self.assertRaises(PoolEsgotado):
+            pool.obter()
+
+        metricas = pool.metricas()
+        self.assertEqual(metricas['esperas'], 1)
+        self.assertEqual(metricas['esgotado'], 1)
+
+    def test_espera_pela_devolucao(self):
+        """Testa se uma thread à espera recebe a conexão devolvida."""
+        pool = self._pool(maximo=1, timeout=5)
+        conexao = pool.obter()
+        recebidas = []
+
+        thread = threading.Thread(
+            target=lambda: recebidas.append(pool.obter())
+        )
+        thread.start()
+        pool.devolver(conexao)
+        thread.join()
+
+        self.assertEqual(recebidas, [conexao])
+
+    def test_vida_maxima(self):
+        """Testa o descarte das conexões mais velhas que a vida máxima."""
+        pool = self._pool(vida_maxima=60)
+        with patch('core.db.pool.time.monotonic', return_value=0):
+            conexao = pool.obter()
+            pool.devolver(conexao)
+
+        with patch('core.db.pool.time.monotonic', return_value=61):
+            nova = pool.obter()
+
+        self.assertIsNot(nova, conexao)
+        self.assertTrue(conexao.closed)
+        self.assertEqual(pool.metricas()['expiradas'], 1)
+
+    def test_verificacao_na_retirada(self):
+        """Testa se conexões ociosas que falham são descartadas."""
+        verificar = MagicMock(side_effect=Exception('conexão perdida'))
+        pool = self._pool(verificar=verificar, verificar_apos=30)
+        with patch('core.db.pool.time.monotonic', return_value=0):
+            conexao = pool.obter()
+            pool.devolver(conexao)
+            # Usada há pouco: não é verificada.
+            self.assertIs(pool.obter(), conexao)
+            pool.devolver(conexao)
+
+        with patch('core.db.pool.time.monotonic', return_value=31):
+            nova = pool.obter()
+
+        self.assertIsNot(nova, conexao)
+        verificar.assert_called_once_with(conexao)
+        self.assertEqual(pool.metricas()['falhas_verificacao'], 1)
+
+    def test_conexao_fechada_descartada(self):
+        """Testa se uma conexão fechada pelo servidor não é entregue."""
+        pool = self._pool()
+        conexao = pool.obter()
+        pool.devolver(conexao)
+        conexao.closed = 2
+
+        self.assertIsNot(pool.obter(), conexao)
+
+    def test_falha_ao_redefinir(self):
+        """Testa o descarte de conexões que não podem ser redefinidas."""
+        pool = self._pool(redefinir=MagicMock(side_effect=Exception))
+        conexao = pool.obter()
+
+        pool.devolver(conexao)
+
+        self.assertTrue(conexao.closed)
+        self.assertEqual(pool.metricas()['conexoes'], 0)
+
+    def test_falha_ao_conectar_libera_vaga(self):
+        """Testa se uma falha ao conectar não ocupa vaga no pool."""
+        pool = PoolConexoes(
+            MagicMock(side_effect=[Exception, ConexaoFalsa()]), maximo=1
+        )
+
+        with self.assertRaises(Exception):
+            pool.obter()
+
+        self.assertIsNotNone(pool.obter())
+
+    def test_fechar(self):
+        """Testa se fechar o pool fecha as conexões livres e as em uso."""
+        pool = self._pool(minimo=2)
+        em_uso = pool.obter()
+
+        pool.fechar()
+        pool.devolver(em_uso)
+
+        self.assertTrue(all(conexao.closed for conexao in self.conexoes))
+
+
+class BackendPoolTestes(SimpleTestCase):
+    """Testa o backend PostgreSQL com pool, com o psycopg2 simulado."""
+
+    def setUp(self):
+        self.conexoes = []
+        connect = patch('core.db.base.Database.connect', self._conectar)
+        connect.start()
+        self.addCleanup(connect.stop)
+        jsonb = patch('core.db.base.register_default_jsonb')
+        jsonb.start()
+        self.addCleanup(jsonb.stop)
+        self.addCleanup(fechar_pools)
+
+        self.handler = ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.dummy'},
+            'pool': {
+                'ENGINE': 'core.db',
+                'NAME': 'receitas',
+                'POOL': {'MAX': 1, 'TIMEOUT': 0.01},
+            },
+        })
+
+    def _conectar(self, **parametros):
+        conexao = MagicMock(closed=0, isolation_level=None, autocommit=True)
+        conexao.get_parameter_status.return_value = 'UTC'
+        conexao.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        self.conexoes.append(conexao)
+        return conexao
+
+    def _wrapper(self):
+        return self.handler.create_connection('pool')
+
+    def test_reaproveita_conexao_entre_wrappers(self):
+        """Testa se a conexão fechada por um wrapper volta ao pool."""
+        primeiro = self._wrapper()
+        primeiro.ensure_connection()
+        conexao = primeiro.connection
+        primeiro.close()
+
+        segundo = self._wrapper()
+        segundo.ensure_connection()
+
+        self.assertIs(segundo.connection, conexao)
+        self.assertEqual(len(self.conexoes), 1)
+        conexao.close.assert_not_called()
+
+    def test_desfaz_transacao_aberta(self):
+        """Testa se uma transação deixada aberta é desfeita."""
+        wrapper = self._wrapper()
+        wrapper.ensure_connection()
+        conexao = wrapper.connection
+        conexao.info.transaction_status = (
+            extensions.TRANSACTION_STATUS_INTRANS
+        )
+
+        wrapper.close()
+
+        conexao.rollback.assert_called_once()
+
+    def test_pool_esgotado(self):
+        """Testa se o pool esgotado vira um OperationalError do Django."""
+        self._wrapper().ensure_connection()
+
+        with self.assertRaises(OperationalError):
+            self._wrapper().ensure_connection()
@@ -0,0 +1,259 @@
+"""
+Testes para a instrumentação das requisições.
+"""
+import json
+import time
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    AsyncClient,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import (
+    serializers,
+    status,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.instrumentacao import (
+    FAIXAS_MS,
+    Medicao,
+    _Histogramas,
+    histogramas,
+)
+from core.models import Categoria
+from user.authentication import cache_tokens
+
+
+INSTRUMENTACAO_URL = reverse('instrumentacao')
+RECEITAS_URL = reverse('receita:receita-list')
+CATEGORIAS_URL = reverse('receita:categoria-list')
+ROTA_RECEITAS = 'GET receita:receita-list'
+
+
+def etapas(cabecalho):
+    """Retorna as etapas do cabeçalho Server-Timing e suas durações."""
+    ret = {}
+    for metrica in cabecalho.split(', '):
+        nome, *params = metrica.split(';')
+        ret[nome] = dict(param.split('=', 1) for param in params)
+
+    return ret
+
+
+class HistogramasTests(TestCase):
+    """Testa os histogramas por rota."""
+
+    def test_quantis_e_medias(self):
+        """Testa os quantis estimados pelas faixas e as médias."""
+        h = _Histogramas()
+        medicao = Medicao()
+        medicao.consultas = 3
+        medicao.banco = 0.002
+        for _ in range(98):
+            h.registrar('GET rota', 200, 0.004, medicao)
+        h.registrar('GET rota', 200, 0.2, medicao)
+        h.registrar('GET rota', 500, 20, medicao)
+
+        dados = h.metricas()['GET rota']
+
+        self.assertEqual(dados['contagem'], 100)
+        self.assertEqual(dados['erros'], 1)
+        self.assertEqual(dados['p50_ms'], 5)
+        self.assertEqual(dados['p95_ms'], 5)
+        self.assertEqual(dados['p99_ms'], 250)
+        self.assertEqual(dados['max_ms'], 20000)
+        self.assertEqual(dados['consultas_media'], 3)
+        self.assertAlmostEqual(dados['banco_ms_media'], 2)
+        self.assertEqual(dados['faixas']['5'], 98)
+        self.assertEqual(dados['faixas']['250'], 1)
+        self.assertEqual(dados['faixas']['+Inf'], 1)
+        self.assertEqual(len(dados['faixas']), len(FAIXAS_MS) + 1)
+
+        h.limpar()
+        self.assertEqual(h.metricas(), {})
+
+
+class InstrumentacaoMiddlewareTests(TestCase):
+    """Testa as medidas das requisições."""
+
+    def setUp(self):
+        cache.clear()
+        cache_tokens.limpar()
+        histogramas.limpar()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'senhateste123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_server_timing(self):
+        """Testa as etapas medidas no cabeçalho Server-Timing."""
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        medidas = etapas(res['Server-Timing'])
+        self.assertEqual(
+            set(medidas), {'banco', 'autenticacao', 'serializacao', 'total'}
+        )
+        self.assertNotEqual(medidas['banco']['desc'], '"0 consultas"')
+        for medida in medidas.values():
+            self.assertGreaterEqual(float(medida['dur']), 0)
+        self.assertGreater(float(medidas['autenticacao']['dur']), 0)
+        self.assertGreater(float(medidas['serializacao']['dur']), 0)
+        self.assertGreaterEqual(
+            float(medidas['total']['dur']), float(medidas['banco']['dur'])
+        )
+
+    def test_serializacao_inclui_serializers(self):
+        """Testa se o to_representation conta na serialização."""
+        Categoria.objects.create(user=self.user, nome='Doce')
+        original = serializers.Serializer.to_representation
+
+        def lenta(serializer, instance):
+            time.sleep(0.05)
+            return original(serializer, instance)
+
+        with patch.object(
+            serializers.Serializer, 'to_representation', lenta
+        ):
+            res = self.client.get(CATEGORIAS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        medidas = etapas(res['Server-Timing'])
+        self.assertGreaterEqual(float(medidas['serializacao']['dur']), 50)
+
+    def test_consultas_contadas(self):
+        """Testa se todas as consultas da requisição são contadas."""
+        cache_tokens.limpar()
+        res = self.client.get(reverse('user:me'))
+
+        # A autenticação consulta o token, que depois fica em cache.
+        self.assertEqual(
+            etapas(res['Server-Timing'])['banco']['desc'], '"1 consultas"'
+        )
+        res = self.client.get(reverse('user:me'))
+        self.assertEqual(
+            etapas(res['Server-Timing'])['banco']['desc'], '"0 consultas"'
+        )
+
+    def test_histogramas_por_rota(self):
+        """Testa o registro das requisições por rota."""
+        for _ in range(3):
+            self.client.get(RECEITAS_URL)
+        self.client.get('/api/nao-existe/')
+
+        rotas = histogramas.metricas()
+        self.assertEqual(rotas[ROTA_RECEITAS]['contagem'], 3)
+        self.assertGreater(rotas[ROTA_RECEITAS]['consultas_media'], 0)
+        self.assertEqual(rotas['GET <sem rota>']['contagem'], 1)
+
+    @override_settings(INSTRUMENTACAO_AMOSTRAGEM=0)
+    def test_sem_amostragem(self):
+        """Testa que requisições fora da amostra não são medidas."""
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(histogramas.metricas(), {})
+
+    @override_settings(INSTRUMENTACAO_SERVER_TIMING=False)
+    def test_sem_server_timing(self):
+        """Testa a medição sem expor o cabeçalho."""
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(histogramas.metricas()[ROTA_RECEITAS]['contagem'], 1)
+
+    def test_log(self):
+        """Testa a linha de log em JSON de cada requisição."""
+        with self.assertLogs('core.instrumentacao', 'INFO') as logs:
+            self.client.get(RECEITAS_URL)
+
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        dados = json.loads(logs.records[0].getMessage())
+        self.assertEqual(dados['rota'], ROTA_RECEITAS)
+        self.assertEqual(dados['caminho'], RECEITAS_URL)
+        self.assertEqual(dados['status'], 200)
+        self.assertEqual(logs.records[0].instrumentacao, dados)
+
+    @override_settings(INSTRUMENTACAO_LENTA_MS=0)
+    def test_log_requisicao_lenta(self):
+        """Testa que requisições lentas são registradas como WARNING."""
+        with self.assertLogs('core.instrumentacao', 'WARNING') as logs:
+            self.client.get(RECEITAS_URL)
+
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+
+    @override_settings(ASYNC_DB_THREADS=0)
+    def test_view_assincrona(self):
+        """Testa a medição das views assíncronas."""
+        async def requisitar():
+            return await AsyncClient().get(
+                reverse('receita:async-receita-list'),
+                AUTHORIZATION=f'Token {self.token}',
+            )
+
+        res = async_to_sync(requisitar)()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        medidas = etapas(res['Server-Timing'])
+        self.assertNotEqual(medidas['banco']['desc'], '"0 consultas"')
+        self.assertIn('GET receita:async-receita-list', histogramas.metricas())
+
+
+class InstrumentacaoViewTests(TestCase):
+    """Testa o endpoint de instrumentação."""
+
+    def setUp(self):
+        cache_tokens.limpar()
+        histogramas.limpar()
+        self.client = APIClient()
+
+    def _autenticar(self, user):
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_sem_autenticacao(self):
+        """Testa que a autenticação é obrigatória."""
+        res = self.client.get(INSTRUMENTACAO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_usuario_comum(self):
+        """Testa que só a equipe acessa o endpoint."""
+        self._autenticar(get_user_model().objects.create_user(
+            'user@example.com', 'senhateste123',
+        ))
+
+        res = self.client.get(INSTRUMENTACAO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_histogramas(self):
+        """Testa a leitura e a limpeza dos histogramas pela equipe."""
+        self._autenticar(get_user_model().objects.create_superuser(
+            'admin@example.com', 'senhateste123',
+        ))
+        self.client.get(RECEITAS_URL)
+
+        res = self.client.get(INSTRUMENTACAO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['amostragem'], 1)
+        self.assertEqual(res.data['faixas_ms'], list(FAIXAS_MS))
+        self.assertEqual(res.data['rotas'][ROTA_RECEITAS]['contagem'], 1)
+
+        res = self.client.delete(INSTRUMENTACAO_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotIn(ROTA_RECEITAS, histogramas.metricas())
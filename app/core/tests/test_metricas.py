@@ -0,0 +1,297 @@
+"""
+Testes para as métricas do Prometheus.
+"""
+from decimal import Decimal
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.metricas import (
+    FAIXAS_BYTES,
+    coletar,
+    exportar,
+    registro,
+)
+from core.models import Receita
+from user.authentication import cache_tokens
+
+
+METRICAS_URL = reverse('metricas')
+RECEITAS_URL = reverse('receita:receita-list')
+
+
+def pid_encerrado():
+    """Retorna o pid de um processo que já terminou."""
+    processo = subprocess.Popen([sys.executable, '-c', ''])
+    processo.wait()
+
+    return processo.pid
+
+
+class MetricasTests(TestCase):
+    """Testa a coleta e a exportação das métricas."""
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+        configuracao = override_settings(
+            METRICAS_DIR=self.diretorio, METRICAS_TOKEN='segredo',
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        registro.limpar()
+        cache.clear()
+        cache_tokens.limpar()
+
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'senhateste123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _metricas(self):
+        """Retorna as linhas de /metrics."""
+        res = APIClient().get(
+            METRICAS_URL, HTTP_AUTHORIZATION='Bearer segredo'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        return res.content.decode().splitlines()
+
+    def _gravar(self, pid, contadores=(), coletados=()):
+        """Grava um arquivo de métricas como o de outro processo."""
+        with open(os.path.join(self.diretorio, f'{pid}.json'), 'w') as f:
+            json.dump({
+                'pid': pid,
+                'contadores': list(contadores),
+                'histogramas': [],
+                'coletados': list(coletados),
+            }, f)
+
+    def test_exportar(self):
+        """Testa o formato de texto dos contadores e histogramas."""
+        faixas = [0] * (len(FAIXAS_BYTES) + 1) + [0]
+        faixas[0], faixas[2], faixas[-2], faixas[-1] = 1, 2, 1, 10 ** 8
+        texto = exportar({
+            ('api_upload_imagem_recusadas_total', (
+                ('motivo', 'a"b\\c\nd'),
+            )): 3,
+            ('api_upload_imagem_bytes', ()): faixas,
+        })
+        linhas = texto.splitlines()
+
+        self.assertIn(
+            '# TYPE api_upload_imagem_recusadas_total counter', linhas
+        )
+        self.assertIn(
+            'api_upload_imagem_recusadas_total{motivo="a\\"b\\\\c\\nd"} 3',
+            linhas,
+        )
+        self.assertIn('# TYPE api_upload_imagem_bytes histogram', linhas)
+        self.assertIn('api_upload_imagem_bytes_bucket{le="16384.0"} 1', linhas)
+        self.assertIn('api_upload_imagem_bytes_bucket{le="65536.0"} 1', linhas)
+        self.assertIn(
+            'api_upload_imagem_bytes_bucket{le="262144.0"} 3', linhas
+        )
+        self.assertIn('api_upload_imagem_bytes_bucket{le="+Inf"} 4', linhas)
+        self.assertIn('api_upload_imagem_bytes_sum 100000000', linhas)
+        self.assertIn('api_upload_imagem_bytes_count 4', linhas)
+        self.assertTrue(texto.endswith('\n'))
+
+    def test_requisicoes_por_acao(self):
+        """Testa as requisições e durações por ação do DRF."""
+        self.client.get(RECEITAS_URL)
+        self.client.get(RECEITAS_URL)
+
+        linhas = self._metricas()
+
+        self.assertIn(
+            'api_requisicoes_total{metodo="GET",status="200",'
+            'view="ReceitaViewSet.list"} 2',
+            linhas,
+        )
+        self.assertIn(
+            'api_requisicao_duracao_segundos_count{metodo="GET",'
+            'view="ReceitaViewSet.list"} 2',
+            linhas,
+        )
+        self.assertIn(
+            'api_requisicao_duracao_segundos_bucket{metodo="GET",'
+            'view="ReceitaViewSet.list",le="+Inf"} 2',
+            linhas,
+        )
+
+    @override_settings(API_CACHE_ATIVO=True)
+    def test_banco_e_caches(self):
+        """Testa as consultas e os acertos dos caches."""
+        cache_tokens.limpar()
+        self.client.get(RECEITAS_URL)
+        self.client.get(RECEITAS_URL)
+
+        linhas = self._metricas()
+        consultas = [
+            linha for linha in linhas
+            if linha.startswith('api_banco_consultas_total{banco="default"}')
+        ]
+
+        self.assertEqual(len(consultas), 1)
+        self.assertGreater(int(consultas[0].split()[-1]), 0)
+        for cache_, resultado in (
+            ('respostas', 'acerto'), ('respostas', 'falha'),
+            ('tokens', 'acerto'), ('tokens', 'falha'),
+        ):
+            self.assertIn(
+                f'api_cache_requisicoes_total{{cache="{cache_}",'
+                f'resultado="{resultado}"}} 1',
+                linhas,
+            )
+        self.assertIn('api_cache_entradas{cache="tokens"} 1', linhas)
+
+    def test_upload_recusado(self):
+        """Testa as imagens recusadas pela ação de upload."""
+        receita = Receita.objects.create(
+            user=self.user, nome='Receita', tempo_preparo=5,
+            preco=Decimal('1.00'),
+        )
+        res = self.client.post(
+            reverse('receita:receita-upload-imagem', args=[receita.id]),
+            {'imagem': SimpleUploadedFile('a.png', b'naoehumaimagem')},
+            format='multipart',
+        )
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+        linhas = self._metricas()
+
+        self.assertIn(
+            'api_upload_imagem_recusadas_total'
+            '{motivo="imagem_nao_suportada"} 1',
+            linhas,
+        )
+        self.assertIn(
+            'api_requisicoes_total{metodo="POST",status="415",'
+            'view="ReceitaViewSet.upload_imagem"} 1',
+            linhas,
+        )
+
+    @override_settings(METRICAS_ATIVAS=True)
+    def test_soma_dos_processos(self):
+        """Testa a soma dos arquivos de outros processos."""
+        registro.incrementar('api_banco_consultas_total', 2, banco='outro')
+        encerrado, vivo = pid_encerrado(), os.getppid()
+        for pid in (encerrado, vivo):
+            self._gravar(
+                pid,
+                contadores=[
+                    ['api_banco_consultas_total', {'banco': 'outro'}, 5],
+                ],
+                coletados=[
+                    ['api_cache_entradas', {'cache': 'outro'}, 7],
+                    ['api_nao_existe', {}, 1],
+                ],
+            )
+
+        amostras = coletar()
+
+        self.assertEqual(
+            amostras[('api_banco_consultas_total', (('banco', 'outro'),))],
+            12,
+        )
+        # Valores instantâneos só dos processos vivos.
+        self.assertEqual(
+            amostras[('api_cache_entradas', (('cache', 'outro'),))], 7
+        )
+        self.assertNotIn(('api_nao_existe', ()), amostras)
+
+    @skipUnless(hasattr(os, 'fork'), 'Requer fork.')
+    @override_settings(METRICAS_ATIVAS=True)
+    def test_processo_filho(self):
+        """Testa que o filho grava as suas métricas sem as do pai."""
+        registro.incrementar('api_banco_consultas_total', 2, banco='outro')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                registro.incrementar(
+                    'api_banco_consultas_total', 5, banco='outro'
+                )
+                registro.gravar()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        amostras = coletar()
+
+        self.assertEqual(
+            amostras[('api_banco_consultas_total', (('banco', 'outro'),))],
+            7,
+        )
+
+    def test_token(self):
+        """Testa o endpoint protegido por token."""
+        client = APIClient()
+        res = client.get(METRICAS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = client.get(METRICAS_URL, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICAS_TOKEN=None)
+    def test_sem_token(self):
+        """Testa que sem token o endpoint só responde com DEBUG."""
+        res = APIClient().get(METRICAS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(DEBUG=True):
+            res = APIClient().get(METRICAS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_gravacao_desativada(self):
+        """Testa que sem METRICAS_ATIVAS nada é gravado."""
+        with patch.object(registro, 'iniciar_gravacao') as iniciar:
+            self.client.get(RECEITAS_URL)
+            self._metricas()
+
+        iniciar.assert_not_called()
+        self.assertEqual(os.listdir(self.diretorio), [])
+
+    @override_settings(METRICAS_ATIVAS=True)
+    def test_gravacao_ao_atender(self):
+        """Testa que a gravação começa ao atender uma requisição."""
+        with patch.object(registro, 'iniciar_gravacao') as iniciar:
+            registro.incrementar('api_banco_consultas_total', banco='outro')
+            iniciar.assert_not_called()
+
+            self.client.get(RECEITAS_URL)
+
+        iniciar.assert_called()
+
+    def test_limpar_metricas(self):
+        """Testa o comando que remove os arquivos de métricas."""
+        self._gravar(pid_encerrado())
+        registro.gravar()
+
+        call_command('limpar_metricas', stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(os.listdir(self.diretorio), [])
@@ -93,6 +93,24 @@ class ModelsTeste(TestCase):
 
         self.assertEqual(str(ingrediente), ingrediente.nome)
 
+    def test_bulk_get_or_create_ingredientes(self):
+        """Testa recuperar e criar ingredientes em lote."""
+        user = create_user()
+        outro = create_user(email='outro@example.com')
+        sal = models.Ingrediente.objects.create(user=user, nome='Sal')
+        models.Ingrediente.objects.create(user=outro, nome='Alho')
+
+        itens = models.Ingrediente.objects.bulk_get_or_create(
+            user, ['Sal', 'Alho', 'Sal']
+        )
+
+        self.assertEqual(set(itens), {'Sal', 'Alho'})
+        self.assertEqual(itens['Sal'], sal)
+        self.assertEqual(itens['Alho'].user, user)
+        self.assertEqual(
+            models.Ingrediente.objects.filter(user=user).count(), 2
+        )
+
     @patch('core.models.uuid.uuid4')
     def test_gerar_caminho_imagem(self, mock_uuid):
         '''Testa a geração de caminho para as imagens de receita.'''
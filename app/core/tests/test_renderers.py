@@ -0,0 +1,153 @@
+"""
+Testes para o renderer e o parser JSON da API.
+"""
+from collections import OrderedDict
+from datetime import (
+    date,
+    datetime,
+    time,
+    timedelta,
+    timezone,
+)
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipIf
+from unittest.mock import patch
+import uuid
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import (
+    ErrorDetail,
+    ParseError,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core.parsers import JSONRapidoParser
+from core.renderers import (
+    JSONRapidoRenderer,
+    orjson,
+)
+
+
+DADOS = ReturnList([
+    OrderedDict([
+        ('id', 1),
+        ('nome', 'Pão de queijo "mineiro"\n\t/\u2028\u2029\x00 😀'),
+        ('preco', Decimal('12.50')),
+        ('quantidade', Decimal('3')),
+        ('ativo', True),
+        ('link', None),
+        ('tags', ('a', 'b')),
+        ('modificado', datetime(2024, 4, 24, 23, 56, 1, 123456,
+                                tzinfo=timezone.utc)),
+        ('criado', datetime(2024, 4, 24, 23, 56)),
+        ('dia', date(2024, 4, 24)),
+        ('hora', time(10, 30, 0, 500)),
+        ('duracao', timedelta(minutes=90)),
+        ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+        ('mensagem', gettext_lazy('Receita')),
+        ('erro', ErrorDetail('Campo obrigatório.', code='required')),
+        ('por_id', {1: 'um', 2: 'dois'}),
+        ('valores', [0.1, 1.5, -2, 10 ** 15]),
+    ]),
+], serializer=None)
+
+
+@skipIf(orjson is None, 'orjson não instalado')
+class JSONRapidoRendererTestes(SimpleTestCase):
+    """Testa se o renderer produz os mesmos bytes do JSONRenderer."""
+
+    def test_mesma_saida_do_json_renderer(self):
+        """Testa a saída para os tipos usados nas respostas."""
+        self.assertEqual(
+            JSONRapidoRenderer().render(DADOS),
+            JSONRenderer().render(DADOS),
+        )
+
+    def test_usa_orjson(self):
+        """Testa se o orjson é usado nas respostas compactas."""
+        with patch('core.renderers.orjson.dumps', wraps=orjson.dumps) as mock:
+            JSONRapidoRenderer().render({'a': 1})
+
+        mock.assert_called_once()
+
+    def test_indentacao_usa_json_renderer(self):
+        """Testa se a saída indentada fica a cargo do JSONRenderer."""
+        renderer = JSONRapidoRenderer()
+
+        with patch('core.renderers.orjson.dumps') as mock:
+            ret = renderer.render(
+                DADOS, 'application/json; indent=4', {}
+            )
+
+        mock.assert_not_called()
+        self.assertEqual(
+            ret,
+            JSONRenderer().render(DADOS, 'application/json; indent=4', {}),
+        )
+
+    def test_inteiro_grande(self):
+        """Testa se dados que o orjson recusa passam pelo JSONRenderer."""
+        dados = {'grande': 2 ** 70}
+
+        self.assertEqual(
+            JSONRapidoRenderer().render(dados),
+            JSONRenderer().render(dados),
+        )
+
+    def test_sem_dados(self):
+        """Testa a resposta vazia."""
+        self.assertEqual(JSONRapidoRenderer().render(None), b'')
+
+
+class JSONRapidoSemOrjsonTestes(SimpleTestCase):
+    """Testa o renderer e o parser sem o orjson instalado."""
+
+    def test_renderer_sem_orjson(self):
+        """Testa se o renderer usa o json da biblioteca padrão."""
+        with patch('core.renderers.orjson', None):
+            ret = JSONRapidoRenderer().render(DADOS)
+
+        self.assertEqual(ret, JSONRenderer().render(DADOS))
+
+    def test_parser_sem_orjson(self):
+        """Testa se o parser usa o json da biblioteca padrão."""
+        with patch('core.parsers.orjson', None):
+            dados = JSONRapidoParser().parse(BytesIO(b'{"a": [1, 2.5]}'))
+
+        self.assertEqual(dados, {'a': [1, 2.5]})
+
+
+class JSONRapidoParserTestes(SimpleTestCase):
+    """Testa o parser JSON."""
+
+    def _parse(self, corpo, encoding='utf-8'):
+        return JSONRapidoParser().parse(
+            BytesIO(corpo), parser_context={'encoding': encoding}
+        )
+
+    def test_parse(self):
+        """Testa a leitura de um corpo em UTF-8."""
+        dados = self._parse('{"nome": "Pão", "preco": 1.5}'.encode())
+
+        self.assertEqual(dados, {'nome': 'Pão', 'preco': 1.5})
+
+    def test_parse_invalido(self):
+        """Testa se JSON inválido levanta ParseError."""
+        for corpo in (b'{"nome":', b'{"preco": NaN}', b''):
+            with self.subTest(corpo=corpo):
+                with self.assertRaises(ParseError):
+                    self._parse(corpo)
+
+    def test_parse_inteiro_grande(self):
+        """Testa a leitura de inteiros fora de 64 bits."""
+        self.assertEqual(self._parse(b'[%d]' % 2 ** 70), [2 ** 70])
+
+    def test_parse_outra_codificacao(self):
+        """Testa a leitura de um corpo em latin-1."""
+        corpo = '{"nome": "Pão"}'.encode('latin-1')
+
+        self.assertEqual(self._parse(corpo, 'latin-1'), {'nome': 'Pão'})
@@ -0,0 +1,188 @@
+"""
+Testes para o storage de arquivos por conteúdo.
+"""
+from collections import Counter
+from decimal import Decimal
+import hashlib
+from io import StringIO
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import models
+from core.storage import (
+    ConteudoEnderecadoStorage,
+    contar_referencias,
+    referenciado,
+)
+
+
+class ConteudoEnderecadoStorageTests(TestCase):
+    """Testa a gravação dos arquivos pelo hash do conteúdo."""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.storage = ConteudoEnderecadoStorage(location=self.pasta)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def test_caminho_pelo_hash(self):
+        """Testa se o arquivo é gravado no caminho do hash."""
+        sha256 = hashlib.sha256(b'imagem').hexdigest()
+
+        nome = self.storage.save(
+            'uploads/receita/x.JPG', ContentFile(b'imagem')
+        )
+
+        self.assertEqual(
+            nome,
+            f'uploads/receita/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg',
+        )
+        with self.storage.open(nome) as arquivo:
+            self.assertEqual(arquivo.read(), b'imagem')
+
+    def test_conteudo_repetido_gravado_uma_vez(self):
+        """Testa se o mesmo conteúdo enviado duas vezes vira um arquivo."""
+        nome1 = self.storage.save('uploads/receita/a.jpg', ContentFile(b'x'))
+        nome2 = self.storage.save('uploads/receita/b.jpg', ContentFile(b'x'))
+        nome3 = self.storage.save('uploads/receita/c.jpg', ContentFile(b'y'))
+
+        self.assertEqual(nome1, nome2)
+        self.assertNotEqual(nome1, nome3)
+        arquivos = [
+            arquivo
+            for _, _, nomes in os.walk(self.pasta)
+            for arquivo in nomes
+        ]
+        self.assertEqual(len(arquivos), 2)
+
+    def test_hash_calculado_no_upload(self):
+        """Testa se o hash informado pelo upload é reaproveitado."""
+        conteudo = ContentFile(b'imagem')
+        conteudo.sha256 = 'ab' * 32
+
+        nome = self.storage.save('uploads/receita/x.png', conteudo)
+
+        self.assertTrue(nome.endswith(f'{"ab" * 32}.png'))
+
+
+class LimparArquivosTests(TestCase):
+    """Testa a remoção dos arquivos sem referências."""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.pasta)
+        self.media_override.enable()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        self.storage = models.Receita._meta.get_field('imagem').storage
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _receita(self, imagem, **params):
+        """Cria uma receita com a imagem informada."""
+        return models.Receita.objects.create(
+            user=self.user,
+            nome='Receita',
+            tempo_preparo=5,
+            preco=Decimal('5.50'),
+            imagem=imagem,
+            **params,
+        )
+
+    def _arquivo(self, conteudo, idade_horas=48):
+        """Grava um arquivo com a idade informada e retorna o nome."""
+        nome = self.storage.save(
+            'uploads/receita/foto.jpg', ContentFile(conteudo)
+        )
+        instante = time.time() - idade_horas * 3600
+        os.utime(self.storage.path(nome), (instante, instante))
+
+        return nome
+
+    def test_contar_referencias(self):
+        """Testa a contagem das referências às imagens e variantes."""
+        imagem = self._arquivo(b'imagem')
+        variante = self._arquivo(b'variante')
+        self._receita(imagem, imagem_variantes={'media': {'jpg': variante}})
+        self._receita(imagem)
+
+        referencias = contar_referencias()
+
+        self.assertEqual(referencias[imagem], 2)
+        self.assertEqual(referencias[variante], 1)
+
+    def test_remove_arquivos_sem_referencias(self):
+        """Testa se só os arquivos antigos sem referências são removidos."""
+        usado = self._arquivo(b'usado')
+        variante = self._arquivo(b'variante')
+        orfao = self._arquivo(b'orfao')
+        recente = self._arquivo(b'recente', idade_horas=1)
+        self._receita(usado, imagem_variantes={'media': {'jpg': variante}})
+
+        saida = StringIO()
+        call_command('limpar_arquivos', stdout=saida)
+
+        self.assertTrue(self.storage.exists(usado))
+        self.assertTrue(self.storage.exists(variante))
+        self.assertTrue(self.storage.exists(recente))
+        self.assertFalse(self.storage.exists(orfao))
+        self.assertIn('1 arquivos removidos', saida.getvalue())
+
+    def test_referenciado(self):
+        """Testa a verificação das referências de um arquivo."""
+        imagem = self._arquivo(b'imagem')
+        variante = self._arquivo(b'variante')
+        orfao = self._arquivo(b'orfao')
+        self._receita(imagem, imagem_variantes={'media': {'jpg': variante}})
+
+        self.assertTrue(referenciado(imagem))
+        self.assertTrue(referenciado(variante))
+        self.assertFalse(referenciado(orfao))
+
+    def test_reenvio_de_arquivo_sem_referencias(self):
+        """Testa se reenviar um conteúdo órfão renova a carência."""
+        orfao = self._arquivo(b'orfao')
+
+        nome = self.storage.save(
+            'uploads/receita/outra.jpg', ContentFile(b'orfao')
+        )
+        call_command('limpar_arquivos', stdout=StringIO())
+
+        self.assertEqual(nome, orfao)
+        self.assertTrue(self.storage.exists(orfao))
+
+    def test_referencia_posterior_a_contagem(self):
+        """Testa se o arquivo usado depois da contagem é mantido."""
+        imagem = self._arquivo(b'imagem')
+        self._receita(imagem)
+
+        with patch(
+            'core.management.commands.limpar_arquivos.contar_referencias',
+            return_value=Counter(),
+        ):
+            call_command('limpar_arquivos', stdout=StringIO())
+
+        self.assertTrue(self.storage.exists(imagem))
+
+    def test_dry_run(self):
+        """Testa se o dry-run apenas lista os arquivos."""
+        orfao = self._arquivo(b'orfao')
+
+        saida = StringIO()
+        call_command('limpar_arquivos', dry_run=True, stdout=saida)
+
+        self.assertTrue(self.storage.exists(orfao))
+        self.assertIn(orfao, saida.getvalue())
@@ -0,0 +1,155 @@
+"""
+Testes para os orçamentos de consultas e de tempo dos testes.
+"""
+import os
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Categoria
+from core.testing import (
+    OrcamentoMixin,
+    orcamento,
+)
+
+
+def listar_categorias(user):
+    """Lê as categorias do usuário, uma consulta por categoria (N+1)."""
+    return [
+        Categoria.objects.get(id=categoria_id).nome
+        for categoria_id in Categoria.objects.filter(
+            user=user
+        ).values_list('id', flat=True)
+    ]
+
+
+class OrcamentoTests(OrcamentoMixin, TestCase):
+    """Testa o orçamento de consultas e de tempo."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'orcamento@example.com', 'senha123',
+        )
+        self.fator_tempo = patch.dict(
+            'os.environ', {'TESTES_FATOR_TEMPO': '1'}
+        )
+
+    def _criar_categorias(self, quantidade):
+        Categoria.objects.filter(user=self.user).delete()
+        Categoria.objects.bulk_create(
+            Categoria(user=self.user, nome=f'Categoria {i}')
+            for i in range(quantidade)
+        )
+
+    def test_dentro_do_orcamento(self):
+        """Testa que um bloco dentro do orçamento passa e é medido."""
+        with orcamento(consultas=1, tempo_ms=1000) as medida:
+            list(Categoria.objects.all())
+
+        self.assertEqual(len(medida.consultas), 1)
+        self.assertIsNotNone(medida.duracao_ms)
+
+    def test_consultas_acima_do_orcamento(self):
+        """Testa que a falha lista as consultas feitas."""
+        with self.assertRaises(AssertionError) as contexto:
+            with self.assertOrcamento(consultas=1):
+                list(Categoria.objects.all())
+                list(Categoria.objects.filter(nome='Doces'))
+
+        mensagem = str(contexto.exception)
+        self.assertIn('2 consultas, mais que o orçamento de 1', mensagem)
+        self.assertIn('1. SELECT', mensagem)
+        self.assertIn("'Doces'", mensagem)
+
+    def test_tempo_acima_do_orcamento(self):
+        """Testa a falha quando o bloco demora mais que o orçamento."""
+        with self.fator_tempo, self.assertRaises(AssertionError) as contexto:
+            with orcamento(tempo_ms=1):
+                time.sleep(0.01)
+
+        self.assertIn(
+            'mais que o orçamento de 1.0 ms', str(contexto.exception)
+        )
+
+    def test_fator_de_tempo(self):
+        """Testa que o tempo só é verificado com TESTES_FATOR_TEMPO."""
+        with patch.dict('os.environ'):
+            os.environ.pop('TESTES_FATOR_TEMPO', None)
+            with orcamento(tempo_ms=1):
+                time.sleep(0.01)
+
+        with patch.dict('os.environ', {'TESTES_FATOR_TEMPO': '0'}):
+            with orcamento(tempo_ms=1):
+                time.sleep(0.01)
+
+        with patch.dict('os.environ', {'TESTES_FATOR_TEMPO': '1000'}):
+            with orcamento(tempo_ms=1):
+                time.sleep(0.01)
+
+    def test_excecao_do_bloco_prevalece(self):
+        """Testa que um erro no bloco não é trocado pelo do orçamento."""
+        with self.assertRaises(ValueError):
+            with orcamento(consultas=0):
+                list(Categoria.objects.all())
+                raise ValueError
+
+    def test_decorador(self):
+        """Testa o orçamento usado como decorador."""
+        @orcamento(consultas=0)
+        def sem_consultas():
+            return 1
+
+        @orcamento(consultas=0)
+        def com_consultas():
+            return list(Categoria.objects.all())
+
+        self.assertEqual(sem_consultas(), 1)
+        with self.assertRaises(AssertionError):
+            com_consultas()
+
+    def test_escala_constante(self):
+        """Testa que consultas que não crescem com os dados passam."""
+        medidas = self.assertEscala(
+            self._criar_categorias,
+            lambda n: list(Categoria.objects.filter(user=self.user)),
+            tamanhos=(2, 10),
+            consultas=1,
+        )
+
+        self.assertEqual(sorted(medidas), [2, 10])
+
+    def test_escala_detecta_n_mais_1(self):
+        """Testa que consultas por linha falham na escala."""
+        with self.assertRaises(AssertionError) as contexto:
+            self.assertEscala(
+                self._criar_categorias,
+                lambda n: listar_categorias(self.user),
+                tamanhos=(2, 10),
+            )
+
+        mensagem = str(contexto.exception)
+        self.assertIn('cresceram de 3 (n=2) para 11 (n=10)', mensagem)
+        self.assertIn('11. SELECT', mensagem)
+
+    def test_escala_orcamento_por_tamanho(self):
+        """Testa o orçamento de consultas em função do tamanho."""
+        self.assertEscala(
+            self._criar_categorias,
+            lambda n: listar_categorias(self.user),
+            tamanhos=(2, 10),
+            consultas=lambda n: n + 1,
+            constante=False,
+        )
+
+        with self.assertRaises(AssertionError) as contexto:
+            self.assertEscala(
+                self._criar_categorias,
+                lambda n: listar_categorias(self.user),
+                tamanhos=(2, 10),
+                consultas=lambda n: n,
+                constante=False,
+            )
+
+        self.assertIn('n=2: 3 consultas', str(contexto.exception))
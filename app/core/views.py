@@ -0,0 +1,72 @@
+"""
+Views de operação da API.
+"""
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiTypes,
+)
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import (
+    permissions,
+    status,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.instrumentacao import (
+    FAIXAS_MS,
+    histogramas,
+)
+from core.metricas import (
+    coletar,
+    exportar,
+)
+from user.authentication import CachedTokenAuthentication
+
+
+class InstrumentacaoView(APIView):
+    """Latência e etapas das requisições por rota, para a equipe.
+
+    As medidas são do processo que atende a requisição, desde que
+    foi iniciado ou limpo, e só das requisições amostradas.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Retorna os histogramas de latência por rota."""
+        return Response({
+            'amostragem': settings.INSTRUMENTACAO_AMOSTRAGEM,
+            'faixas_ms': list(FAIXAS_MS),
+            'rotas': histogramas.metricas(),
+        })
+
+    @extend_schema(responses={204: None})
+    def delete(self, request):
+        """Descarta os histogramas."""
+        histogramas.limpar()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@require_GET
+def metricas(request):
+    """Exporta as métricas de todos os processos para o Prometheus."""
+    token = settings.METRICAS_TOKEN
+    if not token:
+        # Sem token, o endpoint só fica aberto em desenvolvimento.
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        exportar(coletar()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReceitaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'receita'
+
+    def ready(self):
+        from receita import signals  # noqa: F401
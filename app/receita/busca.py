@@ -0,0 +1,68 @@
+"""
+Busca textual nas receitas.
+
+No PostgreSQL a busca usa a coluna ``busca`` (tsvector), mantida por
+trigger com o dicionário em português e indexada com GIN. Em outros
+bancos, como o SQLite dos testes, usa uma busca por substring com uma
+relevância aproximada.
+"""
+from django.db import connections
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+)
+
+
+CONFIGURACAO = 'portuguese'
+
+# Pesos da relevância na busca por substring: o nome vale mais que a
+# descrição, como os pesos A e B do tsvector.
+PESO_NOME = 1.0
+PESO_DESCRICAO = 0.4
+
+
+def _buscar_postgres(queryset, termo):
+    """Filtra e ordena pela relevância usando o tsvector."""
+    consulta = SearchQuery(
+        termo, config=CONFIGURACAO, search_type='websearch'
+    )
+
+    # O rank vira double precision para que a posição do cursor da
+    # paginação seja comparada sem perda de precisão.
+    return queryset.filter(busca=consulta).annotate(
+        rank=Cast(SearchRank(F('busca'), consulta), FloatField()),
+    )
+
+
+def _buscar_substring(queryset, termo):
+    """Filtra pelas palavras no nome ou descrição, sem índice textual."""
+    palavras = termo.split()
+    rank = Value(0.0, output_field=FloatField())
+    for palavra in palavras:
+        queryset = queryset.filter(
+            Q(nome__icontains=palavra) | Q(descricao__icontains=palavra)
+        )
+        rank = rank + Case(
+            When(nome__icontains=palavra, then=Value(PESO_NOME)),
+            default=Value(PESO_DESCRICAO),
+            output_field=FloatField(),
+        )
+
+    return queryset.annotate(rank=rank)
+
+
+def buscar_receitas(queryset, termo):
+    """Filtra as receitas pelo termo e anota a relevância em ``rank``."""
+    if connections[queryset.db].vendor == 'postgresql':
+        return _buscar_postgres(queryset, termo)
+
+    return _buscar_substring(queryset, termo)
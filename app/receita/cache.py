@@ -0,0 +1,196 @@
+"""
+Cache de respostas da API de Receitas.
+
+As respostas ficam em cache por usuário e são invalidadas com um
+contador de versão: qualquer escrita do usuário incrementa a versão e
+as entradas antigas deixam de ser lidas, expirando pelo TTL ou pelo
+descarte LRU do backend. A versão fica no cache API_CACHE_VERSOES_ALIAS,
+que deve ser compartilhado entre os processos; sem isso o cache de
+respostas fica desligado (API_CACHE_ATIVO, em settings).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core.metricas import registro
+
+from receita.condicional import (
+    aplicar_cabecalhos,
+    nao_modificado,
+    resposta_nao_modificada,
+)
+
+
+def _cache():
+    """Retorna o backend de cache das respostas da API."""
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _versoes():
+    """Retorna o backend de cache das versões dos usuários."""
+    return caches[settings.API_CACHE_VERSOES_ALIAS]
+
+
+def _chave_versao(user_id):
+    return f'receita:{user_id}:versao'
+
+
+def versao_usuario(user_id):
+    """Retorna a versão atual dos dados do usuário."""
+    cache = _versoes()
+    chave = _chave_versao(user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        # A versão inicial vem do relógio para que, se a chave for
+        # descartada, entradas antigas do usuário não voltem a valer.
+        cache.add(chave, time.time_ns(), timeout=None)
+        versao = cache.get(chave)
+
+    return versao
+
+
+def invalidar_usuario(user_id):
+    """Invalida todas as respostas em cache do usuário."""
+    if not settings.API_CACHE_ATIVO:
+        return
+
+    cache = _versoes()
+    try:
+        cache.incr(_chave_versao(user_id))
+    except ValueError:
+        cache.add(_chave_versao(user_id), time.time_ns(), timeout=None)
+
+
+def chave_resposta(request, nome):
+    """Gera a chave de cache de uma resposta para a requisição.
+
+    A chave inclui o formato negociado: a entrada guarda a ETag, que é
+    diferente para cada formato da mesma URL.
+    """
+    formato = getattr(request, 'accepted_media_type', '')
+    representacao = hashlib.sha1(
+        f'{request.build_absolute_uri()}|{formato}'.encode()
+    ).hexdigest()
+    versao = versao_usuario(request.user.id)
+
+    return f'receita:{request.user.id}:{versao}:{nome}:{representacao}'
+
+
+def _contar_leitura(acerto):
+    registro.incrementar(
+        'api_cache_requisicoes_total', cache='respostas',
+        resultado='acerto' if acerto else 'falha',
+    )
+
+
+def ler_do_cache(view, request, *args, **kwargs):
+    """Responde uma view assíncrona com a resposta em cache, se houver.
+
+    Só é usado com caches em memória local, que não bloqueiam o event
+    loop.
+    """
+    if not settings.API_CACHE_ATIVO or not all(
+        isinstance(cache, LocMemCache) for cache in (_cache(), _versoes())
+    ):
+        return None
+
+    return view.resposta_do_cache(request)
+
+
+class RespostaEmCacheMixin:
+    """Mixin que guarda em cache as leituras de um ViewSet.
+
+    A listagem é respondida do cache quando possível e outras ações
+    podem usar `_resposta_em_cache`. As respostas levam uma ETag e
+    requisições com If-None-Match correspondente recebem 304 sem
+    serializar os dados. Qualquer requisição de escrita bem-sucedida
+    invalida o cache do usuário.
+    """
+
+    def get_metadados(self):
+        """Retorna a ETag e a data de modificação da ação atual.
+
+        Deve ser barato, pois é calculado antes da consulta principal.
+        Retorna (None, None) quando não há dados para a ação.
+        """
+        raise NotImplementedError
+
+    def _entrada_em_cache(self, request):
+        """Retorna a chave de cache da ação e a entrada guardada nela."""
+        chave = chave_resposta(request, f'{self.basename}-{self.action}')
+
+        return chave, _cache().get(chave)
+
+    def _responder(self, request, response, etag, modificado):
+        """Aplica a validação condicional e os cabeçalhos à resposta."""
+        if etag is not None and nao_modificado(request, etag):
+            return resposta_nao_modificada(etag, modificado)
+        if etag is not None:
+            aplicar_cabecalhos(response, etag, modificado)
+
+        return response
+
+    def resposta_do_cache(self, request):
+        """Retorna a resposta da ação guardada em cache, ou None.
+
+        Não consulta o banco de dados.
+        """
+        if not settings.API_CACHE_ATIVO:
+            return None
+
+        _chave, entrada = self._entrada_em_cache(request)
+        if entrada is None:
+            # A falha é contada quando a resposta for gerada.
+            return None
+
+        _contar_leitura(True)
+        dados, etag, modificado = entrada
+        return self._responder(request, Response(dados), etag, modificado)
+
+    def _resposta_em_cache(self, request, metodo, *args, **kwargs):
+        """Retorna a resposta do cache ou a gera e armazena."""
+        chave = entrada = None
+        if settings.API_CACHE_ATIVO:
+            chave, entrada = self._entrada_em_cache(request)
+            _contar_leitura(entrada is not None)
+        if entrada is not None:
+            dados, etag, modificado = entrada
+            return self._responder(
+                request, Response(dados), etag, modificado
+            )
+
+        etag, modificado = self.get_metadados()
+        if etag is not None and nao_modificado(request, etag):
+            return resposta_nao_modificada(etag, modificado)
+
+        response = metodo(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if chave is not None:
+            _cache().set(chave, (response.data, etag, modificado))
+
+        return self._responder(request, response, etag, modificado)
+
+    def list(self, request, *args, **kwargs):
+        """Lista os itens, usando o cache quando possível."""
+        return self._resposta_em_cache(
+            request, super().list, *args, **kwargs
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Invalida o cache do usuário após escritas bem-sucedidas."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        autenticado = request.user and request.user.is_authenticated
+        if (request.method not in SAFE_METHODS and autenticado
+                and response.status_code < 400):
+            invalidar_usuario(request.user.id)
+
+        return response
@@ -0,0 +1,84 @@
+"""
+Requisições condicionais (ETag / Last-Modified) da API de Receitas.
+"""
+import hashlib
+
+from django.db.models import (
+    OuterRef,
+    Subquery,
+)
+from django.utils.http import (
+    http_date,
+    parse_etags,
+)
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.models import (
+    Alteracao,
+    RevisaoUsuario,
+)
+
+
+def gerar_etag(request, *partes):
+    """Gera uma ETag forte para a representação pedida na requisição.
+
+    A ETag combina a URL, o formato de saída, o usuário e as partes
+    informadas, que descrevem a versão dos dados da resposta.
+    """
+    formato = getattr(request, 'accepted_media_type', '')
+    conteudo = '|'.join(
+        [request.build_absolute_uri(), formato, str(request.user.id)]
+        + [str(parte) for parte in partes]
+    )
+
+    return '"%s"' % hashlib.sha1(conteudo.encode()).hexdigest()
+
+
+def metadados_usuario(request):
+    """Retorna a ETag e a última modificação dos dados do usuário.
+
+    Usado nas listagens: toda escrita do usuário avança a revisão da
+    sincronização, então a ETag não depende de quantos itens há. A
+    última modificação vem da alteração mais recente, lida pelo índice
+    de revisões em uma única consulta.
+    """
+    ultima = Alteracao.objects.filter(
+        user=OuterRef('user'),
+    ).order_by('-revisao').values('modificado')[:1]
+    revisao, modificado = RevisaoUsuario.objects.filter(
+        user=request.user,
+    ).annotate(
+        modificado=Subquery(ultima),
+    ).values_list('revisao', 'modificado').first() or (0, None)
+
+    return gerar_etag(request, revisao), modificado
+
+
+def nao_modificado(request, etag):
+    """Retorna se a ETag corresponde ao If-None-Match da requisição."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def aplicar_cabecalhos(response, etag, modificado):
+    """Adiciona os cabeçalhos ETag e Last-Modified na resposta."""
+    response['ETag'] = etag
+    if modificado is not None:
+        response['Last-Modified'] = http_date(modificado.timestamp())
+
+    return response
+
+
+def resposta_nao_modificada(etag, modificado):
+    """Retorna uma resposta 304 com os cabeçalhos de validação."""
+    return aplicar_cabecalhos(
+        Response(status=status.HTTP_304_NOT_MODIFIED),
+        etag,
+        modificado,
+    )
@@ -0,0 +1,189 @@
+"""
+Processamento em segundo plano das imagens das receitas.
+
+Depois do upload, as variantes redimensionadas da imagem original são
+geradas por um pool de threads local, sem fila externa, e registradas
+em ``Receita.imagem_variantes``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import logging
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.models import (
+    Alteracao,
+    Receita,
+)
+from receita.cache import invalidar_usuario
+
+
+logger = logging.getLogger(__name__)
+
+# Maior lado, em pixels, de cada variante.
+TAMANHOS = {
+    'miniatura': 150,
+    'media': 600,
+    'grande': 1200,
+}
+
+# Extensão e parâmetros do Pillow de cada formato gerado.
+FORMATOS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True,
+            'progressive': True},
+}
+
+PASTA_VARIANTES = os.path.join('uploads', 'receita', 'variantes')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Retorna o pool de threads, criado no primeiro uso."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGENS_WORKERS,
+                thread_name_prefix='imagens',
+            )
+
+    return _executor
+
+
+def _caminho_variante(nome_original, variante, extensao):
+    """Retorna o caminho pedido ao storage para uma variante."""
+    base = os.path.splitext(os.path.basename(nome_original))[0]
+
+    return os.path.join(PASTA_VARIANTES, f'{base}-{variante}.{extensao}')
+
+
+def _abrir(arquivo):
+    """Abre a imagem na orientação correta e sem metadados."""
+    with Image.open(arquivo) as imagem:
+        # Em JPEG, decodifica direto em escala reduzida quando possível.
+        maior = max(TAMANHOS.values())
+        imagem.draft('RGB', (maior, maior))
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.mode not in ('RGB', 'RGBA'):
+            imagem = imagem.convert('RGBA' if 'A' in imagem.mode else 'RGB')
+        # Uma cópia dos pixels, sem EXIF nem outros metadados.
+        limpa = Image.new(imagem.mode, imagem.size)
+        limpa.paste(imagem)
+
+    return limpa
+
+
+def _codificar(imagem, formato):
+    """Codifica a imagem no formato e retorna o conteúdo."""
+    opcoes = dict(FORMATOS[formato])
+    if opcoes['format'] == 'JPEG' and imagem.mode != 'RGB':
+        imagem = imagem.convert('RGB')
+    saida = BytesIO()
+    imagem.save(saida, **opcoes)
+
+    return ContentFile(saida.getvalue())
+
+
+def gerar_variantes(receita_id):
+    """Gera e registra as variantes da imagem atual de uma receita.
+
+    Se a imagem for trocada durante o processamento, o resultado é
+    descartado: o upload seguinte agenda o próprio processamento.
+    """
+    receita = Receita.objects.filter(pk=receita_id).only(
+        'id', 'user_id', 'imagem', 'imagem_variantes'
+    ).first()
+    if receita is None or not receita.imagem:
+        return {}
+
+    storage = receita.imagem.storage
+    nome_original = receita.imagem.name
+    with storage.open(nome_original) as arquivo:
+        original = _abrir(arquivo)
+
+    variantes = {}
+    for variante, tamanho in TAMANHOS.items():
+        imagem = original.copy()
+        imagem.thumbnail((tamanho, tamanho), Image.LANCZOS)
+        variantes[variante] = {}
+        for formato in FORMATOS:
+            caminho = _caminho_variante(nome_original, variante, formato)
+            variantes[variante][formato] = storage.save(
+                caminho, _codificar(imagem, formato)
+            )
+
+    atualizadas = Receita.objects.filter(
+        pk=receita_id,
+        imagem=nome_original,
+    ).update(imagem_variantes=variantes, modificado=timezone.now())
+    if atualizadas:
+        # As variantes fazem parte das leituras das receitas.
+        Alteracao.objects.registrar(receita.user_id, 'receita', [receita_id])
+        invalidar_usuario(receita.user_id)
+
+    return variantes
+
+
+def _processar(receita_id):
+    """Gera as variantes em uma thread do pool."""
+    try:
+        gerar_variantes(receita_id)
+    except Exception:
+        logger.exception(
+            'Falha ao gerar as variantes da receita %s', receita_id
+        )
+    finally:
+        # Cada thread do pool usa as próprias conexões com o banco.
+        connections.close_all()
+
+
+def agendar_variantes(receita_id):
+    """Agenda a geração das variantes para depois do commit.
+
+    Com IMAGENS_ASSINCRONO desativado, as variantes são geradas na
+    própria requisição, logo após o commit.
+    """
+    def executar():
+        if settings.IMAGENS_ASSINCRONO:
+            _get_executor().submit(_processar, receita_id)
+        else:
+            gerar_variantes(receita_id)
+
+    transaction.on_commit(executar)
+
+
+def aguardar_variantes():
+    """Espera a geração das variantes já enviadas ao pool terminar."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def urls_variantes(variantes, request=None):
+    """Retorna as URLs das variantes registradas de uma receita.
+
+    Recebe o imagem_variantes da receita.
+    """
+    storage = Receita._meta.get_field('imagem').storage
+    urls = {}
+    for variante, formatos in (variantes or {}).items():
+        urls[variante] = {}
+        for formato, nome in formatos.items():
+            url = storage.url(nome)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variante][formato] = url
+
+    return urls
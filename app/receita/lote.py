@@ -0,0 +1,307 @@
+"""
+Operações em lote sobre as receitas de um usuário.
+
+Criam, atualizam e removem receitas, categorias, ingredientes e as
+associações entre eles com poucas consultas por lote, em vez de algumas
+por receita.
+"""
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from core.models import (
+    Alteracao,
+    Receita,
+)
+from receita.cache import invalidar_usuario
+from receita.serializers import DetalhesReceitaSerializer
+
+
+CAMPOS_ATRIBUTOS = ('categorias', 'ingredientes')
+
+
+def resolver_atributos(user, itens):
+    """Recupera ou cria os atributos usados nos itens.
+
+    Retorna, para cada campo, um dicionário de nome para objeto.
+    """
+    resolvidos = {}
+    for campo in CAMPOS_ATRIBUTOS:
+        model = Receita._meta.get_field(campo).related_model
+        resolvidos[campo] = model.objects.bulk_get_or_create(user, [
+            atributo['nome']
+            for item in itens
+            for atributo in item.get(campo) or []
+        ])
+
+    return resolvidos
+
+
+def associar_atributos(receitas, itens, resolvidos):
+    """Insere em lote as associações das receitas com os atributos.
+
+    Cada receita é associada aos atributos do item na mesma posição.
+    """
+    for campo in CAMPOS_ATRIBUTOS:
+        m2m = Receita._meta.get_field(campo)
+        Through = m2m.remote_field.through
+        coluna = f'{m2m.m2m_reverse_field_name()}_id'
+        associacoes = []
+        for receita, item in zip(receitas, itens):
+            if item.get(campo) is None:
+                continue
+            ids = dict.fromkeys(
+                resolvidos[campo][atributo['nome']].id
+                for atributo in item[campo]
+            )
+            associacoes.extend(
+                Through(**{m2m.m2m_field_name(): receita, coluna: item_id})
+                for item_id in ids
+            )
+        Through.objects.bulk_create(associacoes, ignore_conflicts=True)
+
+
+def inserir_receitas(receitas):
+    """Insere as receitas, preenchendo as chaves primárias.
+
+    Usa bulk_create quando o banco retorna os ids inseridos (como o
+    PostgreSQL); nos demais, salva uma a uma.
+    """
+    banco = connections[Receita.objects.db]
+    if banco.features.can_return_rows_from_bulk_insert:
+        Receita.objects.bulk_create(receitas)
+    else:
+        for receita in receitas:
+            receita.save(force_insert=True)
+
+    return receitas
+
+
+def criar_receitas(user, itens):
+    """Cria as receitas do usuário a partir de dados já validados.
+
+    Os itens seguem o validated_data do ReceitaSerializer, com as
+    categorias e ingredientes como listas de {'nome': ...}. Deve ser
+    chamado dentro de uma transação.
+    """
+    if not itens:
+        return []
+
+    resolvidos = resolver_atributos(user, itens)
+    receitas = inserir_receitas([
+        Receita(user=user, **{
+            campo: valor for campo, valor in item.items()
+            if campo not in CAMPOS_ATRIBUTOS
+        })
+        for item in itens
+    ])
+    associar_atributos(receitas, itens, resolvidos)
+    # As inserções em lote não disparam os sinais de invalidação nem de
+    # registro para a sincronização.
+    invalidar_usuario(user.id)
+    Alteracao.objects.registrar(
+        user.id, 'receita', [receita.pk for receita in receitas]
+    )
+
+    return receitas
+
+
+def _substituir_atributos(campo, receitas, itens, resolvidos):
+    """Troca os atributos das receitas pelos informados nos itens.
+
+    Remove e insere apenas as associações que mudaram, com uma consulta
+    de cada tipo para todas as receitas. Retorna os ids das receitas
+    cujas associações mudaram.
+    """
+    m2m = Receita._meta.get_field(campo)
+    Through = m2m.remote_field.through
+    receita_id = f'{m2m.m2m_field_name()}_id'
+    coluna = f'{m2m.m2m_reverse_field_name()}_id'
+    desejados = {
+        receita.pk: {
+            resolvidos[campo][atributo['nome']].id
+            for atributo in item[campo]
+        }
+        for receita, item in zip(receitas, itens)
+        if item.get(campo) is not None
+    }
+    if not desejados:
+        return set()
+
+    remover = []
+    existentes = {pk: set() for pk in desejados}
+    associacoes = Through.objects.filter(**{
+        f'{receita_id}__in': list(desejados),
+    }).values_list('id', receita_id, coluna)
+    alteradas = set()
+    for associacao_id, pk, item_id in associacoes:
+        if item_id in desejados[pk]:
+            existentes[pk].add(item_id)
+        else:
+            remover.append(associacao_id)
+            alteradas.add(pk)
+
+    inserir = []
+    for pk, ids in desejados.items():
+        novos = ids - existentes[pk]
+        if novos:
+            alteradas.add(pk)
+        inserir.extend(
+            Through(**{receita_id: pk, coluna: item_id}) for item_id in novos
+        )
+
+    if remover:
+        Through.objects.filter(id__in=remover).delete()
+    Through.objects.bulk_create(inserir, ignore_conflicts=True)
+
+    return alteradas
+
+
+def atualizar_receitas(user, receitas, itens):
+    """Atualiza as receitas com os dados validados parciais dos itens.
+
+    Os campos alterados de todas as receitas são gravados com um único
+    bulk_update, que também atualiza ``modificado``, pois o bulk_update
+    não aplica o auto_now. Receitas sem alterações não são gravadas.
+    Retorna as receitas alteradas.
+    """
+    if not receitas:
+        return []
+
+    por_id = {receita.pk: receita for receita in receitas}
+    campos = set()
+    alteradas = set()
+    for receita, item in zip(receitas, itens):
+        for campo, valor in item.items():
+            if campo in CAMPOS_ATRIBUTOS or getattr(receita, campo) == valor:
+                continue
+            setattr(receita, campo, valor)
+            campos.add(campo)
+            alteradas.add(receita.pk)
+
+    resolvidos = resolver_atributos(user, itens)
+    for campo in CAMPOS_ATRIBUTOS:
+        alteradas |= _substituir_atributos(campo, receitas, itens, resolvidos)
+
+    if not alteradas:
+        return []
+
+    agora = timezone.now()
+    for pk in alteradas:
+        por_id[pk].modificado = agora
+    Receita.objects.bulk_update(
+        [por_id[pk] for pk in alteradas],
+        sorted(campos | {'modificado'}),
+    )
+    invalidar_usuario(user.id)
+    Alteracao.objects.registrar(user.id, 'receita', alteradas)
+
+    return [por_id[pk] for pk in alteradas]
+
+
+def _validar(operacoes, context, existentes):
+    """Valida as operações e retorna os dados validados e os erros.
+
+    Criações e atualizações são validadas em dois serializers com
+    many=True; as atualizações são parciais.
+    """
+    erros = {}
+    vistos = set()
+    for indice, operacao in enumerate(operacoes):
+        if operacao['op'] == 'create':
+            continue
+        if operacao['id'] in vistos:
+            erros[indice] = {'id': [_('Receita repetida no lote.')]}
+        elif operacao['id'] not in existentes:
+            erros[indice] = {'id': [_('Receita não encontrada.')]}
+        vistos.add(operacao['id'])
+
+    validados = {}
+    for op, parcial in (('create', False), ('update', True)):
+        indices = [
+            indice for indice, operacao in enumerate(operacoes)
+            if operacao['op'] == op
+        ]
+        if not indices:
+            continue
+        serializer = DetalhesReceitaSerializer(
+            data=[operacoes[indice]['dados'] for indice in indices],
+            many=True,
+            partial=parcial,
+            context=context,
+        )
+        if serializer.is_valid():
+            validados.update(zip(indices, serializer.validated_data))
+        else:
+            for indice, erro in zip(indices, serializer.errors):
+                if erro:
+                    erros.setdefault(indice, {}).update(erro)
+
+    return validados, erros
+
+
+def executar_operacoes(user, operacoes, context):
+    """Executa as operações de um lote sobre as receitas do usuário.
+
+    Cada operação tem ``op`` (create, update ou delete), ``id`` (nas
+    atualizações e remoções) e ``dados``. Ou todas são executadas, em
+    uma transação, ou nenhuma: com algum erro de validação, nada é
+    gravado. Retorna se o lote foi executado e o resultado de cada
+    operação, na ordem recebida.
+    """
+    existentes = Receita.objects.filter(
+        user=user,
+        id__in=[op['id'] for op in operacoes if op['op'] != 'create'],
+    ).defer('busca').in_bulk()
+    validados, erros = _validar(operacoes, context, existentes)
+
+    if erros:
+        return False, [
+            {
+                'indice': indice,
+                'op': operacao['op'],
+                'status': 400 if indice in erros else 424,
+                'erros': erros.get(indice, {}),
+            }
+            for indice, operacao in enumerate(operacoes)
+        ]
+
+    def indices(op):
+        return [i for i, operacao in enumerate(operacoes)
+                if operacao['op'] == op]
+
+    criacoes, atualizacoes, remocoes = (
+        indices('create'), indices('update'), indices('delete')
+    )
+    with transaction.atomic(), Alteracao.objects.em_lote():
+        criadas = criar_receitas(user, [validados[i] for i in criacoes])
+        atualizar_receitas(
+            user,
+            [existentes[operacoes[i]['id']] for i in atualizacoes],
+            [validados[i] for i in atualizacoes],
+        )
+        ids_removidos = [operacoes[i]['id'] for i in remocoes]
+        if ids_removidos:
+            Receita.objects.filter(user=user, id__in=ids_removidos).delete()
+
+    ids = dict(zip(criacoes, (receita.pk for receita in criadas)))
+    ids.update((i, operacoes[i]['id']) for i in atualizacoes + remocoes)
+    receitas = Receita.objects.filter(
+        id__in=[ids[i] for i in criacoes + atualizacoes]
+    ).defer('busca').prefetch_related(
+        'categorias', 'ingredientes'
+    ).in_bulk()
+
+    resultados = []
+    for indice, operacao in enumerate(operacoes):
+        resultado = {'indice': indice, 'op': operacao['op'], 'id': ids[indice]}
+        if operacao['op'] == 'delete':
+            resultado['status'] = 204
+        else:
+            resultado['status'] = 201 if operacao['op'] == 'create' else 200
+            resultado['dados'] = DetalhesReceitaSerializer(
+                receitas[ids[indice]], context=context
+            ).data
+        resultados.append(resultado)
+
+    return True, resultados
@@ -0,0 +1,34 @@
+"""
+Comando para compactar o registro de alterações da sincronização.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from receita.sincronizacao import compactar_alteracoes
+
+
+class Command(BaseCommand):
+    """
+    Descarta as remoções antigas do registro de alterações. Cada item
+    já guarda só a sua última alteração, então apenas as remoções
+    acumulam. Clientes que não sincronizaram desde então recebem 410 e
+    precisam sincronizar desde o início.
+    """
+    help = 'Descarta as remoções antigas do registro de alterações.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=float, default=30,
+            help='Idade mínima, em dias, de uma remoção descartada.',
+        )
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        antes = timezone.now() - timedelta(days=options['dias'])
+        descartadas = compactar_alteracoes(antes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{descartadas} remoções descartadas.'
+        ))
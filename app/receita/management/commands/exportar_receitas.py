@@ -0,0 +1,38 @@
+"""
+Comando para exportar receitas para um arquivo JSON Lines.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from receita.ndjson import exportar_receitas
+
+
+class Command(BaseCommand):
+    """
+    Exporta as receitas de um usuário em NDJSON, uma por linha, no
+    formato aceito pelo comando importar_receitas.
+    """
+    help = 'Exporta receitas para um arquivo JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='E-mail do dono das receitas.')
+        parser.add_argument(
+            'arquivo', nargs='?', default='-',
+            help='Arquivo de saída, ou - para a saída padrão.',
+        )
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('Usuário não encontrado.')
+
+        if options['arquivo'] == '-':
+            for linha in exportar_receitas(user):
+                self.stdout.write(linha.decode(), ending='')
+            return
+
+        with open(options['arquivo'], 'wb') as arquivo:
+            for linha in exportar_receitas(user):
+                arquivo.write(linha)
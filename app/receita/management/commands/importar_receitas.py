@@ -0,0 +1,51 @@
+"""
+Comando para importar receitas de um arquivo JSON Lines.
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from receita.ndjson import (
+    TAMANHO_LOTE,
+    codificar_linha,
+    importar_receitas,
+)
+
+
+class Command(BaseCommand):
+    """
+    Importa para um usuário as receitas de um arquivo NDJSON, uma por
+    linha, gravando em lotes transacionais. As linhas recusadas são
+    listadas com os erros.
+    """
+    help = 'Importa receitas de um arquivo JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='E-mail do dono das receitas.')
+        parser.add_argument(
+            'arquivo', help='Arquivo NDJSON, ou - para a entrada padrão.',
+        )
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE)
+
+    def handle(self, *args, **options):
+        """Ponto de entrada para o comando"""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('Usuário não encontrado.')
+
+        if options['arquivo'] == '-':
+            relatorio = importar_receitas(
+                user, sys.stdin.buffer, options['lote']
+            )
+        else:
+            with open(options['arquivo'], 'rb') as arquivo:
+                relatorio = importar_receitas(user, arquivo, options['lote'])
+
+        for erro in relatorio['erros']:
+            self.stderr.write(codificar_linha(erro).decode().rstrip())
+        self.stdout.write(self.style.SUCCESS(
+            f'{relatorio["criadas"]} receitas importadas, '
+            f'{len(relatorio["erros"])} linhas com erro.'
+        ))
@@ -0,0 +1,154 @@
+"""
+Importação e exportação de receitas em JSON Lines (NDJSON).
+
+Cada linha traz uma receita no formato dos detalhes da API. A
+importação lê as linhas conforme chegam e grava em lotes, cada um em
+uma transação; a exportação lê as receitas em blocos, com memória
+constante.
+"""
+from itertools import islice
+import json
+
+from django.db import DatabaseError, transaction
+from django.utils.translation import gettext as _
+
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+from core.models import (
+    Alteracao,
+    Receita,
+)
+from receita import lote
+from receita.serializers import (
+    ImportacaoReceitaSerializer,
+    atributos_por_receita,
+)
+
+
+MEDIA_TYPE = 'application/x-ndjson'
+
+TAMANHO_LOTE = 500
+
+CAMPOS_EXPORTADOS = ('id', 'nome', 'descricao', 'tempo_preparo', 'preco',
+                     'link')
+
+
+class NDJSONParser(BaseParser):
+    """Entrega o corpo da requisição para ser lido linha a linha."""
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream if stream is not None else iter(())
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renderiza uma resposta como uma linha JSON."""
+    media_type = MEDIA_TYPE
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return codificar_linha(data)
+
+
+def codificar_linha(dados):
+    """Codifica um objeto como uma linha JSON."""
+    return json.dumps(
+        dados, cls=encoders.JSONEncoder, ensure_ascii=False
+    ).encode('utf-8') + b'\n'
+
+
+def _gravar_lote(user, itens, numeros, relatorio):
+    """Grava um lote de receitas validadas em uma transação."""
+    try:
+        with transaction.atomic(), Alteracao.objects.em_lote():
+            lote.criar_receitas(user, itens)
+    except DatabaseError:
+        relatorio['erros'].extend(
+            {'linha': numero, 'erros': [_('Falha ao gravar o lote.')]}
+            for numero in numeros
+        )
+    else:
+        relatorio['criadas'] += len(itens)
+
+
+def importar_receitas(user, linhas, tamanho_lote=TAMANHO_LOTE):
+    """Importa as receitas das linhas NDJSON para o usuário.
+
+    Retorna um relatório com o total de receitas criadas e os erros de
+    cada linha recusada, que não impedem a importação das demais.
+    """
+    relatorio = {'criadas': 0, 'erros': []}
+    itens, numeros = [], []
+
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except ValueError:
+            relatorio['erros'].append(
+                {'linha': numero, 'erros': [_('JSON inválido.')]}
+            )
+            continue
+
+        serializer = ImportacaoReceitaSerializer(data=dados)
+        if not serializer.is_valid():
+            relatorio['erros'].append(
+                {'linha': numero, 'erros': serializer.errors}
+            )
+            continue
+
+        itens.append(serializer.validated_data)
+        numeros.append(numero)
+        if len(itens) >= tamanho_lote:
+            _gravar_lote(user, itens, numeros, relatorio)
+            itens, numeros = [], []
+
+    if itens:
+        _gravar_lote(user, itens, numeros, relatorio)
+
+    return relatorio
+
+
+def completar_receitas(receitas):
+    """Completa as receitas lidas com values() com os atributos.
+
+    As receitas trazem os CAMPOS_EXPORTADOS; os atributos de todas são
+    lidos com uma consulta por campo.
+    """
+    ids = [receita['id'] for receita in receitas]
+    atributos = {
+        campo: atributos_por_receita(campo, ids)
+        for campo in lote.CAMPOS_ATRIBUTOS
+    }
+    for receita in receitas:
+        receita['preco'] = str(receita['preco'])
+        for campo in lote.CAMPOS_ATRIBUTOS:
+            receita[campo] = atributos[campo].get(receita['id'], [])
+
+    return receitas
+
+
+def exportar_receitas(user, tamanho_bloco=1000):
+    """Gera as receitas do usuário como linhas NDJSON.
+
+    As receitas são lidas com um cursor no servidor, em blocos de
+    tamanho_bloco, e os atributos de cada bloco em uma consulta por
+    campo.
+    """
+    receitas = Receita.objects.filter(user=user).order_by('id').values(
+        *CAMPOS_EXPORTADOS
+    ).iterator(chunk_size=tamanho_bloco)
+
+    while True:
+        bloco = list(islice(receitas, tamanho_bloco))
+        if not bloco:
+            return
+
+        for receita in completar_receitas(bloco):
+            yield codificar_linha(receita)
@@ -0,0 +1,34 @@
+"""
+Paginação por cursor para a API de Receitas.
+"""
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """Paginação por cursor com tamanho de página configurável."""
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class ReceitaCursorPagination(BaseCursorPagination):
+    """Paginação das receitas, da mais recente para a mais antiga.
+
+    Na busca (parâmetro q), as receitas são ordenadas pela relevância.
+    """
+    ordering = '-id'
+    ordering_busca = ('-rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """Retorna a ordenação da página, pela relevância na busca."""
+        if request.query_params.get('q', '').strip():
+            return self.ordering_busca
+
+        return super().get_ordering(request, queryset, view)
+
+
+class ReceitaAttrCursorPagination(BaseCursorPagination):
+    """Paginação das categorias e ingredientes por nome."""
+    ordering = ('-nome', 'id')
@@ -1,16 +1,46 @@
 """
 Serializers para a API de Receitas
 """
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
+from core.instrumentacao import SerializacaoMedidaMixin
 from core.models import (
+    Alteracao,
     Receita,
     Categoria,
     Ingrediente
 )
+from receita.imagens import urls_variantes
+
 
+class AtributoReceitaSerializer(SerializacaoMedidaMixin,
+                                serializers.ModelSerializer):
+    """Serializer base para categorias e ingredientes."""
 
-class CategoriaSerializer(serializers.ModelSerializer):
+    def validate_nome(self, value):
+        """Impede renomear um item para um nome já usado pelo usuário."""
+        if self.parent is not None:
+            return value
+
+        user = self.context['request'].user
+        repetidos = self.Meta.model.objects.filter(user=user, nome=value)
+        if self.instance is not None:
+            repetidos = repetidos.exclude(pk=self.instance.pk)
+        if repetidos.exists():
+            raise serializers.ValidationError(
+                _('Já existe um item com esse nome.')
+            )
+
+        return value
+
+
+class CategoriaSerializer(AtributoReceitaSerializer):
     """Serializer para categoria de receitas."""
 
     class Meta:
@@ -19,7 +49,7 @@ class CategoriaSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class IngredienteSerializer(serializers.ModelSerializer):
+class IngredienteSerializer(AtributoReceitaSerializer):
     """Serializer para ingredientes de receitas."""
 
     class Meta:
@@ -28,7 +58,8 @@ class IngredienteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class ReceitaSerializer(serializers.ModelSerializer):
+class ReceitaSerializer(SerializacaoMedidaMixin,
+                        serializers.ModelSerializer):
     """Serializer para Receita."""
     categorias = CategoriaSerializer(many=True, required=False)
     ingredientes = IngredienteSerializer(many=True, required=False)
@@ -46,33 +77,74 @@ class ReceitaSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id']
 
-    def _get_or_create_ingredientes(self, ingredientes, receita):
-        """Recupera ou cria ingredientes."""
+    def _get_or_create_atributos(self, campo, atributos, receita,
+                                 substituir=False):
+        """Recupera ou cria em lote os atributos e os associa à receita.
+
+        Com substituir, os atributos atuais da receita são trocados pelos
+        informados, removendo ou inserindo apenas as associações que
+        mudaram na tabela intermediária. Retorna se alguma associação
+        mudou.
+        """
         auth_user = self.context['request'].user
-        for ingrediente in ingredientes:
-            ing_obj, created = Ingrediente.objects.get_or_create(
-                user=auth_user,
-                **ingrediente
+        m2m = Receita._meta.get_field(campo)
+        itens = m2m.related_model.objects.bulk_get_or_create(
+            auth_user,
+            [atributo['nome'] for atributo in atributos],
+        )
+
+        Through = m2m.remote_field.through
+        coluna = f'{m2m.m2m_reverse_field_name()}_id'
+        desejados = {item.id for item in itens.values()}
+        atuais = set()
+        removidos = set()
+        if substituir:
+            associacoes = Through.objects.filter(
+                **{m2m.m2m_field_name(): receita}
             )
-            receita.ingredientes.add(ing_obj)
+            atuais = set(associacoes.values_list(coluna, flat=True))
+            removidos = atuais - desejados
+            if removidos:
+                associacoes.filter(**{f'{coluna}__in': removidos}).delete()
+
+        adicionados = desejados - atuais
+        Through.objects.bulk_create(
+            [
+                Through(**{
+                    m2m.m2m_field_name(): receita,
+                    coluna: item_id,
+                })
+                for item_id in adicionados
+            ],
+            ignore_conflicts=True,
+        )
+
+        return bool(adicionados or removidos)
 
-    def _get_or_create_categorias(self, categorias, receita):
+    def _get_or_create_ingredientes(self, ingredientes, receita,
+                                    substituir=False):
+        """Recupera ou cria ingredientes."""
+        return self._get_or_create_atributos(
+            'ingredientes', ingredientes, receita, substituir
+        )
+
+    def _get_or_create_categorias(self, categorias, receita,
+                                  substituir=False):
         """Recupera ou cria categorias."""
-        auth_user = self.context['request'].user
-        for categoria in categorias:
-            cat_obj, created = Categoria.objects.get_or_create(
-                user=auth_user,
-                **categoria
-            )
-            receita.categorias.add(cat_obj)
+        return self._get_or_create_atributos(
+            'categorias', categorias, receita, substituir
+        )
 
     def create(self, validated_data):
         """Cria uma nova receita."""
         categorias = validated_data.pop('categorias', [])
         ingredientes = validated_data.pop('ingredientes', [])
-        receita = Receita.objects.create(**validated_data)
-        self._get_or_create_categorias(categorias, receita)
-        self._get_or_create_ingredientes(ingredientes, receita)
+        # A receita e os atributos novos são registrados para a
+        # sincronização de uma vez, na mesma transação.
+        with transaction.atomic(), Alteracao.objects.em_lote():
+            receita = Receita.objects.create(**validated_data)
+            self._get_or_create_categorias(categorias, receita)
+            self._get_or_create_ingredientes(ingredientes, receita)
 
         return receita
 
@@ -81,31 +153,228 @@ class ReceitaSerializer(serializers.ModelSerializer):
         categorias = validated_data.pop('categorias', None)
         ingredientes = validated_data.pop('ingredientes', None)
 
-        if categorias is not None:
-            instance.categorias.clear()
-            self._get_or_create_categorias(categorias, instance)
-        if ingredientes is not None:
-            instance.ingredientes.clear()
-            self._get_or_create_ingredientes(ingredientes, instance)
+        with transaction.atomic(), Alteracao.objects.em_lote():
+            associacoes_alteradas = False
+            if categorias is not None:
+                associacoes_alteradas |= self._get_or_create_categorias(
+                    categorias, instance, substituir=True
+                )
+            if ingredientes is not None:
+                associacoes_alteradas |= self._get_or_create_ingredientes(
+                    ingredientes, instance, substituir=True
+                )
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            alterados = [
+                attr for attr, value in validated_data.items()
+                if getattr(instance, attr) != value
+            ]
+            for attr in alterados:
+                setattr(instance, attr, validated_data[attr])
 
-        instance.save()
+            if alterados or associacoes_alteradas:
+                instance.save(update_fields=alterados + ['modificado'])
 
         return instance
 
 
-class DetalhesReceitaSerializer(ReceitaSerializer):
+class ImportacaoReceitaSerializer(ReceitaSerializer):
+    """Serializer para validar as receitas importadas em lote."""
+
+    class Meta(ReceitaSerializer.Meta):
+        fields = ReceitaSerializer.Meta.fields + ['descricao']
+
+
+class VariantesImagemMixin(serializers.Serializer):
+    """Expõe as URLs das variantes redimensionadas da imagem."""
+    imagens = serializers.SerializerMethodField()
+
+    def get_imagens(self, obj):
+        """Retorna {variante: {formato: url}}, vazio até o processamento."""
+        return urls_variantes(
+            obj.imagem_variantes, self.context.get('request')
+        )
+
+
+class DetalhesReceitaSerializer(VariantesImagemMixin, ReceitaSerializer):
     """Serializer para detalhes de Receita."""
 
     class Meta(ReceitaSerializer.Meta):
-        fields = ReceitaSerializer.Meta.fields + ['descricao', 'imagem']
+        fields = ReceitaSerializer.Meta.fields + [
+            'descricao', 'imagem', 'imagens'
+        ]
 
-class ImagemReceitaSerializer(serializers.ModelSerializer):
+class ImagemReceitaSerializer(SerializacaoMedidaMixin, VariantesImagemMixin,
+                              serializers.ModelSerializer):
     '''Serializer para imagem de uma Receita'''
     class Meta:
         model = Receita
-        fields = ['id', 'imagem']
+        fields = ['id', 'imagem', 'imagens']
         read_only_fields = ['id']
         extra_kwargs = {'imagem': {'required': 'True'}}
+
+
+class OperacaoLoteSerializer(serializers.Serializer):
+    """Serializer para uma operação do lote de receitas."""
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    dados = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        """Exige o id e os dados conforme a operação."""
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': _('Informe o id da receita.')}
+            )
+        if attrs['op'] != 'delete' and 'dados' not in attrs:
+            raise serializers.ValidationError(
+                {'dados': _('Informe os dados da receita.')}
+            )
+
+        return attrs
+
+
+class LoteReceitasSerializer(serializers.Serializer):
+    """Serializer para um lote de operações sobre receitas."""
+    operacoes = OperacaoLoteSerializer(many=True, allow_empty=False)
+
+    def validate_operacoes(self, value):
+        """Limita a quantidade de operações do lote."""
+        if len(value) > settings.API_LOTE_MAX_OPERACOES:
+            raise serializers.ValidationError(
+                _('O lote aceita no máximo %d operações.')
+                % settings.API_LOTE_MAX_OPERACOES
+            )
+
+        return value
+
+
+def atributos_por_receita(campo, receita_ids):
+    """Retorna os atributos de cada receita, em ordem de id.
+
+    Lê a tabela intermediária com uma consulta, retornando um
+    dicionário de id da receita para [{'id': ..., 'nome': ...}].
+    """
+    m2m = Receita._meta.get_field(campo)
+    receita = m2m.m2m_field_name()
+    atributo = m2m.m2m_reverse_field_name()
+    associacoes = m2m.remote_field.through.objects.filter(**{
+        f'{receita}_id__in': receita_ids,
+    }).order_by(f'{atributo}_id').values_list(
+        f'{receita}_id', f'{atributo}_id', f'{atributo}__nome'
+    )
+
+    atributos = {}
+    for receita_id, atributo_id, nome in associacoes:
+        atributos.setdefault(receita_id, []).append(
+            {'id': atributo_id, 'nome': nome}
+        )
+
+    return atributos
+
+
+class LeituraListSerializer(SerializacaoMedidaMixin,
+                            serializers.ListSerializer):
+    """Serializa as receitas de uma página lendo os atributos juntos."""
+
+    def to_representation(self, data):
+        linhas = list(data)
+        if linhas and not isinstance(linhas[0], dict):
+            return super().to_representation(linhas)
+
+        atributos = self.child.ler_atributos(
+            [linha['id'] for linha in linhas]
+        )
+        return [self.child.representar(linha, atributos) for linha in linhas]
+
+
+class LeituraReceitaMixin:
+    """Representação das receitas sem a maquinaria de campos do DRF.
+
+    Para as leituras: as receitas vêm de values() com os campos de
+    campos_consulta() e os atributos de uma consulta por campo, e a
+    resposta é montada direto em dicionários, no mesmo formato e ordem
+    do serializer original. Os campos continuam declarados, para o
+    schema e para receber instâncias de models, que seguem o caminho
+    normal.
+    """
+    CAMPOS_ATRIBUTOS = ('categorias', 'ingredientes')
+    # Formata o preço como o DecimalField gerado pelo ModelSerializer.
+    campo_preco = serializers.DecimalField(
+        max_digits=Receita._meta.get_field('preco').max_digits,
+        decimal_places=Receita._meta.get_field('preco').decimal_places,
+    )
+
+    @classmethod
+    def campos_consulta(cls):
+        """Retorna as colunas da receita a serem lidas com values()."""
+        campos = []
+        for campo in cls.Meta.fields:
+            if campo == 'imagens':
+                campos.append('imagem_variantes')
+            elif campo not in cls.CAMPOS_ATRIBUTOS:
+                campos.append(campo)
+
+        return tuple(campos)
+
+    def ler_atributos(self, receita_ids):
+        """Retorna os atributos das receitas para cada campo."""
+        return {
+            campo: atributos_por_receita(campo, receita_ids)
+            for campo in self.CAMPOS_ATRIBUTOS
+            if campo in self.Meta.fields
+        }
+
+    def representar(self, linha, atributos):
+        """Monta a representação de uma receita lida com values()."""
+        request = self.context.get('request')
+        dados = OrderedDict()
+        for campo in self.Meta.fields:
+            if campo in atributos:
+                dados[campo] = atributos[campo].get(linha['id'], [])
+            elif campo == 'preco':
+                dados[campo] = self.campo_preco.to_representation(
+                    linha['preco']
+                )
+            elif campo == 'imagem':
+                dados[campo] = _url_arquivo(linha['imagem'], request)
+            elif campo == 'imagens':
+                dados[campo] = urls_variantes(
+                    linha['imagem_variantes'], request
+                )
+            else:
+                dados[campo] = linha[campo]
+
+        return dados
+
+    def to_representation(self, instance):
+        if not isinstance(instance, dict):
+            return super().to_representation(instance)
+
+        return self.representar(instance, self.ler_atributos([instance['id']]))
+
+
+def _url_arquivo(nome, request=None):
+    """Retorna a URL de um arquivo como o FileField do DRF."""
+    if not nome:
+        return None
+
+    url = Receita._meta.get_field('imagem').storage.url(nome)
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    return url
+
+
+class LeituraReceitaSerializer(LeituraReceitaMixin, ReceitaSerializer):
+    """Serializer de leitura rápida para a listagem de receitas."""
+
+    class Meta(ReceitaSerializer.Meta):
+        list_serializer_class = LeituraListSerializer
+
+
+class LeituraDetalhesReceitaSerializer(LeituraReceitaMixin,
+                                       DetalhesReceitaSerializer):
+    """Serializer de leitura rápida para os detalhes de Receita."""
+
+    class Meta(DetalhesReceitaSerializer.Meta):
+        list_serializer_class = LeituraListSerializer
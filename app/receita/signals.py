@@ -0,0 +1,126 @@
+"""
+Sinais da API de Receitas.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    Alteracao,
+    Receita,
+    RevisaoUsuario,
+    Categoria,
+    Ingrediente,
+)
+from receita.cache import invalidar_usuario
+
+
+@receiver(post_save, sender=Receita)
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Ingrediente)
+@receiver(post_delete, sender=Receita)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Ingrediente)
+def invalidar_cache_item(sender, instance, **kwargs):
+    """Invalida o cache do dono de um item alterado fora da API."""
+    invalidar_usuario(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Receita.categorias.through)
+@receiver(m2m_changed, sender=Receita.ingredientes.through)
+def invalidar_cache_associacoes(sender, instance, action, **kwargs):
+    """Invalida o cache quando as associações de uma receita mudam."""
+    if action.startswith('post_'):
+        invalidar_usuario(instance.user_id)
+
+
+@receiver(post_save, sender=Receita)
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Ingrediente)
+def registrar_alteracao_item(sender, instance, created, **kwargs):
+    """Registra a alteração de um item para a sincronização.
+
+    As receitas trazem o nome dos atributos, então renomear um atributo
+    também altera as receitas associadas.
+    """
+    tipo = sender._meta.model_name
+    Alteracao.objects.registrar(instance.user_id, tipo, [instance.id])
+    if sender is not Receita and not created:
+        Alteracao.objects.registrar(
+            instance.user_id,
+            'receita',
+            instance.receita_set.values_list('id', flat=True),
+        )
+
+
+@receiver(pre_delete, sender=Categoria)
+@receiver(pre_delete, sender=Ingrediente)
+def registrar_receitas_do_atributo(sender, instance, **kwargs):
+    """Registra a alteração das receitas de um atributo removido."""
+    Alteracao.objects.registrar(
+        instance.user_id,
+        'receita',
+        instance.receita_set.values_list('id', flat=True),
+    )
+
+
+@receiver(post_delete, sender=Receita)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Ingrediente)
+def registrar_remocao_item(sender, instance, **kwargs):
+    """Registra a remoção de um item para a sincronização."""
+    Alteracao.objects.registrar(
+        instance.user_id, sender._meta.model_name, [instance.id],
+        removido=True,
+    )
+
+
+@receiver(m2m_changed, sender=Receita.categorias.through)
+@receiver(m2m_changed, sender=Receita.ingredientes.through)
+def registrar_alteracao_associacoes(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    """Registra a alteração das receitas cujas associações mudaram."""
+    if not reverse:
+        if action.startswith('post_'):
+            Alteracao.objects.registrar(
+                instance.user_id, 'receita', [instance.id]
+            )
+    elif action == 'pre_clear':
+        Alteracao.objects.registrar(
+            instance.user_id,
+            'receita',
+            instance.receita_set.values_list('id', flat=True),
+        )
+    elif action in ('post_add', 'post_remove'):
+        Alteracao.objects.registrar(instance.user_id, 'receita', pk_set)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def suspender_registro_usuario(sender, instance, **kwargs):
+    """Não registra as remoções em cascata de um usuário excluído."""
+    Alteracao.objects.suspender(instance.id)
+
+
+@receiver(post_delete, sender=get_user_model())
+def retomar_registro_usuario(sender, instance, **kwargs):
+    """Volta a registrar alterações para o id do usuário excluído."""
+    Alteracao.objects.retomar(instance.id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidar_cache_novo_usuario(sender, instance, created, **kwargs):
+    """Garante que um novo usuário não herde cache de um id reutilizado."""
+    if created:
+        invalidar_usuario(instance.id)
+
+
+@receiver(post_save, sender=get_user_model())
+def criar_revisao_novo_usuario(sender, instance, created, **kwargs):
+    """Cria o contador de revisões do usuário para a sincronização."""
+    if created:
+        RevisaoUsuario.objects.get_or_create(user=instance)
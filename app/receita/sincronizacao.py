@@ -0,0 +1,137 @@
+"""
+Sincronização incremental das receitas.
+
+Cada alteração de receita, categoria ou ingrediente recebe uma revisão
+crescente por usuário. Os clientes guardam a última revisão recebida e
+pedem apenas os itens alterados depois dela, em vez da lista completa.
+"""
+from django.db import transaction
+from django.db.models import Max
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import (
+    Alteracao,
+    Categoria,
+    Ingrediente,
+    Receita,
+    RevisaoUsuario,
+)
+from receita.ndjson import (
+    CAMPOS_EXPORTADOS,
+    completar_receitas,
+)
+
+
+MODELS_ATRIBUTOS = {
+    'categoria': Categoria,
+    'ingrediente': Ingrediente,
+}
+
+
+class SincronizacaoExpirada(APIException):
+    """Remoções posteriores à revisão do cliente já foram descartadas."""
+    status_code = status.HTTP_410_GONE
+    default_detail = _(
+        'Revisão anterior à última compactação. Sincronize desde o início.'
+    )
+    default_code = 'sincronizacao_expirada'
+
+
+def _dados_itens(user, tipo, ids):
+    """Retorna os dados atuais dos itens de um tipo, por id."""
+    if not ids:
+        return {}
+
+    if tipo == 'receita':
+        receitas = Receita.objects.filter(user=user, id__in=ids).values(
+            *CAMPOS_EXPORTADOS
+        )
+        return {
+            receita['id']: receita
+            for receita in completar_receitas(list(receitas))
+        }
+
+    itens = MODELS_ATRIBUTOS[tipo].objects.filter(
+        user=user, id__in=ids
+    ).values('id', 'nome')
+    return {item['id']: item for item in itens}
+
+
+def alteracoes_desde(user, desde, limite, inicial=False):
+    """Retorna as alterações do usuário posteriores à revisão desde.
+
+    Retorna até limite alterações, em ordem de revisão, se há mais e a
+    revisão a ser enviada na requisição seguinte. Na sincronização
+    inicial (desde igual a 0, ou inicial nas páginas seguintes) as
+    remoções são omitidas, pois o cliente ainda não tem os itens. Fora
+    dela, levanta SincronizacaoExpirada se remoções que o cliente ainda
+    não recebeu já foram compactadas.
+    """
+    inicial = inicial or not desde
+    compactado = RevisaoUsuario.objects.filter(user=user).values_list(
+        'compactado', flat=True
+    ).first() or 0
+    if not inicial and desde < compactado:
+        raise SincronizacaoExpirada()
+
+    alteracoes = Alteracao.objects.filter(user=user, revisao__gt=desde)
+    if inicial:
+        alteracoes = alteracoes.filter(removido=False)
+    alteracoes = list(alteracoes.order_by('revisao')[:limite + 1])
+    mais = len(alteracoes) > limite
+    alteracoes = alteracoes[:limite]
+
+    dados = {
+        tipo: _dados_itens(user, tipo, [
+            alteracao.objeto_id for alteracao in alteracoes
+            if alteracao.tipo == tipo and not alteracao.removido
+        ])
+        for tipo, _nome in Alteracao.TIPOS
+    }
+    resultados = []
+    for alteracao in alteracoes:
+        # Um item removido depois da leitura do registro é enviado como
+        # remoção; a remoção em si aparece em uma revisão posterior.
+        item = dados[alteracao.tipo].get(alteracao.objeto_id)
+        resultados.append({
+            'revisao': alteracao.revisao,
+            'tipo': alteracao.tipo,
+            'id': alteracao.objeto_id,
+            'removido': item is None,
+            'dados': item,
+        })
+
+    revisao = resultados[-1]['revisao'] if resultados else desde
+    if inicial and not mais:
+        # A última página pode parar antes de remoções já compactadas;
+        # a sincronização incremental seguinte deve começar depois
+        # delas.
+        revisao = max(revisao, compactado)
+
+    return resultados, mais, revisao
+
+
+def compactar_alteracoes(antes):
+    """Descarta as remoções registradas antes da data.
+
+    Guarda, por usuário, a maior revisão descartada: clientes com uma
+    revisão anterior a ela precisam sincronizar desde o início. Retorna
+    a quantidade de remoções descartadas.
+    """
+    remocoes = Alteracao.objects.filter(removido=True, modificado__lt=antes)
+    maximos = remocoes.values('user').annotate(maximo=Max('revisao'))
+
+    descartadas = 0
+    for linha in maximos:
+        with transaction.atomic():
+            RevisaoUsuario.objects.filter(
+                user_id=linha['user'], compactado__lt=linha['maximo'],
+            ).update(compactado=linha['maximo'])
+            descartadas += remocoes.filter(
+                user_id=linha['user'], revisao__lte=linha['maximo'],
+            ).delete()[0]
+
+    return descartadas
@@ -0,0 +1,200 @@
+"""
+Testes para as views assíncronas de leitura das receitas.
+"""
+import asyncio
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+    Ingrediente,
+)
+from user.authentication import cache_tokens
+
+
+def criar_receita(user, **params):
+    """Cria e retorna uma receita teste."""
+    defaults = {
+        'nome': 'Receita teste',
+        'tempo_preparo': 10,
+        'preco': Decimal('5.50'),
+    }
+    defaults.update(params)
+
+    return Receita.objects.create(user=user, **defaults)
+
+
+@override_settings(ASYNC_DB_THREADS=0)
+class ViewsAssincronasTestes(TestCase):
+    """Testa as leituras assíncronas contra as views síncronas."""
+
+    def setUp(self):
+        cache_tokens.limpar()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.receita = criar_receita(self.user, nome='Bolo')
+        self.receita.categorias.add(
+            Categoria.objects.create(user=self.user, nome='Doce')
+        )
+        self.receita.ingredientes.add(
+            Ingrediente.objects.create(user=self.user, nome='Ovo')
+        )
+        criar_receita(self.user, nome='Pão')
+
+    def _requisitar(self, nome, args=(), **params):
+        """Retorna as respostas das versões síncrona e assíncrona."""
+        return (
+            self.client.get(reverse(f'receita:{nome}', args=args), params),
+            self.client.get(
+                reverse(f'receita:async-{nome}', args=args), params
+            ),
+        )
+
+    def _comparar(self, nome, *args, **params):
+        """Compara as respostas das versões síncrona e assíncrona."""
+        sincrona, assincrona = self._requisitar(nome, args, **params)
+
+        self.assertEqual(assincrona.status_code, sincrona.status_code)
+        self.assertEqual(assincrona.content, sincrona.content)
+        self.assertEqual(assincrona['Content-Type'], sincrona['Content-Type'])
+
+    def test_mesmas_respostas(self):
+        """Testa se as leituras respondem como as views síncronas."""
+        for nome, args in (
+            ('receita-list', ()),
+            ('receita-detail', (self.receita.id,)),
+            ('categoria-list', ()),
+            ('ingrediente-list', ()),
+        ):
+            with self.subTest(nome=nome):
+                self._comparar(nome, *args)
+
+    def test_filtros_e_paginacao(self):
+        """Testa os parâmetros da listagem e o link da próxima página."""
+        sincrona, assincrona = self._requisitar(
+            'receita-list', q='bolo', page_size=1
+        )
+
+        self.assertEqual(
+            assincrona.json()['results'], sincrona.json()['results']
+        )
+        self.assertEqual(assincrona.json()['results'][0]['nome'], 'Bolo')
+        self.assertIsNone(assincrona.json()['next'])
+
+        assincrona = self._requisitar('receita-list', page_size=1)[1]
+        self.assertIn('/async/receita/?cursor=', assincrona.json()['next'])
+
+    def test_erros(self):
+        """Testa as respostas de erro das views assíncronas."""
+        self._comparar('receita-list', match='nenhum')
+        self._comparar('receita-detail', 999999)
+
+        res = APIClient().get(reverse('receita:async-receita-list'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+        res = self.client.post(reverse('receita:async-receita-list'), {})
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(API_CACHE_ATIVO=True)
+    def test_resposta_em_cache_sem_thread(self):
+        """Testa se uma resposta em cache não passa pelo executor."""
+        url = reverse('receita:async-receita-list')
+        primeira = self.client.get(url)
+
+        with patch('core.assincrono.no_banco') as no_banco:
+            with CaptureQueriesContext(connection) as consultas:
+                segunda = self.client.get(url)
+            nao_modificada = self.client.get(
+                url, HTTP_IF_NONE_MATCH=primeira['ETag']
+            )
+
+        no_banco.assert_not_called()
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual(segunda.content, primeira.content)
+        self.assertEqual(nao_modificada.status_code, 304)
+
+    def test_escrita_invalida_o_cache(self):
+        """Testa se uma escrita pela API síncrona invalida o cache."""
+        url = reverse('receita:async-receita-detail', args=[self.receita.id])
+        self.client.get(url)
+
+        self.client.patch(
+            reverse('receita:receita-detail', args=[self.receita.id]),
+            {'nome': 'Bolo novo'},
+        )
+
+        self.assertEqual(self.client.get(url).json()['nome'], 'Bolo novo')
+
+    def test_receita_de_outro_usuario(self):
+        """Testa se a receita de outro usuário não é encontrada."""
+        outro = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        receita = criar_receita(outro)
+
+        res = self.client.get(
+            reverse('receita:async-receita-detail', args=[receita.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(ASYNC_DB_THREADS=4)
+class ExecutorConsultasTestes(TransactionTestCase):
+    """Testa as consultas das views assíncronas no executor."""
+
+    def test_requisicoes_concorrentes(self):
+        """Testa requisições simultâneas atendidas pelo executor."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        token = Token.objects.create(user=user)
+        ids = [criar_receita(user, nome=f'Receita {i}').id for i in range(5)]
+        client = AsyncClient()
+
+        async def requisitar():
+            # Cabeçalhos do AsyncClient vão sem o prefixo HTTP_.
+            return await asyncio.gather(*(
+                client.get(
+                    reverse('receita:async-receita-detail', args=[id_]),
+                    AUTHORIZATION=f'Token {token.key}',
+                )
+                for id_ in ids
+            ))
+
+        respostas = async_to_sync(requisitar)()
+
+        self.assertEqual(
+            [res.status_code for res in respostas], [200] * len(ids)
+        )
+        self.assertEqual(
+            [res.json()['id'] for res in respostas], ids
+        )
@@ -0,0 +1,272 @@
+"""
+Testes para o cache de respostas da API de Receitas.
+"""
+from decimal import Decimal
+import tempfile
+import os
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+)
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+CATEGORIAS_URL = reverse('receita:categoria-list')
+
+
+def detalhes_url(id_receita):
+    """Cria e retorna a URL para a Receita."""
+    return reverse('receita:receita-detail', args=[id_receita])
+
+
+def create_receita(user, **params):
+    """Cria e retorna uma receita teste."""
+    defaults = {
+        'nome': 'Receita em cache',
+        'tempo_preparo': 10,
+        'preco': Decimal('5.00'),
+    }
+    defaults.update(params)
+
+    return Receita.objects.create(user=user, **defaults)
+
+
+@override_settings(API_CACHE_ATIVO=True)
+class CacheRespostasTestes(TestCase):
+    """Testa o cache das leituras de receitas e atributos."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_listagem_servida_do_cache(self):
+        """Testa se a segunda listagem não consulta o banco."""
+        create_receita(user=self.user)
+        res = self.client.get(RECEITAS_URL)
+
+        with self.assertNumQueries(0):
+            res_cache = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res_cache.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_cache.data, res.data)
+
+    def test_detalhes_servidos_do_cache(self):
+        """Testa se os detalhes repetidos não consultam o banco."""
+        receita = create_receita(user=self.user)
+        self.client.get(detalhes_url(receita.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(detalhes_url(receita.id))
+
+        self.assertEqual(res.data['id'], receita.id)
+
+    def test_parametros_diferentes_nao_compartilham_cache(self):
+        """Testa se filtros diferentes geram entradas diferentes."""
+        categoria = Categoria.objects.create(user=self.user, nome='Doce')
+        receita = create_receita(user=self.user)
+        receita.categorias.add(categoria)
+        create_receita(user=self.user)
+
+        todas = self.client.get(RECEITAS_URL)
+        filtradas = self.client.get(
+            RECEITAS_URL, {'categorias': str(categoria.id)}
+        )
+
+        self.assertEqual(len(todas.data['results']), 2)
+        self.assertEqual(len(filtradas.data['results']), 1)
+
+    def test_formatos_diferentes_nao_compartilham_cache(self):
+        """Testa se a API navegável e o JSON têm entradas separadas."""
+        create_receita(user=self.user)
+
+        navegavel = self.client.get(RECEITAS_URL, HTTP_ACCEPT='text/html')
+        res = self.client.get(RECEITAS_URL, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(navegavel['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertNotEqual(res['ETag'], navegavel['ETag'])
+        with self.assertNumQueries(0):
+            res_cache = self.client.get(
+                RECEITAS_URL, HTTP_ACCEPT='application/json'
+            )
+        self.assertEqual(res_cache['ETag'], res['ETag'])
+
+    def test_cache_por_usuario(self):
+        """Testa se um usuário não recebe o cache de outro."""
+        create_receita(user=self.user)
+        self.client.get(RECEITAS_URL)
+
+        outro = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(outro)
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_criar_invalida_listagem(self):
+        """Testa se criar uma receita invalida a listagem em cache."""
+        self.client.get(RECEITAS_URL)
+        payload = {
+            'nome': 'Nova',
+            'tempo_preparo': 5,
+            'preco': Decimal('1.00'),
+        }
+
+        self.client.post(RECEITAS_URL, payload)
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_atualizar_invalida_detalhes(self):
+        """Testa se atualizar uma receita invalida os detalhes."""
+        receita = create_receita(user=self.user, nome='Antigo')
+        self.client.get(detalhes_url(receita.id))
+
+        self.client.patch(detalhes_url(receita.id), {'nome': 'Novo'})
+        res = self.client.get(detalhes_url(receita.id))
+
+        self.assertEqual(res.data['nome'], 'Novo')
+
+    def test_atualizar_so_atributos_invalida_detalhes(self):
+        """Testa a invalidação quando apenas as associações mudam."""
+        receita = create_receita(user=self.user)
+        self.client.get(detalhes_url(receita.id))
+
+        payload = {'categorias': [{'nome': 'Jantar'}]}
+        self.client.patch(detalhes_url(receita.id), payload, format='json')
+        res = self.client.get(detalhes_url(receita.id))
+
+        self.assertEqual(res.data['categorias'][0]['nome'], 'Jantar')
+
+    def test_excluir_invalida_listagem(self):
+        """Testa se excluir uma receita invalida a listagem."""
+        receita = create_receita(user=self.user)
+        self.client.get(RECEITAS_URL)
+
+        self.client.delete(detalhes_url(receita.id))
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_renomear_categoria_invalida_receitas(self):
+        """Testa se renomear uma categoria invalida as receitas."""
+        categoria = Categoria.objects.create(user=self.user, nome='Ceia')
+        receita = create_receita(user=self.user)
+        receita.categorias.add(categoria)
+        self.client.get(RECEITAS_URL)
+        self.client.get(CATEGORIAS_URL)
+
+        url = reverse('receita:categoria-detail', args=[categoria.id])
+        self.client.patch(url, {'nome': 'Jantar'})
+        receitas = self.client.get(RECEITAS_URL)
+        categorias = self.client.get(CATEGORIAS_URL)
+
+        nome = receitas.data['results'][0]['categorias'][0]['nome']
+        self.assertEqual(nome, 'Jantar')
+        self.assertEqual(categorias.data['results'][0]['nome'], 'Jantar')
+
+    def test_upload_imagem_invalida_detalhes(self):
+        """Testa se o upload de imagem invalida os detalhes."""
+        receita = create_receita(user=self.user)
+        self.client.get(detalhes_url(receita.id))
+        url = reverse('receita:receita-upload-imagem', args=[receita.id])
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as arq_imagem:
+            Image.new('RGB', (10, 10)).save(arq_imagem, format='JPEG')
+            arq_imagem.seek(0)
+            self.client.post(url, {'imagem': arq_imagem}, format='multipart')
+        res = self.client.get(detalhes_url(receita.id))
+
+        receita.refresh_from_db()
+        self.addCleanup(receita.imagem.delete)
+        self.assertIsNotNone(res.data['imagem'])
+        self.assertTrue(os.path.exists(receita.imagem.path))
+
+    def test_alteracao_fora_da_api_invalida_cache(self):
+        """Testa se escritas feitas pelo ORM invalidam o cache."""
+        receita = create_receita(user=self.user, nome='Antigo')
+        self.client.get(RECEITAS_URL)
+
+        receita.nome = 'Novo'
+        receita.save()
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.data['results'][0]['nome'], 'Novo')
+
+    def test_backend_em_arquivo(self):
+        """Testa o cache de respostas com um backend em arquivo."""
+        with tempfile.TemporaryDirectory() as diretorio:
+            backends = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': diretorio,
+            }}
+            with override_settings(CACHES=backends):
+                create_receita(user=self.user)
+                res = self.client.get(RECEITAS_URL)
+
+                with self.assertNumQueries(0):
+                    res_cache = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res_cache.data, res.data)
+
+    def test_versoes_em_cache_compartilhado(self):
+        """Testa a versão em um cache separado das respostas."""
+        backends = {
+            'default': {
+                'BACKEND': 'core.cache.LRUCache',
+                'LOCATION': 'respostas-teste',
+            },
+            'versoes': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'versoes-teste',
+            },
+        }
+        chave = f'receita:{self.user.id}:versao'
+        with override_settings(
+            CACHES=backends, API_CACHE_VERSOES_ALIAS='versoes',
+        ):
+            receita = create_receita(user=self.user, nome='Antigo')
+            self.client.get(RECEITAS_URL)
+            versao = caches['versoes'].get(chave)
+
+            # Uma escrita em outro processo incrementa a versão
+            # compartilhada e invalida as respostas deste.
+            caches['versoes'].incr(chave)
+            Receita.objects.filter(id=receita.id).update(nome='Novo')
+            res = self.client.get(RECEITAS_URL)
+
+            self.assertIsNotNone(versao)
+            self.assertIsNone(caches['default'].get(chave))
+        self.assertEqual(res.data['results'][0]['nome'], 'Novo')
+
+    @override_settings(API_CACHE_ATIVO=False)
+    def test_cache_desligado(self):
+        """Testa que sem o cache as leituras sempre consultam o banco."""
+        create_receita(user=self.user)
+        self.client.get(RECEITAS_URL)
+
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(consultas), 0)
@@ -60,7 +60,7 @@ class PrivateCategoriaTestes(TestCase):
         serializer = CategoriaSerializer(categorias, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, res.data)
+        self.assertEqual(serializer.data, res.data['results'])
 
     def test_categorias_privadas(self):
         """Testa se as categorias listadas são apenas do usuário logado."""
@@ -74,9 +74,9 @@ class PrivateCategoriaTestes(TestCase):
         res = self.client.get(CATEGORIAS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['nome'], categoria.nome)
-        self.assertEqual(res.data[0]['id'], categoria.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['nome'], categoria.nome)
+        self.assertEqual(res.data['results'][0]['id'], categoria.id)
 
     def test_atualizar_categoria(self):
         """Testa a atualização de categoria."""
@@ -90,6 +90,18 @@ class PrivateCategoriaTestes(TestCase):
         categoria.refresh_from_db()
         self.assertEqual(categoria.nome, payload['nome'])
 
+    def test_erro_atualizar_categoria_nome_existente(self):
+        """Testa renomear uma categoria para um nome já usado (erro)."""
+        Categoria.objects.create(user=self.user, nome='Jantar')
+        categoria = Categoria.objects.create(user=self.user, nome='Ceia')
+
+        url = detalhes_url(categoria.id)
+        res = self.client.put(url, {'nome': 'Jantar'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        categoria.refresh_from_db()
+        self.assertEqual(categoria.nome, 'Ceia')
+
     def test_excluir_categoria(self):
         """Testa excluir uma categoria."""
         categoria = Categoria.objects.create(user=self.user, nome='Salgado')
@@ -119,8 +131,8 @@ class PrivateCategoriaTestes(TestCase):
         s1 = CategoriaSerializer(cat1)
         s2 = CategoriaSerializer(cat2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtrar_categorias_unico(self):
         '''Testa se o filtro de categorias não retorna categorias repetidas.'''
@@ -144,4 +156,4 @@ class PrivateCategoriaTestes(TestCase):
 
         res = self.client.get(CATEGORIAS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
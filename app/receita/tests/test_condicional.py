@@ -0,0 +1,186 @@
+"""
+Testes para as requisições condicionais da API de Receitas.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+)
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+CATEGORIAS_URL = reverse('receita:categoria-list')
+
+
+def detalhes_url(id_receita):
+    """Cria e retorna a URL para a Receita."""
+    return reverse('receita:receita-detail', args=[id_receita])
+
+
+def create_receita(user, **params):
+    """Cria e retorna uma receita teste."""
+    defaults = {
+        'nome': 'Receita condicional',
+        'tempo_preparo': 10,
+        'preco': Decimal('5.00'),
+    }
+    defaults.update(params)
+
+    return Receita.objects.create(user=user, **defaults)
+
+
+class RequisicoesCondicionaisTestes(TestCase):
+    """Testa ETag, Last-Modified e respostas 304."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _etag(self, url, params=None):
+        """Faz um GET e retorna a ETag da resposta."""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res['ETag']
+
+    def test_listagem_com_etag(self):
+        """Testa se a listagem retorna ETag forte e Last-Modified."""
+        create_receita(user=self.user)
+
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', res)
+
+    def test_listagem_nao_modificada(self):
+        """Testa o 304 da listagem sem consultar as receitas."""
+        create_receita(user=self.user)
+        etag = self._etag(RECEITAS_URL)
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECEITAS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    @override_settings(API_CACHE_ATIVO=True)
+    def test_listagem_nao_modificada_do_cache(self):
+        """Testa o 304 da listagem em cache sem consultar o banco."""
+        create_receita(user=self.user)
+        etag = self._etag(RECEITAS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECEITAS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detalhes_nao_modificados(self):
+        """Testa o 304 dos detalhes de uma receita."""
+        receita = create_receita(user=self.user)
+        etag = self._etag(detalhes_url(receita.id))
+        cache.clear()
+
+        res = self.client.get(
+            detalhes_url(receita.id), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detalhes_inexistentes(self):
+        """Testa se receitas inexistentes continuam retornando 404."""
+        res = self.client.get(detalhes_url(999), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_atualizar_muda_etag(self):
+        """Testa se atualizar uma receita muda as ETags."""
+        receita = create_receita(user=self.user)
+        etag_lista = self._etag(RECEITAS_URL)
+        etag_detalhes = self._etag(detalhes_url(receita.id))
+
+        self.client.patch(detalhes_url(receita.id), {'nome': 'Nova'})
+
+        res = self.client.get(RECEITAS_URL, HTTP_IF_NONE_MATCH=etag_lista)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(
+            detalhes_url(receita.id), HTTP_IF_NONE_MATCH=etag_detalhes
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_atualizar_associacoes_muda_etag(self):
+        """Testa se mudar só as associações muda a ETag dos detalhes."""
+        receita = create_receita(user=self.user)
+        etag = self._etag(detalhes_url(receita.id))
+
+        payload = {'ingredientes': [{'nome': 'Sal'}]}
+        self.client.patch(detalhes_url(receita.id), payload, format='json')
+        cache.clear()
+
+        self.assertNotEqual(self._etag(detalhes_url(receita.id)), etag)
+
+    def test_renomear_categoria_muda_etag_receita(self):
+        """Testa se renomear uma categoria muda a ETag das receitas."""
+        categoria = Categoria.objects.create(user=self.user, nome='Ceia')
+        receita = create_receita(user=self.user)
+        receita.categorias.add(categoria)
+        etag = self._etag(detalhes_url(receita.id))
+
+        url = reverse('receita:categoria-detail', args=[categoria.id])
+        self.client.patch(url, {'nome': 'Jantar'})
+        cache.clear()
+
+        self.assertNotEqual(self._etag(detalhes_url(receita.id)), etag)
+
+    def test_excluir_categoria_muda_etag_receitas(self):
+        """Testa se excluir uma categoria muda a ETag da listagem."""
+        categoria = Categoria.objects.create(user=self.user, nome='Ceia')
+        receita = create_receita(user=self.user)
+        receita.categorias.add(categoria)
+        etag = self._etag(RECEITAS_URL)
+
+        url = reverse('receita:categoria-detail', args=[categoria.id])
+        self.client.delete(url)
+        cache.clear()
+
+        self.assertNotEqual(self._etag(RECEITAS_URL), etag)
+
+    def test_categorias_associadas_muda_etag(self):
+        """Testa a ETag de categorias associadas ao trocar associações."""
+        doce = Categoria.objects.create(user=self.user, nome='Doce')
+        Categoria.objects.create(user=self.user, nome='Salgado')
+        receita = create_receita(user=self.user)
+        receita.categorias.add(doce)
+        params = {'assigned_only': 1}
+        etag = self._etag(CATEGORIAS_URL, params)
+
+        payload = {'categorias': [{'nome': 'Salgado'}]}
+        self.client.patch(detalhes_url(receita.id), payload, format='json')
+        cache.clear()
+
+        self.assertNotEqual(self._etag(CATEGORIAS_URL, params), etag)
+
+    def test_etag_por_usuario(self):
+        """Testa se usuários diferentes não compartilham ETags."""
+        etag = self._etag(RECEITAS_URL)
+
+        outro = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(outro)
+
+        self.assertNotEqual(self._etag(RECEITAS_URL), etag)
@@ -0,0 +1,180 @@
+"""
+Testes para o processamento das imagens das receitas.
+"""
+from decimal import Decimal
+from io import BytesIO
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Receita
+from receita import imagens
+
+
+def imagem_upload_url(receita_id):
+    """Cria e retorna uma url de upload de imagem."""
+    return reverse('receita:receita-upload-imagem', args=[receita_id])
+
+
+def detalhes_url(receita_id):
+    """Cria e retorna a URL para a Receita."""
+    return reverse('receita:receita-detail', args=[receita_id])
+
+
+def criar_jpeg(tamanho=(2000, 1000)):
+    """Cria uma imagem JPEG com EXIF e retorna o arquivo enviado."""
+    exif = Image.Exif()
+    exif[0x010F] = 'Fabricante'
+    exif[0x0112] = 1
+    conteudo = BytesIO()
+    Image.new('RGB', tamanho, 'red').save(conteudo, 'JPEG', exif=exif)
+
+    return SimpleUploadedFile(
+        'foto.jpg', conteudo.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(IMAGENS_ASSINCRONO=False)
+class VariantesImagemTestes(TestCase):
+    """Testa a geração das variantes das imagens."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media)
+        self.media_override.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senha123'
+        )
+        self.client.force_authenticate(self.user)
+        self.receita = Receita.objects.create(
+            user=self.user,
+            nome='Receita com foto',
+            tempo_preparo=10,
+            preco=Decimal('5.00'),
+        )
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _upload(self):
+        """Envia uma imagem e executa o processamento agendado."""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                imagem_upload_url(self.receita.id),
+                {'imagem': criar_jpeg()},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.receita.refresh_from_db()
+        return res
+
+    def test_variantes_mudam_etag_da_listagem(self):
+        """Testa se gerar as variantes muda a ETag da listagem."""
+        url = reverse('receita:receita-list')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(
+                imagem_upload_url(self.receita.id),
+                {'imagem': criar_jpeg()},
+                format='multipart',
+            )
+        etag = self.client.get(url)['ETag']
+
+        for callback in callbacks:
+            callback()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_upload_gera_variantes(self):
+        """Testa se o upload gera as variantes nos tamanhos e formatos."""
+        res = self._upload()
+
+        self.assertEqual(res.data['imagens'], {})
+        variantes = self.receita.imagem_variantes
+        self.assertEqual(set(variantes), set(imagens.TAMANHOS))
+        for variante, tamanho in imagens.TAMANHOS.items():
+            self.assertEqual(set(variantes[variante]), set(imagens.FORMATOS))
+            for nome in variantes[variante].values():
+                with default_storage.open(nome) as arquivo:
+                    imagem = Image.open(arquivo)
+                    self.assertEqual(max(imagem.size), tamanho)
+                    self.assertEqual(len(imagem.getexif()), 0)
+
+    def test_detalhes_com_urls_das_variantes(self):
+        """Testa se os detalhes da receita trazem as URLs das variantes."""
+        self._upload()
+
+        res = self.client.get(detalhes_url(self.receita.id))
+
+        miniatura = res.data['imagens']['miniatura']
+        self.assertTrue(miniatura['webp'].startswith('http://testserver/'))
+        self.assertIn('/uploads/receita/variantes/', miniatura['webp'])
+        self.assertTrue(miniatura['webp'].endswith('.webp'))
+        self.assertTrue(miniatura['jpg'].endswith('.jpg'))
+
+    def test_novo_upload_descarta_variantes(self):
+        """Testa se um novo upload limpa as variantes da imagem anterior."""
+        self._upload()
+
+        res = self.client.post(
+            imagem_upload_url(self.receita.id),
+            {'imagem': criar_jpeg()},
+            format='multipart',
+        )
+
+        self.assertEqual(res.data['imagens'], {})
+        self.receita.refresh_from_db()
+        self.assertEqual(self.receita.imagem_variantes, {})
+
+    def test_imagem_trocada_durante_processamento(self):
+        """Testa se variantes de uma imagem substituída são descartadas."""
+        self._upload()
+        Receita.objects.filter(pk=self.receita.pk).update(imagem_variantes={})
+        abrir = imagens._abrir
+
+        def trocar_imagem(arquivo):
+            Receita.objects.filter(pk=self.receita.pk).update(
+                imagem='uploads/receita/outra.jpg'
+            )
+            return abrir(arquivo)
+
+        with patch('receita.imagens._abrir', side_effect=trocar_imagem):
+            imagens.gerar_variantes(self.receita.id)
+
+        self.receita.refresh_from_db()
+        self.assertEqual(self.receita.imagem_variantes, {})
+
+    @override_settings(IMAGENS_ASSINCRONO=True)
+    @patch('receita.imagens._get_executor')
+    def test_processamento_em_segundo_plano(self, mock_executor):
+        """Testa se o processamento é enviado ao pool após o commit."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.post(
+                imagem_upload_url(self.receita.id),
+                {'imagem': criar_jpeg()},
+                format='multipart',
+            )
+        mock_executor.return_value.submit.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        mock_executor.return_value.submit.assert_called_once_with(
+            imagens._processar, self.receita.id
+        )
@@ -0,0 +1,188 @@
+"""
+Testes dos planos de execução das consultas da API de Receitas.
+
+Verifica com EXPLAIN que as consultas mais frequentes usam índices em
+vez de varrer as tabelas. Roda contra o banco configurado: no
+PostgreSQL as varreduras sequenciais são desabilitadas na transação do
+teste para que o planejador escolha um índice sempre que existir um
+utilizável, mesmo com tabelas pequenas.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import (
+    Receita,
+    Categoria,
+    Ingrediente,
+)
+from receita import views
+
+
+class PlanoConsultaMixin:
+    """Asserções sobre o plano de execução de um queryset."""
+
+    def _plano(self, queryset):
+        """Retorna o plano de execução do queryset."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        elif connection.vendor != 'sqlite':
+            self.skipTest(f'EXPLAIN não suportado em {connection.vendor}')
+
+        return queryset.explain()
+
+    def assertUsaIndice(self, queryset, tabela, indice=None,
+                        ordenado=False):
+        """Verifica se a tabela é lida por índice, sem varredura.
+
+        Com ordenado, verifica também que a ordenação vem do índice.
+        """
+        plano = self._plano(queryset)
+        mensagem = f'\n{queryset.query}\n{plano}'
+
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f'Seq Scan on {tabela}', plano, mensagem)
+            self.assertRegex(
+                plano,
+                rf'Index (Only )?Scan (Backward )?using \w+ on {tabela}\b'
+                rf'|Bitmap Index Scan on \w+',
+                mensagem,
+            )
+            if ordenado:
+                self.assertNotRegex(plano, r'\bSort\b', mensagem)
+        else:
+            # O SQLite identifica tabelas de subconsultas pelo alias.
+            sql = str(queryset.query)
+            nomes = '|'.join(
+                [tabela] + re.findall(rf'"{tabela}" (\w+)', sql)
+            )
+            self.assertIsNone(
+                re.search(rf'\bSCAN ({nomes})\b', plano), mensagem
+            )
+            self.assertRegex(plano, rf'SEARCH ({nomes}) USING', mensagem)
+            if ordenado:
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', plano, mensagem)
+
+        if indice:
+            self.assertIn(indice, plano, mensagem)
+
+
+class IndicesTestes(PlanoConsultaMixin, TestCase):
+    """Testa o uso de índices nas consultas das views."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+
+    def _queryset_da_view(self, view_class, params=None):
+        """Retorna o queryset de listagem montado pela view."""
+        request = Request(APIRequestFactory().get('/', params or {}))
+        request.user = self.user
+        view = view_class(request=request, action='list', kwargs={})
+
+        return view.get_queryset()
+
+    def test_listagem_receitas(self):
+        """Testa a listagem de receitas do usuário ordenada por id."""
+        queryset = self._queryset_da_view(views.ReceitaViewSet)
+
+        self.assertUsaIndice(
+            queryset,
+            'core_receita',
+            indice='receita_user_id_idx',
+            ordenado=True,
+        )
+
+    def test_filtro_receitas_por_categoria(self):
+        """Testa o filtro de receitas por categorias."""
+        queryset = self._queryset_da_view(
+            views.ReceitaViewSet, {'categorias': '1,2'}
+        )
+
+        self.assertUsaIndice(queryset, 'core_receita')
+        self.assertUsaIndice(queryset, 'core_receita_categorias')
+
+    def test_filtro_receitas_por_ingrediente(self):
+        """Testa o filtro de receitas por ingredientes."""
+        queryset = self._queryset_da_view(
+            views.ReceitaViewSet, {'ingredientes': '1,2'}
+        )
+
+        self.assertUsaIndice(queryset, 'core_receita_ingredientes')
+
+    def test_filtro_todos_ingredientes(self):
+        """Testa o filtro de receitas com todos os ingredientes."""
+        queryset = self._queryset_da_view(
+            views.ReceitaViewSet, {'ingredientes': '1,2', 'match': 'all'}
+        )
+
+        self.assertUsaIndice(
+            queryset,
+            'core_receita_ingredientes',
+            indice='receita_ingredientes_ingrediente_idx',
+        )
+
+    def test_filtro_despensa(self):
+        """Testa o filtro de receitas pelos ingredientes da despensa."""
+        queryset = self._queryset_da_view(
+            views.ReceitaViewSet, {'despensa': '1,2'}
+        )
+
+        self.assertUsaIndice(queryset, 'core_receita')
+        self.assertUsaIndice(queryset, 'core_receita_ingredientes')
+
+    def test_busca_receitas(self):
+        """Testa a busca textual nas receitas do usuário."""
+        queryset = self._queryset_da_view(
+            views.ReceitaViewSet, {'q': 'bolo'}
+        )
+        indice = None
+        if connection.vendor == 'postgresql':
+            indice = 'receita_busca_idx'
+
+        # Sem busca textual, lê apenas as receitas do usuário.
+        self.assertUsaIndice(queryset, 'core_receita', indice=indice)
+
+    def test_associacoes_por_atributo(self):
+        """Testa a busca de receitas a partir de um atributo."""
+        queryset = Receita.categorias.through.objects.filter(
+            categoria_id__in=[1, 2]
+        ).values('receita_id')
+
+        self.assertUsaIndice(
+            queryset,
+            'core_receita_categorias',
+            indice='receita_categorias_categoria_idx',
+        )
+
+    def test_listagem_categorias(self):
+        """Testa a listagem de categorias ordenada por nome."""
+        queryset = self._queryset_da_view(views.CategoriaViewSet)
+
+        self.assertUsaIndice(queryset, 'core_categoria', ordenado=True)
+
+    def test_listagem_ingredientes_associados(self):
+        """Testa a listagem de ingredientes associados a receitas."""
+        queryset = self._queryset_da_view(
+            views.IngredienteViewSet, {'assigned_only': 1}
+        )
+
+        self.assertUsaIndice(queryset, 'core_ingrediente')
+
+    def test_busca_atributos_por_nome(self):
+        """Testa a busca em lote de atributos por (user, nome)."""
+        for model in (Categoria, Ingrediente):
+            queryset = model.objects.filter(
+                user=self.user,
+                nome__in=['Sal', 'Alho'],
+            )
+
+            self.assertUsaIndice(queryset, model._meta.db_table)
@@ -66,7 +66,7 @@ class PrivateIngredienteTestes(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         ingredientes = Ingrediente.objects.all().order_by('-nome')
         serializer = IngredienteSerializer(ingredientes, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredientes_privados(self):
         """Testa se os ingredientes de outro usuário são ocultados."""
@@ -86,9 +86,9 @@ class PrivateIngredienteTestes(TestCase):
         res = self.client.get(INGREDIENTES_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['nome'], ing.nome)
-        self.assertEqual(res.data[0]['id'], ing.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['nome'], ing.nome)
+        self.assertEqual(res.data['results'][0]['id'], ing.id)
 
     def test_atualizar_ingrediente(self):
         """Testa a atualização de ingrediente."""
@@ -126,8 +126,8 @@ class PrivateIngredienteTestes(TestCase):
 
         s1 = IngredienteSerializer(ing1)
         s2 = IngredienteSerializer(ing2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtro_ingredientes_unique(self):
         '''Testa se o filtro de ingredientes não retorna ingredientes repetidos.'''
@@ -149,5 +149,5 @@ class PrivateIngredienteTestes(TestCase):
 
         res = self.client.get(INGREDIENTES_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
 
@@ -0,0 +1,190 @@
+"""
+Testes para os serializers de leitura rápida das receitas.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+)
+
+from core.models import (
+    Receita,
+    Categoria,
+    Ingrediente,
+)
+from receita import views
+from receita.serializers import (
+    ReceitaSerializer,
+    DetalhesReceitaSerializer,
+    LeituraReceitaSerializer,
+    LeituraDetalhesReceitaSerializer,
+)
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+
+
+def detalhes_url(receita_id):
+    """Cria e retorna a URL de detalhes de uma receita."""
+    return reverse('receita:receita-detail', args=[receita_id])
+
+
+class LeituraSerializerTestes(TestCase):
+    """Testa se a leitura rápida produz a mesma saída dos serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.request = Request(APIRequestFactory().get('/'))
+        doce = Categoria.objects.create(user=self.user, nome='Doce')
+        rapida = Categoria.objects.create(user=self.user, nome='Rápida')
+        ovo = Ingrediente.objects.create(user=self.user, nome='Ovo')
+
+        completa = Receita.objects.create(
+            user=self.user,
+            nome='Bolo "especial"',
+            descricao='Com acentuação: pão, maçã\ne quebra de linha',
+            tempo_preparo=45,
+            preco=Decimal('12.5'),
+            link='https://example.com/bolo',
+            imagem='uploads/receita/ab/cd/abcd.png',
+            imagem_variantes={
+                'miniatura': {'webp': 'uploads/receita/variantes/m.webp'},
+            },
+        )
+        # Associadas fora da ordem de id.
+        completa.categorias.add(rapida)
+        completa.categorias.add(doce)
+        completa.ingredientes.add(ovo)
+        Receita.objects.create(
+            user=self.user,
+            nome='Sem nada',
+            tempo_preparo=1,
+            preco=Decimal('0.10'),
+        )
+
+    def _renderizar(self, serializer_class, receitas):
+        """Renderiza as receitas em JSON com o serializer."""
+        serializer = serializer_class(
+            receitas, many=True, context={'request': self.request}
+        )
+
+        return JSONRenderer().render(serializer.data)
+
+    def _comparar(self, serializer_class, leitura_class):
+        """Compara a saída do serializer com a da leitura rápida."""
+        receitas = Receita.objects.order_by('-id')
+        instancias = receitas.prefetch_related(
+            Prefetch('categorias', Categoria.objects.order_by('id')),
+            Prefetch('ingredientes', Ingrediente.objects.order_by('id')),
+        )
+        linhas = receitas.values(*leitura_class.campos_consulta())
+
+        self.assertEqual(
+            self._renderizar(leitura_class, linhas),
+            self._renderizar(serializer_class, instancias),
+        )
+
+    def test_listagem_identica(self):
+        """Testa a saída da listagem byte a byte."""
+        self._comparar(ReceitaSerializer, LeituraReceitaSerializer)
+
+    def test_detalhes_identicos(self):
+        """Testa a saída dos detalhes byte a byte."""
+        self._comparar(
+            DetalhesReceitaSerializer, LeituraDetalhesReceitaSerializer
+        )
+
+    def test_campos_consulta(self):
+        """Testa se apenas as colunas necessárias são lidas."""
+        self.assertEqual(
+            LeituraDetalhesReceitaSerializer.campos_consulta(),
+            ('id', 'nome', 'tempo_preparo', 'preco', 'link', 'descricao',
+             'imagem', 'imagem_variantes'),
+        )
+
+    def test_instancias_seguem_caminho_normal(self):
+        """Testa se instâncias de models ainda são aceitas."""
+        receita = Receita.objects.get(nome='Sem nada')
+
+        dados = LeituraDetalhesReceitaSerializer(
+            receita, context={'request': self.request}
+        ).data
+
+        self.assertEqual(
+            dados,
+            DetalhesReceitaSerializer(
+                receita, context={'request': self.request}
+            ).data,
+        )
+
+
+class LeituraViewTestes(TestCase):
+    """Testa a escolha da leitura rápida pelas views."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+        self.receita = Receita.objects.create(
+            user=self.user,
+            nome='Frango assado',
+            tempo_preparo=60,
+            preco=Decimal('30.00'),
+        )
+        self.receita.categorias.add(
+            Categoria.objects.create(user=self.user, nome='Jantar')
+        )
+
+    def test_view_desativa_leitura_rapida(self):
+        """Testa se uma view sem leitura rápida responde igual."""
+        class ReceitaModelViewSet(views.ReceitaViewSet):
+            serializers_leitura = {}
+
+        rapida = views.ReceitaViewSet.as_view({'get': 'retrieve'})
+        normal = ReceitaModelViewSet.as_view({'get': 'retrieve'})
+        request = APIRequestFactory().get(detalhes_url(self.receita.id))
+        request.user = self.user
+
+        respostas = []
+        for view in (rapida, normal):
+            res = view(request, pk=self.receita.id)
+            res.render()
+            respostas.append(res.content)
+
+        self.assertEqual(respostas[0], respostas[1])
+
+    def test_busca_com_leitura_rapida(self):
+        """Testa a paginação da busca com as receitas lidas por values()."""
+        Receita.objects.create(
+            user=self.user,
+            nome='Frango frito',
+            tempo_preparo=20,
+            preco=Decimal('15.00'),
+        )
+
+        res = self.client.get(RECEITAS_URL, {'q': 'frango', 'page_size': 1})
+        seguinte = self.client.get(res.data['next'])
+
+        nomes = [
+            receita['nome']
+            for pagina in (res, seguinte)
+            for receita in pagina.data['results']
+        ]
+        self.assertEqual(
+            sorted(nomes), ['Frango assado', 'Frango frito']
+        )
+        self.assertNotIn('rank', res.data['results'][0])
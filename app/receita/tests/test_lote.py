@@ -0,0 +1,215 @@
+"""
+Testes para o lote de operações sobre receitas.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+)
+from core.testing import OrcamentoMixin
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+LOTE_URL = reverse('receita:receita-lote')
+
+# Consultas de um lote de atualizações e remoções, qualquer que seja
+# o seu tamanho.
+CONSULTAS_LOTE = 23
+
+
+def create_receita(user, **params):
+    """Cria e retorna uma receita teste."""
+    defaults = {
+        'nome': 'Receita do lote',
+        'tempo_preparo': 10,
+        'preco': Decimal('5.00'),
+    }
+    defaults.update(params)
+
+    return Receita.objects.create(user=user, **defaults)
+
+
+class LoteReceitasTestes(OrcamentoMixin, TestCase):
+    """Testa o endpoint de lote de receitas."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _lote(self, *operacoes):
+        """Envia as operações ao endpoint de lote."""
+        return self.client.post(
+            LOTE_URL, {'operacoes': list(operacoes)}, format='json'
+        )
+
+    def test_lote_de_operacoes(self):
+        """Testa um lote com criação, atualização e remoção."""
+        atualizada = create_receita(user=self.user, nome='Antiga')
+        removida = create_receita(user=self.user)
+
+        res = self._lote(
+            {
+                'op': 'create',
+                'dados': {
+                    'nome': 'Nova',
+                    'tempo_preparo': 5,
+                    'preco': '2.50',
+                    'categorias': [{'nome': 'Doce'}],
+                },
+            },
+            {
+                'op': 'update',
+                'id': atualizada.id,
+                'dados': {
+                    'nome': 'Atualizada',
+                    'categorias': [{'nome': 'Doce'}],
+                },
+            },
+            {'op': 'delete', 'id': removida.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        resultados = res.data['resultados']
+        self.assertEqual([r['status'] for r in resultados], [201, 200, 204])
+        nova = Receita.objects.get(id=resultados[0]['id'])
+        self.assertEqual(nova.nome, 'Nova')
+        self.assertEqual(resultados[0]['dados']['nome'], 'Nova')
+        atualizada.refresh_from_db()
+        self.assertEqual(atualizada.nome, 'Atualizada')
+        self.assertEqual(
+            resultados[1]['dados']['categorias'][0]['nome'], 'Doce'
+        )
+        self.assertFalse(Receita.objects.filter(id=removida.id).exists())
+        self.assertEqual(Categoria.objects.filter(user=self.user).count(), 1)
+
+    def test_lote_com_erro_nao_grava_nada(self):
+        """Testa se um item inválido impede todas as operações."""
+        receita = create_receita(user=self.user, nome='Original')
+        outro_user = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        de_outro = create_receita(user=outro_user)
+
+        res = self._lote(
+            {'op': 'update', 'id': receita.id, 'dados': {'nome': 'Mudou'}},
+            {'op': 'create', 'dados': {'nome': 'Sem preço'}},
+            {'op': 'delete', 'id': de_outro.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        resultados = res.data['resultados']
+        self.assertEqual([r['status'] for r in resultados], [424, 400, 400])
+        self.assertIn('preco', resultados[1]['erros'])
+        self.assertIn('id', resultados[2]['erros'])
+        receita.refresh_from_db()
+        self.assertEqual(receita.nome, 'Original')
+        self.assertTrue(Receita.objects.filter(id=de_outro.id).exists())
+
+    def test_lote_receita_repetida(self):
+        """Testa a recusa de duas operações sobre a mesma receita."""
+        receita = create_receita(user=self.user)
+
+        res = self._lote(
+            {'op': 'update', 'id': receita.id, 'dados': {'nome': 'A'}},
+            {'op': 'delete', 'id': receita.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['resultados'][1]['erros'])
+
+    def test_lote_operacao_sem_id(self):
+        """Testa a validação do formato das operações."""
+        res = self._lote({'op': 'delete'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('operacoes', res.data)
+
+    @override_settings(API_LOTE_MAX_OPERACOES=2)
+    def test_lote_limite_de_operacoes(self):
+        """Testa o limite de operações por lote."""
+        res = self._lote(*[{'op': 'delete', 'id': i} for i in range(3)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('operacoes', res.data)
+
+    def test_lote_atualiza_modificado(self):
+        """Testa se o lote atualiza a data de modificação e o cache."""
+        receita = create_receita(user=self.user)
+        modificado = receita.modificado
+        self.client.get(RECEITAS_URL)
+
+        self._lote(
+            {'op': 'update', 'id': receita.id, 'dados': {'nome': 'Novo'}},
+        )
+
+        receita.refresh_from_db()
+        self.assertGreater(receita.modificado, modificado)
+        res = self.client.get(RECEITAS_URL)
+        self.assertEqual(res.data['results'][0]['nome'], 'Novo')
+
+    def test_lote_sem_alteracao_nao_grava(self):
+        """Testa se uma atualização sem mudanças não grava a receita."""
+        receita = create_receita(user=self.user, nome='Igual')
+
+        with CaptureQueriesContext(connection) as consultas:
+            self._lote({
+                'op': 'update', 'id': receita.id, 'dados': {'nome': 'Igual'},
+            })
+
+        updates = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(updates, [])
+
+    def _operacoes_atualizacoes(self, quantidade):
+        """Cria receitas e retorna um lote que atualiza e remove."""
+        operacoes = []
+        for i in range(quantidade):
+            receita = create_receita(user=self.user)
+            operacoes.append({
+                'op': 'update',
+                'id': receita.id,
+                'dados': {
+                    'nome': f'Receita {i}',
+                    'ingredientes': [{'nome': f'Ingrediente {i}'}],
+                },
+            })
+            removida = create_receita(user=self.user)
+            operacoes.append({'op': 'delete', 'id': removida.id})
+
+        return operacoes
+
+    def test_consultas_constantes(self):
+        """Testa se as consultas não crescem com o tamanho do lote."""
+        operacoes = []
+
+        def preparar(quantidade):
+            operacoes[:] = self._operacoes_atualizacoes(quantidade)
+
+        def executar(quantidade):
+            res = self._lote(*operacoes)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEscala(
+            preparar,
+            executar,
+            tamanhos=(5, 20),
+            consultas=CONSULTAS_LOTE,
+            tempo_ms=lambda n: 300 + 20 * n,
+        )
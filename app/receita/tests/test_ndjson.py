@@ -0,0 +1,217 @@
+"""
+Testes para a importação e exportação de receitas em JSON Lines.
+"""
+from decimal import Decimal
+from io import StringIO
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+    Ingrediente,
+)
+from receita.ndjson import (
+    MEDIA_TYPE,
+    importar_receitas,
+)
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+IMPORTAR_URL = reverse('receita:receita-importar')
+EXPORTAR_URL = reverse('receita:receita-exportar')
+
+
+def linha(**dados):
+    """Retorna uma receita como linha NDJSON."""
+    receita = {
+        'nome': 'Receita importada',
+        'tempo_preparo': 10,
+        'preco': '5.50',
+    }
+    receita.update(dados)
+
+    return json.dumps(receita)
+
+
+class NDJSONTestes(TestCase):
+    """Testa a importação e a exportação em NDJSON."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _importar(self, *linhas):
+        """Envia as linhas ao endpoint de importação."""
+        return self.client.post(
+            IMPORTAR_URL,
+            '\n'.join(linhas) + '\n',
+            content_type=MEDIA_TYPE,
+        )
+
+    def _exportar(self):
+        """Retorna as receitas exportadas pelo endpoint."""
+        res = self.client.get(EXPORTAR_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], MEDIA_TYPE)
+        return [
+            json.loads(linha)
+            for linha in b''.join(res.streaming_content).splitlines()
+        ]
+
+    def test_importar_receitas(self):
+        """Testa a importação de receitas com atributos compartilhados."""
+        res = self._importar(
+            linha(
+                nome='Bolo',
+                descricao='Bolo simples',
+                categorias=[{'nome': 'Doce'}],
+                ingredientes=[{'nome': 'Ovo'}, {'nome': 'Farinha'}],
+            ),
+            linha(nome='Omelete', ingredientes=[{'nome': 'Ovo'}]),
+            '',
+            linha(nome='Pudim', categorias=[{'nome': 'Doce'}]),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'criadas': 3, 'erros': []})
+        bolo = Receita.objects.get(user=self.user, nome='Bolo')
+        self.assertEqual(bolo.descricao, 'Bolo simples')
+        self.assertEqual(
+            sorted(bolo.ingredientes.values_list('nome', flat=True)),
+            ['Farinha', 'Ovo'],
+        )
+        self.assertEqual(Categoria.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Ingrediente.objects.filter(user=self.user).count(), 2)
+
+    def test_importar_com_erros_por_linha(self):
+        """Testa se as linhas inválidas são relatadas sem afetar as demais."""
+        res = self._importar(
+            linha(nome='Válida'),
+            '{"nome": "sem fim"',
+            linha(nome='Sem preço', preco='abc'),
+            '[1, 2]',
+            linha(nome='Outra válida'),
+        )
+
+        self.assertEqual(res.data['criadas'], 2)
+        erros = {erro['linha']: erro['erros'] for erro in res.data['erros']}
+        self.assertEqual(set(erros), {2, 3, 4})
+        self.assertIn('preco', erros[3])
+        self.assertEqual(
+            set(Receita.objects.values_list('nome', flat=True)),
+            {'Válida', 'Outra válida'},
+        )
+
+    def test_importar_em_lotes(self):
+        """Testa se um lote com falha não impede os outros."""
+        linhas = [linha(nome=f'Receita {i}') for i in range(5)]
+        criar = 'receita.lote.criar_receitas'
+
+        with patch(criar, side_effect=[None, DatabaseError, None]) as mock:
+            relatorio = importar_receitas(self.user, linhas, tamanho_lote=2)
+
+        self.assertEqual(mock.call_count, 3)
+        self.assertEqual(relatorio['criadas'], 3)
+        self.assertEqual(
+            [erro['linha'] for erro in relatorio['erros']], [3, 4]
+        )
+
+    def test_importar_invalida_cache(self):
+        """Testa se as receitas importadas aparecem na listagem."""
+        self.client.get(RECEITAS_URL)
+
+        self._importar(linha(nome='Nova'))
+        res = self.client.get(RECEITAS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_exportar_receitas(self):
+        """Testa a exportação das receitas do usuário com os atributos."""
+        receita = Receita.objects.create(
+            user=self.user,
+            nome='Bolo',
+            tempo_preparo=30,
+            preco=Decimal('12.50'),
+        )
+        doce = Categoria.objects.create(user=self.user, nome='Doce')
+        receita.categorias.add(doce)
+        outro_user = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        Receita.objects.create(
+            user=outro_user,
+            nome='De outro',
+            tempo_preparo=5,
+            preco=Decimal('1.00'),
+        )
+
+        exportadas = self._exportar()
+
+        self.assertEqual(exportadas, [{
+            'id': receita.id,
+            'nome': 'Bolo',
+            'descricao': '',
+            'tempo_preparo': 30,
+            'preco': '12.50',
+            'link': '',
+            'categorias': [{'id': doce.id, 'nome': 'Doce'}],
+            'ingredientes': [],
+        }])
+
+    def test_exportar_e_importar(self):
+        """Testa se a exportação pode ser importada por outro usuário."""
+        self._importar(
+            linha(nome='Bolo', categorias=[{'nome': 'Doce'}]),
+            linha(nome='Sopa', ingredientes=[{'nome': 'Batata'}]),
+        )
+        linhas = [json.dumps(receita) for receita in self._exportar()]
+        outro_user = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+
+        relatorio = importar_receitas(outro_user, linhas)
+
+        self.assertEqual(relatorio['criadas'], 2)
+        sopa = Receita.objects.get(user=outro_user, nome='Sopa')
+        self.assertEqual(sopa.ingredientes.get().user, outro_user)
+
+    def test_comandos_importar_e_exportar(self):
+        """Testa os comandos de importação e exportação por arquivo."""
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        entrada = os.path.join(pasta, 'entrada.ndjson')
+        saida = os.path.join(pasta, 'saida.ndjson')
+        with open(entrada, 'w') as arquivo:
+            arquivo.write(linha(nome='Bolo') + '\n' + 'invalida\n')
+
+        mensagens = StringIO()
+        call_command(
+            'importar_receitas', self.user.email, entrada,
+            stdout=mensagens, stderr=StringIO(),
+        )
+        call_command('exportar_receitas', self.user.email, saida)
+
+        self.assertIn('1 receitas importadas', mensagens.getvalue())
+        with open(saida) as arquivo:
+            exportadas = [json.loads(linha) for linha in arquivo]
+        self.assertEqual([r['nome'] for r in exportadas], ['Bolo'])
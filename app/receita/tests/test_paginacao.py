@@ -0,0 +1,145 @@
+"""
+Testes para a paginação por cursor da API de Receitas.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Receita,
+    Categoria,
+)
+from receita.pagination import ReceitaCursorPagination
+
+
+RECEITAS_URL = reverse('receita:receita-list')
+CATEGORIAS_URL = reverse('receita:categoria-list')
+
+
+def create_receita(user, **params):
+    """Cria e retorna uma receita teste."""
+    defaults = {
+        'nome': 'Receita paginada',
+        'tempo_preparo': 10,
+        'preco': Decimal('5.00'),
+    }
+    defaults.update(params)
+
+    return Receita.objects.create(user=user, **defaults)
+
+
+class PaginacaoTestes(TestCase):
+    """Testa a paginação das listagens."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _percorrer(self, url, params):
+        """Segue os cursores e retorna todos os resultados."""
+        resultados = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            resultados.extend(res.data['results'])
+            if not res.data['next']:
+                return resultados
+            res = self.client.get(res.data['next'])
+
+    def test_pagina_de_receitas(self):
+        """Testa se a listagem respeita o tamanho da página."""
+        for i in range(5):
+            create_receita(user=self.user, nome=f'Receita {i}')
+
+        res = self.client.get(RECEITAS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_percorrer_receitas(self):
+        """Testa se os cursores percorrem todas as receitas em ordem."""
+        receitas = [create_receita(user=self.user) for _ in range(7)]
+
+        resultados = self._percorrer(RECEITAS_URL, {'page_size': 3})
+
+        ids = [receita.id for receita in reversed(receitas)]
+        self.assertEqual([r['id'] for r in resultados], ids)
+
+    @patch.object(ReceitaCursorPagination, 'max_page_size', 2)
+    def test_limite_page_size(self):
+        """Testa se o page_size é limitado pelo máximo configurado."""
+        for _ in range(4):
+            create_receita(user=self.user)
+
+        res = self.client.get(RECEITAS_URL, {'page_size': 100})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_paginacao_com_filtro(self):
+        """Testa se o cursor mantém os filtros da listagem."""
+        categoria = Categoria.objects.create(user=self.user, nome='Doce')
+        esperadas = []
+        for i in range(5):
+            receita = create_receita(user=self.user)
+            if i % 2 == 0:
+                receita.categorias.add(categoria)
+                esperadas.append(receita.id)
+
+        params = {'categorias': str(categoria.id), 'page_size': 1}
+        res = self.client.get(RECEITAS_URL, params)
+        self.assertIn(f'categorias={categoria.id}', res.data['next'])
+        resultados = self._percorrer(RECEITAS_URL, params)
+
+        self.assertEqual(
+            sorted(r['id'] for r in resultados),
+            sorted(esperadas),
+        )
+
+    def test_percorrer_busca(self):
+        """Testa se os cursores percorrem a busca pela relevância."""
+        no_nome = [
+            create_receita(user=self.user, nome=f'Bolo de milho {i}')
+            for i in range(3)
+        ]
+        na_descricao = [
+            create_receita(
+                user=self.user,
+                nome=f'Pamonha {i}',
+                descricao='Parecida com bolo de milho',
+            )
+            for i in range(3)
+        ]
+        create_receita(user=self.user, nome='Cuscuz')
+
+        resultados = self._percorrer(
+            RECEITAS_URL, {'q': 'bolo', 'page_size': 2}
+        )
+
+        ids = [receita.id for receita in reversed(no_nome)]
+        ids += [receita.id for receita in reversed(na_descricao)]
+        self.assertEqual([r['id'] for r in resultados], ids)
+
+    def test_percorrer_categorias(self):
+        """Testa a paginação de categorias por nome."""
+        for nome in ['Bolo', 'Assado', 'Caldo', 'Doce', 'Entrada']:
+            Categoria.objects.create(user=self.user, nome=nome)
+
+        resultados = self._percorrer(CATEGORIAS_URL, {'page_size': 2})
+
+        esperadas = Categoria.objects.order_by('-nome', 'id')
+        self.assertEqual(
+            [r['id'] for r in resultados],
+            [c.id for c in esperadas],
+        )
@@ -8,7 +8,9 @@ import os
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -19,6 +21,7 @@ from core.models import (
     Categoria,
     Ingrediente,
 )
+from core.testing import OrcamentoMixin
 from receita.serializers import (
     ReceitaSerializer,
     DetalhesReceitaSerializer,
@@ -27,6 +30,12 @@ from receita.serializers import (
 
 RECEITAS_URL = reverse('receita:receita-list')
 
+# Orçamentos de consultas das requisições, independentes da quantidade
+# de receitas e de atributos.
+CONSULTAS_LISTAGEM = 4
+CONSULTAS_DETALHES = 4
+CONSULTAS_CRIACAO = 19
+
 
 def detalhes_url(id_receita):
     """Cria e retorna a URL para a Receita."""
@@ -69,7 +78,7 @@ class PublicReceitaTestes(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateReceitaTestes(TestCase):
+class PrivateReceitaTestes(OrcamentoMixin, TestCase):
     """Testa funcionalidades de Receita com autenticação."""
 
     def setUp(self):
@@ -90,7 +99,18 @@ class PrivateReceitaTestes(TestCase):
         receitas = Receita.objects.all().order_by('-id')
         serializer = ReceitaSerializer(receitas, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_api_navegavel(self):
+        """Testa a listagem e os detalhes na API navegável."""
+        receita = create_receita(user=self.user)
+        receita.categorias.create(user=self.user, nome='Doce')
+
+        for url in (RECEITAS_URL, detalhes_url(receita.id)):
+            res = self.client.get(url, {'format': 'api'})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertContains(res, receita.nome)
 
     def test_retrieve_receitas_user_auth(self):
         """Testa a requisição de receitas apenas do usuário cadastrado."""
@@ -107,7 +127,7 @@ class PrivateReceitaTestes(TestCase):
         serializer = ReceitaSerializer(receitas, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_detalhes_receita(self):
         """Testa coletar detalhes de uma receita."""
@@ -451,9 +471,9 @@ class PrivateReceitaTestes(TestCase):
         s2 = ReceitaSerializer(r2)
         s3 = ReceitaSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filtro_por_ingredientes(self):
         '''Testa a filtragem de receitas por ingredientes.'''
@@ -473,9 +493,296 @@ class PrivateReceitaTestes(TestCase):
         s2 = ReceitaSerializer(r2)
         s3 = ReceitaSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filtro_todos_ingredientes(self):
+        '''Testa o filtro de receitas com todos os ingredientes.'''
+        r1 = create_receita(user=self.user, nome='Omelete')
+        r2 = create_receita(user=self.user, nome='Ovo cozido')
+        r3 = create_receita(user=self.user, nome='Queijo quente')
+
+        ovo = Ingrediente.objects.create(user=self.user, nome='Ovo')
+        queijo = Ingrediente.objects.create(user=self.user, nome='Queijo')
+        sal = Ingrediente.objects.create(user=self.user, nome='Sal')
+        r1.ingredientes.add(ovo, queijo, sal)
+        r2.ingredientes.add(ovo, sal)
+        r3.ingredientes.add(queijo)
+
+        params = {
+            'ingredientes': f'{ovo.id},{queijo.id},{ovo.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECEITAS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [receita['id'] for receita in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filtro_todas_categorias_e_ingredientes(self):
+        '''Testa o filtro "all" combinando categorias e ingredientes.'''
+        r1 = create_receita(user=self.user, nome='Salada de frutas')
+        r2 = create_receita(user=self.user, nome='Vitamina')
+
+        doce = Categoria.objects.create(user=self.user, nome='Doce')
+        rapida = Categoria.objects.create(user=self.user, nome='Rápida')
+        banana = Ingrediente.objects.create(user=self.user, nome='Banana')
+        r1.categorias.add(doce, rapida)
+        r1.ingredientes.add(banana)
+        r2.categorias.add(doce)
+        r2.ingredientes.add(banana)
+
+        params = {
+            'categorias': f'{doce.id},{rapida.id}',
+            'ingredientes': str(banana.id),
+            'match': 'all',
+        }
+        res = self.client.get(RECEITAS_URL, params)
+
+        ids = [receita['id'] for receita in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filtro_despensa(self):
+        '''Testa o filtro de receitas que só usam ingredientes da despensa.'''
+        r1 = create_receita(user=self.user, nome='Ovo frito')
+        r2 = create_receita(user=self.user, nome='Omelete')
+        r3 = create_receita(user=self.user, nome='Sem ingredientes')
+
+        ovo = Ingrediente.objects.create(user=self.user, nome='Ovo')
+        sal = Ingrediente.objects.create(user=self.user, nome='Sal')
+        queijo = Ingrediente.objects.create(user=self.user, nome='Queijo')
+        r1.ingredientes.add(ovo, sal)
+        r2.ingredientes.add(ovo, sal, queijo)
+
+        params = {'despensa': f'{ovo.id},{sal.id}'}
+        res = self.client.get(RECEITAS_URL, params)
+
+        ids = [receita['id'] for receita in res.data['results']]
+        self.assertIn(r1.id, ids)
+        self.assertNotIn(r2.id, ids)
+        self.assertNotIn(r3.id, ids)
+
+    def test_filtro_match_invalido(self):
+        '''Testa o erro para um modo de filtro inválido.'''
+        res = self.client.get(RECEITAS_URL, {'match': 'alguns'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_busca_receitas(self):
+        '''Testa a busca de receitas pelo nome e pela descrição.'''
+        r1 = create_receita(user=self.user, nome='Bolo de cenoura')
+        r2 = create_receita(
+            user=self.user,
+            nome='Cobertura',
+            descricao='Chocolate para o bolo de cenoura',
+        )
+        create_receita(user=self.user, nome='Pão de queijo')
+        outro_user = create_user(email='outro@example.com', password='123')
+        create_receita(user=outro_user, nome='Bolo de cenoura')
+
+        res = self.client.get(RECEITAS_URL, {'q': 'bolo cenoura'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [receita['id'] for receita in res.data['results']]
+        self.assertEqual(ids, [r1.id, r2.id])
+
+    def test_busca_com_filtro(self):
+        '''Testa a busca combinada com o filtro de categorias.'''
+        r1 = create_receita(user=self.user, nome='Bolo de fubá')
+        create_receita(user=self.user, nome='Bolo de laranja')
+        categoria = Categoria.objects.create(user=self.user, nome='Junina')
+        r1.categorias.add(categoria)
+
+        params = {'q': 'bolo', 'categorias': str(categoria.id)}
+        res = self.client.get(RECEITAS_URL, params)
+
+        ids = [receita['id'] for receita in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def _criar_receitas_com_atributos(self, quantidade):
+        """Cria receitas com categorias e ingredientes para o usuário."""
+        for i in range(quantidade):
+            receita = create_receita(user=self.user, nome=f'Receita {i}')
+            receita.categorias.add(Categoria.objects.create(
+                user=self.user,
+                nome=f'Cat {receita.id}',
+            ))
+            receita.ingredientes.add(Ingrediente.objects.create(
+                user=self.user,
+                nome=f'Ing {receita.id}',
+            ))
+
+    def _completar_receitas(self, quantidade):
+        """Cria receitas com atributos até o usuário ter a quantidade."""
+        self._criar_receitas_com_atributos(
+            quantidade - Receita.objects.filter(user=self.user).count()
+        )
+
+    def _get(self, url, params=None):
+        """Faz um GET e verifica o sucesso."""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res
+
+    def test_listagem_consultas_constantes(self):
+        """Testa se a listagem não faz consultas por receita (N+1)."""
+        self.assertEscala(
+            self._completar_receitas,
+            lambda n: self._get(RECEITAS_URL),
+            tamanhos=(2, 12),
+            consultas=CONSULTAS_LISTAGEM,
+            tempo_ms=lambda n: 200 + 10 * n,
+        )
+
+    def test_filtro_consultas_constantes(self):
+        """Testa se a listagem filtrada não faz consultas por receita."""
+        params = {}
+
+        def preparar(quantidade):
+            self._completar_receitas(quantidade)
+            params['categorias'] = ','.join(
+                str(c.id) for c in Categoria.objects.all()
+            )
+
+        self.assertEscala(
+            preparar,
+            lambda n: self._get(RECEITAS_URL, params),
+            tamanhos=(2, 12),
+            consultas=CONSULTAS_LISTAGEM,
+            tempo_ms=lambda n: 200 + 10 * n,
+        )
+
+    def test_detalhes_consultas_constantes(self):
+        """Testa se os detalhes carregam atributos em consultas fixas."""
+        receita = create_receita(user=self.user)
+
+        def preparar(quantidade):
+            for i in range(receita.categorias.count(), quantidade):
+                receita.categorias.add(
+                    Categoria.objects.create(user=self.user, nome=f'Cat {i}')
+                )
+                receita.ingredientes.add(Ingrediente.objects.create(
+                    user=self.user, nome=f'Ing {i}'
+                ))
+
+        self.assertEscala(
+            preparar,
+            lambda n: self._get(detalhes_url(receita.id)),
+            tamanhos=(1, 11),
+            consultas=CONSULTAS_DETALHES,
+            tempo_ms=lambda n: 200 + 10 * n,
+        )
+
+    def test_criar_receita_consultas_constantes(self):
+        """Testa se criar receitas com atributos usa consultas fixas."""
+        def criar(quantidade):
+            res = self.client.post(RECEITAS_URL, {
+                'nome': 'Salada',
+                'tempo_preparo': 10,
+                'preco': Decimal('8.00'),
+                'categorias': [{'nome': f'{quantidade} cat {i}'}
+                               for i in range(quantidade)],
+                'ingredientes': [{'nome': f'{quantidade} ing {i}'}
+                                 for i in range(quantidade)],
+            }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.ultima = res.data['id']
+
+        self.assertEscala(
+            lambda n: None,
+            criar,
+            tamanhos=(2, 30),
+            consultas=CONSULTAS_CRIACAO,
+            tempo_ms=lambda n: 300 + 10 * n,
+        )
+        receita = Receita.objects.get(id=self.ultima)
+        self.assertEqual(receita.ingredientes.count(), 30)
+
+    def test_criar_receita_ingredientes_repetidos(self):
+        """Testa se nomes repetidos no payload criam um único item."""
+        Ingrediente.objects.create(user=self.user, nome='Sal')
+        payload = {
+            'nome': 'Arroz',
+            'tempo_preparo': 20,
+            'preco': Decimal('3.00'),
+            'ingredientes': [
+                {'nome': 'Sal'},
+                {'nome': 'Arroz'},
+                {'nome': 'Arroz'},
+            ]
+        }
+
+        res = self.client.post(RECEITAS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Ingrediente.objects.filter(user=self.user).count(), 2
+        )
+        receita = Receita.objects.get(id=res.data['id'])
+        self.assertEqual(receita.ingredientes.count(), 2)
+
+    def test_atualizar_mantem_associacoes_inalteradas(self):
+        """Testa se o update só altera as associações que mudaram."""
+        receita = create_receita(user=self.user)
+        alho = Ingrediente.objects.create(user=self.user, nome='Alho')
+        sal = Ingrediente.objects.create(user=self.user, nome='Sal')
+        receita.ingredientes.add(alho, sal)
+        Through = Receita.ingredientes.through
+        associacao_alho = Through.objects.get(
+            receita=receita, ingrediente=alho
+        )
+
+        payload = {'ingredientes': [{'nome': 'Alho'}, {'nome': 'Óleo'}]}
+        res = self.client.patch(
+            detalhes_url(receita.id), payload, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(Through.objects.filter(
+            id=associacao_alho.id, ingrediente=alho
+        ).exists())
+        self.assertEqual(
+            set(receita.ingredientes.values_list('nome', flat=True)),
+            {'Alho', 'Óleo'},
+        )
+
+    def test_atualizar_sem_mudancas_nao_escreve(self):
+        """Testa se um update sem mudanças não faz UPDATE/INSERT/DELETE."""
+        receita = create_receita(user=self.user, nome='Pão')
+        categoria = Categoria.objects.create(user=self.user, nome='Lanche')
+        receita.categorias.add(categoria)
+
+        payload = {'nome': 'Pão', 'categorias': [{'nome': 'Lanche'}]}
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.patch(
+                detalhes_url(receita.id), payload, format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        escritas = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))
+        ]
+        self.assertEqual(escritas, [])
+
+    def test_atualizar_salva_apenas_campos_alterados(self):
+        """Testa se o update grava apenas os campos que mudaram."""
+        receita = create_receita(user=self.user, nome='Pão')
+
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.patch(
+                detalhes_url(receita.id), {'nome': 'Pão de queijo'}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('UPDATE "core_receita"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('descricao', updates[0])
 
 
 class ImagemUploadTestes(TestCase):
@@ -0,0 +1,303 @@
+"""
+Testes para a sincronização incremental das receitas.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Alteracao,
+    Receita,
+    Categoria,
+    RevisaoUsuario,
+)
+
+
+migracao_alteracoes = import_module('core.migrations.0017_alteracoes')
+
+
+SYNC_URL = reverse('receita:sync')
+RECEITAS_URL = reverse('receita:receita-list')
+LOTE_URL = reverse('receita:receita-lote')
+
+
+def detalhes_url(receita_id):
+    """Cria e retorna a URL de detalhes de uma receita."""
+    return reverse('receita:receita-detail', args=[receita_id])
+
+
+def categoria_url(categoria_id):
+    """Cria e retorna a URL de detalhes de uma categoria."""
+    return reverse('receita:categoria-detail', args=[categoria_id])
+
+
+class SincronizacaoTestes(TestCase):
+    """Testa o endpoint de sincronização."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senhateste123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _criar_receita(self, **params):
+        """Cria uma receita pela API e retorna seu id."""
+        payload = {
+            'nome': 'Bolo',
+            'tempo_preparo': 30,
+            'preco': Decimal('10.00'),
+        }
+        payload.update(params)
+        res = self.client.post(RECEITAS_URL, payload, format='json')
+
+        return res.data['id']
+
+    def _sincronizar(self, desde=0, **params):
+        """Retorna a resposta da sincronização desde a revisão."""
+        res = self.client.get(SYNC_URL, {'since': desde, **params})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def _itens(self, dados):
+        """Retorna os itens da resposta como (tipo, id, removido)."""
+        return [
+            (item['tipo'], item['id'], item['removido'])
+            for item in dados['results']
+        ]
+
+    def test_autenticacao_obrigatoria(self):
+        """Testa se a sincronização exige autenticação."""
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sincronizacao_inicial(self):
+        """Testa se a primeira sincronização traz todos os itens."""
+        receita_id = self._criar_receita(categorias=[{'nome': 'Doce'}])
+        categoria = Categoria.objects.get(user=self.user)
+
+        dados = self._sincronizar()
+
+        self.assertEqual(
+            sorted(self._itens(dados)),
+            [('categoria', categoria.id, False),
+             ('receita', receita_id, False)],
+        )
+        receita = next(
+            item['dados'] for item in dados['results']
+            if item['tipo'] == 'receita'
+        )
+        self.assertEqual(receita['nome'], 'Bolo')
+        self.assertEqual(receita['preco'], '10.00')
+        self.assertEqual(
+            receita['categorias'], [{'id': categoria.id, 'nome': 'Doce'}]
+        )
+        self.assertEqual(dados['revisao'], dados['results'][-1]['revisao'])
+        self.assertIsNone(dados['next'])
+
+    def test_itens_anteriores_ao_registro(self):
+        """Testa se a migração registra os itens que já existiam."""
+        antiga = self._criar_receita(categorias=[{'nome': 'Doce'}])
+        categoria = Categoria.objects.get(user=self.user)
+        Alteracao.objects.all().delete()
+        RevisaoUsuario.objects.all().delete()
+
+        migracao_alteracoes.registrar_existentes(apps, None)
+        dados = self._sincronizar()
+
+        self.assertEqual(self._itens(dados), [
+            ('categoria', categoria.id, False),
+            ('receita', antiga, False),
+        ])
+        self.assertEqual(dados['results'][1]['dados']['nome'], 'Bolo')
+
+        nova = self._criar_receita(nome='Nova')
+        self.assertEqual(
+            self._itens(self._sincronizar(dados['revisao'])),
+            [('receita', nova, False)],
+        )
+
+    def test_apenas_alteracoes_posteriores(self):
+        """Testa se apenas os itens alterados depois da revisão vêm."""
+        self._criar_receita(nome='Antiga')
+        alterada = self._criar_receita(nome='Outra')
+        revisao = self._sincronizar()['revisao']
+
+        self.client.patch(detalhes_url(alterada), {'nome': 'Nova'})
+        dados = self._sincronizar(revisao)
+
+        self.assertEqual(self._itens(dados), [('receita', alterada, False)])
+        self.assertEqual(dados['results'][0]['dados']['nome'], 'Nova')
+        self.assertEqual(self._sincronizar(dados['revisao'])['results'], [])
+
+    def test_remocao(self):
+        """Testa se as receitas removidas vêm como remoções."""
+        receita_id = self._criar_receita()
+        revisao = self._sincronizar()['revisao']
+
+        self.client.delete(detalhes_url(receita_id))
+        dados = self._sincronizar(revisao)
+
+        self.assertEqual(self._itens(dados), [('receita', receita_id, True)])
+        self.assertIsNone(dados['results'][0]['dados'])
+        self.assertEqual(self._sincronizar()['results'], [])
+
+    def test_alteracao_de_associacoes(self):
+        """Testa se mudar as associações altera a receita."""
+        receita = Receita.objects.get(id=self._criar_receita())
+        categoria = Categoria.objects.create(user=self.user, nome='Doce')
+        revisao = self._sincronizar()['revisao']
+
+        receita.categorias.add(categoria)
+        dados = self._sincronizar(revisao)
+        self.assertEqual(self._itens(dados), [('receita', receita.id, False)])
+
+        categoria.receita_set.remove(receita)
+        dados = self._sincronizar(dados['revisao'])
+        self.assertEqual(self._itens(dados), [('receita', receita.id, False)])
+        self.assertEqual(dados['results'][0]['dados']['categorias'], [])
+
+    def test_renomear_e_remover_atributo(self):
+        """Testa se alterar um atributo também altera suas receitas."""
+        receita_id = self._criar_receita(categorias=[{'nome': 'Doce'}])
+        categoria = Categoria.objects.get(user=self.user)
+        revisao = self._sincronizar()['revisao']
+
+        self.client.patch(categoria_url(categoria.id), {'nome': 'Sobremesa'})
+        dados = self._sincronizar(revisao)
+        self.assertEqual(
+            sorted(self._itens(dados)),
+            [('categoria', categoria.id, False),
+             ('receita', receita_id, False)],
+        )
+
+        self.client.delete(categoria_url(categoria.id))
+        dados = self._sincronizar(dados['revisao'])
+        self.assertEqual(
+            sorted(self._itens(dados)),
+            [('categoria', categoria.id, True),
+             ('receita', receita_id, False)],
+        )
+
+    def test_operacoes_em_lote(self):
+        """Testa o registro das criações, alterações e remoções em lote."""
+        alterada = self._criar_receita()
+        removida = self._criar_receita()
+        revisao = self._sincronizar()['revisao']
+
+        res = self.client.post(LOTE_URL, {'operacoes': [
+            {'op': 'create', 'dados': {
+                'nome': 'Nova', 'tempo_preparo': 5, 'preco': '1.00',
+                'ingredientes': [{'nome': 'Ovo'}],
+            }},
+            {'op': 'update', 'id': alterada, 'dados': {'nome': 'Mudou'}},
+            {'op': 'delete', 'id': removida},
+        ]}, format='json')
+        criada = res.data['resultados'][0]['id']
+        dados = self._sincronizar(revisao)
+
+        itens = self._itens(dados)
+        self.assertEqual(len(itens), 4)
+        self.assertIn(('receita', criada, False), itens)
+        self.assertIn(('receita', alterada, False), itens)
+        self.assertIn(('receita', removida, True), itens)
+        self.assertIn('ingrediente', [tipo for tipo, _id, _r in itens])
+
+    def test_paginacao_por_revisao(self):
+        """Testa a paginação das alterações pela revisão."""
+        ids = [self._criar_receita(nome=f'Receita {i}') for i in range(5)]
+
+        pagina = self._sincronizar(page_size=2)
+        recebidos = [item['id'] for item in pagina['results']]
+        while pagina['next']:
+            pagina = self.client.get(pagina['next']).data
+            recebidos.extend(item['id'] for item in pagina['results'])
+
+        self.assertEqual(recebidos, ids)
+
+    def test_itens_de_outros_usuarios(self):
+        """Testa se as alterações de outro usuário não são enviadas."""
+        outro_user = get_user_model().objects.create_user(
+            'outro@example.com',
+            'senhateste123',
+        )
+        Receita.objects.create(
+            user=outro_user,
+            nome='De outro',
+            tempo_preparo=5,
+            preco=Decimal('1.00'),
+        )
+
+        self.assertEqual(self._sincronizar()['results'], [])
+
+    def test_revisao_invalida(self):
+        """Testa a recusa de uma revisão inválida."""
+        res = self.client.get(SYNC_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compactacao(self):
+        """Testa a compactação das remoções antigas."""
+        receita_id = self._criar_receita()
+        revisao = self._sincronizar()['revisao']
+        self.client.delete(detalhes_url(receita_id))
+        Alteracao.objects.filter(removido=True).update(
+            modificado=timezone.now() - timedelta(days=60)
+        )
+
+        mensagens = StringIO()
+        call_command('compactar_alteracoes', stdout=mensagens)
+
+        self.assertIn('1 remoções descartadas', mensagens.getvalue())
+        self.assertFalse(Alteracao.objects.filter(removido=True).exists())
+        res = self.client.get(SYNC_URL, {'since': revisao})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(self._sincronizar()['results'], [])
+
+    def test_sincronizacao_inicial_paginada_apos_compactacao(self):
+        """Testa se a sincronização inicial termina após a compactação."""
+        ids = [self._criar_receita(nome=f'Receita {i}') for i in range(6)]
+        self.client.delete(detalhes_url(ids[2]))
+        Alteracao.objects.filter(removido=True).update(
+            modificado=timezone.now() - timedelta(days=60)
+        )
+        call_command('compactar_alteracoes', stdout=StringIO())
+
+        pagina = self._sincronizar(page_size=2)
+        recebidos = [item['id'] for item in pagina['results']]
+        while pagina['next']:
+            res = self.client.get(pagina['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pagina = res.data
+            self.assertFalse(
+                any(item['removido'] for item in pagina['results'])
+            )
+            recebidos.extend(item['id'] for item in pagina['results'])
+
+        self.assertEqual(recebidos, ids[:2] + ids[3:])
+        self.assertEqual(
+            self._sincronizar(pagina['revisao'])['results'], []
+        )
+
+    def test_excluir_usuario(self):
+        """Testa se excluir o usuário remove também o seu registro."""
+        self._criar_receita(categorias=[{'nome': 'Doce'}])
+
+        self.user.delete()
+
+        self.assertFalse(Alteracao.objects.exists())
+        self.assertFalse(RevisaoUsuario.objects.exists())
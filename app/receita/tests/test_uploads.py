@@ -0,0 +1,179 @@
+"""
+Testes para o recebimento dos uploads de imagens.
+"""
+from decimal import Decimal
+import hashlib
+from io import BytesIO
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Receita
+from receita.uploads import (
+    ImagemMuitoGrande,
+    ImagemNaoSuportada,
+    ImagemUploadHandler,
+    identificar_imagem,
+)
+
+
+def imagem_upload_url(receita_id):
+    """Cria e retorna uma url de upload de imagem."""
+    return reverse('receita:receita-upload-imagem', args=[receita_id])
+
+
+def criar_png(tamanho=(10, 10)):
+    """Cria e retorna o conteúdo de uma imagem PNG."""
+    conteudo = BytesIO()
+    Image.new('RGB', tamanho).save(conteudo, 'PNG')
+
+    return conteudo.getvalue()
+
+
+class ImagemUploadHandlerTestes(TestCase):
+    """Testa o handler de upload de imagens."""
+
+    def _enviar(self, conteudo, max_bytes=1024, chunk_size=16):
+        """Envia o conteúdo ao handler em blocos e retorna o arquivo."""
+        handler = ImagemUploadHandler(max_bytes=max_bytes)
+        handler.chunk_size = chunk_size
+        handler.new_file('imagem', 'foto.png', 'image/png', None)
+        for inicio in range(0, len(conteudo), chunk_size):
+            handler.receive_data_chunk(
+                conteudo[inicio:inicio + chunk_size], inicio
+            )
+
+        return handler.file_complete(len(conteudo))
+
+    def test_identificar_imagem(self):
+        """Testa a identificação dos formatos pelo cabeçalho."""
+        self.assertEqual(identificar_imagem(criar_png()), 'image/png')
+        self.assertEqual(
+            identificar_imagem(b'RIFF\x00\x00\x00\x00WEBPVP8 '),
+            'image/webp',
+        )
+        self.assertIsNone(identificar_imagem(b'%PDF-1.4'))
+
+    def test_arquivo_com_hash(self):
+        """Testa se o arquivo gravado traz o tamanho e o SHA-256."""
+        conteudo = criar_png()
+
+        arquivo = self._enviar(conteudo)
+
+        self.assertEqual(arquivo.read(), conteudo)
+        self.assertEqual(arquivo.size, len(conteudo))
+        self.assertEqual(arquivo.sha256, hashlib.sha256(conteudo).hexdigest())
+        self.assertEqual(arquivo.content_type, 'image/png')
+        arquivo.close()
+
+    def test_recusa_ao_exceder_limite(self):
+        """Testa se o envio é interrompido no bloco que excede o limite."""
+        conteudo = criar_png((200, 200))
+
+        with self.assertRaises(ImagemMuitoGrande):
+            self._enviar(conteudo, max_bytes=len(conteudo) - 1)
+
+    def test_recusa_pelo_primeiro_bloco(self):
+        """Testa se um arquivo que não é imagem é recusado no início."""
+        with self.assertRaises(ImagemNaoSuportada):
+            self._enviar(b'naoehumaimagem' * 10)
+
+
+class ImagemUploadApiTestes(TestCase):
+    """Testa os limites do upload de imagens na API."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media)
+        self.media_override.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'senha123'
+        )
+        self.client.force_authenticate(self.user)
+        self.receita = Receita.objects.create(
+            user=self.user,
+            nome='Receita com foto',
+            tempo_preparo=10,
+            preco=Decimal('5.00'),
+        )
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _upload(self, conteudo, nome='foto.png'):
+        arquivo = SimpleUploadedFile(nome, conteudo)
+        return self.client.post(
+            imagem_upload_url(self.receita.id),
+            {'imagem': arquivo},
+            format='multipart',
+        )
+
+    def test_upload_imagem(self):
+        """Testa o upload de uma imagem dentro do limite."""
+        res = self._upload(criar_png())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_upload_imagem_muito_grande(self):
+        """Testa a recusa de uma imagem acima do limite."""
+        conteudo = criar_png((300, 300))
+
+        with self.settings(IMAGEM_MAX_BYTES=len(conteudo) - 1):
+            res = self._upload(conteudo)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.receita.refresh_from_db()
+        self.assertFalse(self.receita.imagem)
+
+    def test_upload_recusado_pelo_content_length(self):
+        """Testa a recusa de um corpo maior que o limite sem lê-lo."""
+        with self.settings(IMAGEM_MAX_BYTES=1):
+            res = self._upload(b'\x89PNG\r\n\x1a\n' + b'0' * 128 * 1024)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    def test_upload_nao_imagem(self):
+        """Testa a recusa de um arquivo que não é imagem."""
+        res = self._upload(b'%PDF-1.4 documento', nome='foto.jpg')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+    def test_upload_repetido_reaproveita_arquivo(self):
+        """Testa se a mesma imagem em duas receitas é gravada uma vez."""
+        conteudo = criar_png()
+        outra = Receita.objects.create(
+            user=self.user,
+            nome='Outra receita',
+            tempo_preparo=10,
+            preco=Decimal('5.00'),
+        )
+
+        self._upload(conteudo)
+        self.client.post(
+            imagem_upload_url(outra.id),
+            {'imagem': SimpleUploadedFile('copia.png', conteudo)},
+            format='multipart',
+        )
+
+        self.receita.refresh_from_db()
+        outra.refresh_from_db()
+        self.assertEqual(self.receita.imagem.name, outra.imagem.name)
+        self.assertIn(hashlib.sha256(conteudo).hexdigest(), outra.imagem.name)
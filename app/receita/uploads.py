@@ -0,0 +1,120 @@
+"""
+Recebimento dos uploads de imagens das receitas.
+
+O handler grava o arquivo em disco em blocos de tamanho fixo, recusa o
+envio assim que o limite de tamanho é ultrapassado e verifica pelo
+cabeçalho do primeiro bloco se o arquivo é uma imagem suportada.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.metricas import registro
+
+
+# Assinaturas dos formatos aceitos: (deslocamento, bytes).
+ASSINATURAS = {
+    'image/jpeg': [(0, b'\xff\xd8\xff')],
+    'image/png': [(0, b'\x89PNG\r\n\x1a\n')],
+    'image/gif': [(0, b'GIF87a'), (0, b'GIF89a')],
+    'image/webp': [(0, b'RIFF'), (8, b'WEBP')],
+}
+
+# Bytes de um envio multipart além do arquivo (cabeçalhos e separadores).
+MARGEM_MULTIPART = 64 * 1024
+
+
+class ImagemMuitoGrande(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('A imagem excede o tamanho máximo permitido.')
+    default_code = 'imagem_muito_grande'
+
+
+class ImagemNaoSuportada(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = _('O arquivo enviado não é uma imagem suportada.')
+    default_code = 'imagem_nao_suportada'
+
+
+def identificar_imagem(cabecalho):
+    """Retorna o tipo da imagem pelos primeiros bytes, ou None."""
+    for tipo, partes in ASSINATURAS.items():
+        if all(
+            cabecalho[inicio:inicio + len(valor)] == valor
+            for inicio, valor in partes
+        ):
+            return tipo
+
+    return None
+
+
+class ImagemUploadHandler(FileUploadHandler):
+    """Grava as imagens enviadas em arquivos temporários com limite.
+
+    A memória usada por arquivo é limitada a um bloco (chunk_size). O
+    arquivo resultante traz também o tipo identificado (content_type) e
+    o SHA-256 do conteúdo (sha256), calculado durante a gravação.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or settings.IMAGEM_MAX_BYTES
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Recusa o envio pelo Content-Length, antes de ler o corpo."""
+        if content_length > self.max_bytes + MARGEM_MULTIPART:
+            self._registrar_recusa(ImagemMuitoGrande())
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra,
+        )
+        self.tamanho = 0
+        self.hash = hashlib.sha256()
+
+    def _registrar_recusa(self, erro):
+        """Contabiliza a imagem recusada e interrompe o envio."""
+        registro.incrementar(
+            'api_upload_imagem_recusadas_total', motivo=erro.default_code
+        )
+        raise erro
+
+    def _recusar(self, erro):
+        """Descarta o arquivo temporário e interrompe o envio."""
+        self.file.close()
+        self._registrar_recusa(erro)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            tipo = identificar_imagem(raw_data)
+            if tipo is None:
+                self._recusar(ImagemNaoSuportada())
+            self.file.content_type = tipo
+
+        self.tamanho += len(raw_data)
+        if self.tamanho > self.max_bytes:
+            self._recusar(ImagemMuitoGrande())
+
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if file_size == 0:
+            self._recusar(ImagemNaoSuportada())
+
+        registro.observar('api_upload_imagem_bytes', file_size)
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hash.hexdigest()
+
+        return self.file
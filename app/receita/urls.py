@@ -16,5 +16,26 @@ router.register('ingredientes', views.IngredienteViewSet)
 app_name = 'receita'
 
 urlpatterns = [
+    path('sync/', views.SincronizacaoView.as_view(), name='sync'),
+    path(
+        'async/receita/',
+        views.receitas_assincronas,
+        name='async-receita-list',
+    ),
+    path(
+        'async/receita/<int:pk>/',
+        views.receita_assincrona,
+        name='async-receita-detail',
+    ),
+    path(
+        'async/categorias/',
+        views.categorias_assincronas,
+        name='async-categoria-list',
+    ),
+    path(
+        'async/ingredientes/',
+        views.ingredientes_assincronos,
+        name='async-ingrediente-list',
+    ),
     path('', include(router.urls))
 ]
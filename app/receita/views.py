@@ -7,22 +7,62 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.db.models import (
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Q,
+)
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext as _
 from rest_framework import (
     viewsets,
     mixins,
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
+from core.assincrono import visao_assincrona
 from core.models import (
     Receita,
     Categoria,
     Ingrediente,
 )
+from core.renderers import JSONRapidoRenderer
 from receita import serializers
+from receita.busca import buscar_receitas
+from receita.cache import (
+    RespostaEmCacheMixin,
+    ler_do_cache,
+)
+from receita.condicional import (
+    gerar_etag,
+    metadados_usuario,
+)
+from receita.imagens import agendar_variantes
+from receita.lote import executar_operacoes
+from receita.ndjson import (
+    MEDIA_TYPE,
+    NDJSONParser,
+    NDJSONRenderer,
+    exportar_receitas,
+    importar_receitas,
+)
+from receita.pagination import (
+    ReceitaCursorPagination,
+    ReceitaAttrCursorPagination,
+)
+from receita.sincronizacao import alteracoes_desde
+from receita.uploads import ImagemUploadHandler
+from user.authentication import CachedTokenAuthentication
 
 
 @extend_schema_view(
@@ -37,48 +77,183 @@ from receita import serializers
                 'ingredientes',
                 OpenApiTypes.STR,
                 description='Lista de IDs de ingredientes separada por vírgula'
-            )
-        ]
-    )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Receitas com algum (any) ou todos (all) os '
+                            'atributos filtrados.'
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description='Busca no nome e na descrição das receitas, '
+                            'ordenando pela relevância.'
+            ),
+            OpenApiParameter(
+                'despensa',
+                OpenApiTypes.STR,
+                description='Lista de IDs de ingredientes disponíveis. '
+                            'Retorna receitas que só usam esses ingredientes.'
+            ),
+        ],
+        responses=serializers.ReceitaSerializer(many=True),
+    ),
+    retrieve=extend_schema(responses=serializers.DetalhesReceitaSerializer),
 )
-class ReceitaViewSet(viewsets.ModelViewSet):
+class ReceitaViewSet(RespostaEmCacheMixin, viewsets.ModelViewSet):
     """View para API de Receitas."""
     serializer_class = serializers.DetalhesReceitaSerializer
     queryset = Receita.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = ReceitaCursorPagination
+    # Leituras respondidas a partir de values(), sem instanciar os
+    # models nem os campos do DRF. Um dicionário vazio desativa.
+    serializers_leitura = {
+        'list': serializers.LeituraReceitaSerializer,
+        'retrieve': serializers.LeituraDetalhesReceitaSerializer,
+    }
 
     def _params_to_ints(self, queries):
         '''Transforma os parâmetros da URL em inteiros.'''
         return [int(str_id) for str_id in queries.split(',')]
 
+    def _filtro_atributos(self, campo, ids, todos=False):
+        '''Retorna um filtro por receitas com algum ou todos os atributos.'''
+        m2m = Receita._meta.get_field(campo)
+        Through = m2m.remote_field.through
+        receita = m2m.m2m_field_name()
+        atributo = m2m.m2m_reverse_field_name()
+
+        if todos:
+            # Uma única consulta agrupada: receitas cujas associações com
+            # os atributos pedidos somam a quantidade de atributos.
+            receitas = Through.objects.filter(**{
+                f'{atributo}__in': ids,
+            }).values(receita).annotate(
+                total=Count(atributo),
+            ).filter(total=len(set(ids))).values(receita)
+            return Q(id__in=receitas)
+
+        return Exists(Through.objects.filter(**{
+            receita: OuterRef('pk'),
+            f'{atributo}__in': ids,
+        }))
+
+    def _filtro_despensa(self, ids):
+        '''Retorna um filtro por receitas que só usam os ingredientes.'''
+        m2m = Receita._meta.get_field('ingredientes')
+        associacoes = m2m.remote_field.through.objects.filter(**{
+            m2m.m2m_field_name(): OuterRef('pk'),
+        })
+        fora_da_despensa = associacoes.exclude(**{
+            f'{m2m.m2m_reverse_field_name()}__in': ids,
+        })
+
+        return Exists(associacoes) & ~Exists(fora_da_despensa)
+
     def get_queryset(self):
         """Retorna receitas criadas pelo user autenticado."""
         categorias = self.request.query_params.get('categorias')
         ingredientes = self.request.query_params.get('ingredientes')
+        despensa = self.request.query_params.get('despensa')
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': _('Use "any" ou "all".')})
+        todos = match == 'all'
         queryset = self.queryset
 
         if categorias:
             categoria_ids = self._params_to_ints(categorias)
-            queryset = queryset.filter(categorias__id__in=categoria_ids)
+            queryset = queryset.filter(
+                self._filtro_atributos('categorias', categoria_ids, todos)
+            )
         if ingredientes:
             ingrediente_ids = self._params_to_ints(ingredientes)
-            queryset = queryset.filter(ingredientes__id__in=ingrediente_ids)
-        
-        return queryset.filter(
+            queryset = queryset.filter(
+                self._filtro_atributos('ingredientes', ingrediente_ids, todos)
+            )
+        if despensa:
+            queryset = queryset.filter(
+                self._filtro_despensa(self._params_to_ints(despensa))
+            )
+
+        # O tsvector da busca não é usado nas respostas.
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).defer('busca').order_by('-id')
+
+        termo = self.request.query_params.get('q', '').strip()
+        if termo:
+            queryset = buscar_receitas(queryset, termo).order_by(
+                '-rank', '-id'
+            )
+
+        if self.action in ('destroy', 'upload_imagem'):
+            return queryset
+
+        # Outros renderers, como o da API navegável, reutilizam a
+        # instância no serializer do formulário e precisam do model.
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        serializer_leitura = self.serializers_leitura.get(self.action)
+        if serializer_leitura is not None and getattr(
+            renderer, 'format', None
+        ) == 'json':
+            campos = serializer_leitura.campos_consulta()
+            # A paginação da busca lê a relevância de cada receita.
+            return queryset.values(*campos, *(('rank',) if termo else ()))
+
+        return queryset.prefetch_related(
+            Prefetch(
+                'categorias',
+                queryset=Categoria.objects.only('id', 'nome').order_by('id')
+            ),
+            Prefetch(
+                'ingredientes',
+                queryset=Ingrediente.objects.only('id', 'nome').order_by(
+                    'id'
+                )
+            ),
+        )
 
 
     def get_serializer_class(self):
         """Retorna a classe serializer da requisição."""
-        if self.action == 'list':
+        if self.action in self.serializers_leitura:
+            return self.serializers_leitura[self.action]
+        elif self.action == 'list':
             return serializers.ReceitaSerializer
         elif self.action == 'upload_imagem':
             return serializers.ImagemReceitaSerializer
+        elif self.action == 'lote':
+            return serializers.LoteReceitasSerializer
 
         return self.serializer_class
 
+    def get_metadados(self):
+        """Retorna a ETag e a última modificação das receitas."""
+        if self.action != 'retrieve':
+            return metadados_usuario(self.request)
+
+        try:
+            modificado = Receita.objects.filter(
+                user=self.request.user,
+                pk=self.kwargs['pk'],
+            ).values_list('modificado', flat=True).first()
+        except ValueError:
+            modificado = None
+        if modificado is None:
+            return None, None
+
+        return gerar_etag(self.request, modificado.isoformat()), modificado
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retorna os detalhes de uma receita, usando o cache."""
+        return self._resposta_em_cache(
+            request, super().retrieve, *args, **kwargs
+        )
+
     def perform_create(self, serializer):
         """Cria uma nova receita."""
         serializer.save(user=self.request.user)
@@ -86,32 +261,92 @@ class ReceitaViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-imagem')
     def upload_imagem(self, request, pk=None):
         '''Faz upload de uma imagem para uma receita.'''
+        # Antes de ler o corpo: limita o tamanho e recusa não-imagens.
+        request._request.upload_handlers = [
+            ImagemUploadHandler(request._request)
+        ]
         receita = self.get_object()
         serializer = self.get_serializer(receita, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # As variantes da imagem anterior deixam de valer; as novas
+            # são geradas em segundo plano.
+            serializer.save(imagem_variantes={})
+            agendar_variantes(receita.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-@extend_schema_view(
-    list=extend_schema,
-    parameters=[
-        OpenApiParameter(
-            'assigned_only',
-            OpenApiTypes.INT, enum=[0, 1],
-            description='Filtro para itens associados a receitas.'
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    @action(methods=['POST'], detail=False, url_path='lote')
+    def lote(self, request):
+        '''Cria, atualiza e remove receitas em uma única transação.'''
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        executado, resultados = executar_operacoes(
+            request.user,
+            serializer.validated_data['operacoes'],
+            self.get_serializer_context(),
         )
-    ]
+
+        return Response(
+            {'resultados': resultados},
+            status=(
+                status.HTTP_200_OK if executado
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @extend_schema(
+        request={MEDIA_TYPE: OpenApiTypes.BINARY},
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='importar',
+        parser_classes=[NDJSONParser],
+    )
+    def importar(self, request):
+        '''Importa receitas enviadas em JSON Lines, uma por linha.'''
+        relatorio = importar_receitas(request.user, request.data)
+
+        return Response(relatorio, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={(200, MEDIA_TYPE): OpenApiTypes.BINARY})
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path='exportar',
+        renderer_classes=[NDJSONRenderer, JSONRapidoRenderer],
+    )
+    def exportar(self, request):
+        '''Exporta as receitas do usuário em JSON Lines.'''
+        return StreamingHttpResponse(
+            exportar_receitas(request.user),
+            content_type=MEDIA_TYPE,
+        )
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'assigned_only',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Filtro para itens associados a receitas.'
+            )
+        ]
+    )
 )
-class BaseReceitaAttrViewSet(mixins.DestroyModelMixin,
+class BaseReceitaAttrViewSet(RespostaEmCacheMixin,
+                             mixins.DestroyModelMixin,
                              mixins.UpdateModelMixin,
                              mixins.ListModelMixin,
                              viewsets.GenericViewSet):
     '''ViewSet base para atributos de receitas.'''
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = ReceitaAttrCursorPagination
 
     def get_queryset(self):
         """Retorna a lista de categorias do usuário logado."""
@@ -121,11 +356,33 @@ class BaseReceitaAttrViewSet(mixins.DestroyModelMixin,
 
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(receita__isnull=False)
+            m2m = self.queryset.model.receita_set.field
+            associacoes = m2m.remote_field.through.objects.filter(**{
+                m2m.m2m_reverse_field_name(): OuterRef('pk'),
+            })
+            queryset = queryset.filter(Exists(associacoes))
 
         return queryset\
             .filter(user=self.request.user)\
-            .order_by('-nome').distinct()
+            .order_by('-nome')
+
+    def get_metadados(self):
+        """Retorna a ETag e a última modificação dos itens listados."""
+        return metadados_usuario(self.request)
+
+    def _marcar_receitas_modificadas(self, instance):
+        """Atualiza a data de modificação das receitas do item."""
+        instance.receita_set.update(modificado=timezone.now())
+
+    def perform_update(self, serializer):
+        """Atualiza o item e marca suas receitas como modificadas."""
+        super().perform_update(serializer)
+        self._marcar_receitas_modificadas(serializer.instance)
+
+    def perform_destroy(self, instance):
+        """Exclui o item e marca suas receitas como modificadas."""
+        self._marcar_receitas_modificadas(instance)
+        super().perform_destroy(instance)
 
 class CategoriaViewSet(BaseReceitaAttrViewSet):
     """ViewSet para listar categorias."""
@@ -137,3 +394,95 @@ class IngredienteViewSet(BaseReceitaAttrViewSet):
     serializer_class = serializers.IngredienteSerializer
     queryset = Ingrediente.objects.all()
 
+
+class SincronizacaoView(APIView):
+    """View para a sincronização incremental das receitas."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def _param_inteiro(self, nome, padrao, minimo=0):
+        """Lê um parâmetro inteiro da URL."""
+        valor = self.request.query_params.get(nome, padrao)
+        try:
+            valor = int(valor)
+        except (TypeError, ValueError):
+            valor = None
+        if valor is None or valor < minimo:
+            raise ValidationError({nome: _('Número inteiro inválido.')})
+
+        return valor
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'since',
+                OpenApiTypes.INT,
+                description='Última revisão recebida; 0 para todos os itens.'
+            ),
+            OpenApiParameter(
+                'page_size',
+                OpenApiTypes.INT,
+                description='Quantidade máxima de alterações na página.'
+            ),
+            OpenApiParameter(
+                'inicial',
+                OpenApiTypes.BOOL,
+                description=(
+                    'Continuação da sincronização inicial; vem no link '
+                    'next e não deve ser enviado pelo cliente.'
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request):
+        """Lista as alterações posteriores à revisão informada.
+
+        Receitas, categorias e ingredientes alterados vêm com os dados
+        atuais e os removidos com removido verdadeiro. A revisão da
+        resposta deve ser enviada como since na próxima requisição.
+        """
+        desde = self._param_inteiro('since', 0)
+        limite = min(
+            self._param_inteiro('page_size', settings.API_PAGE_SIZE, 1),
+            settings.API_MAX_PAGE_SIZE,
+        )
+        inicial = not desde or self._param_inteiro('inicial', 0) > 0
+        resultados, mais, revisao = alteracoes_desde(
+            request.user, desde, limite, inicial=inicial
+        )
+
+        proxima = None
+        if mais:
+            # As páginas seguintes da sincronização inicial continuam
+            # sem as remoções e sem a verificação da compactação, que
+            # recusaria a revisão intermediária.
+            proxima = replace_query_param(
+                request.build_absolute_uri(), 'since', revisao
+            )
+            if inicial:
+                proxima = replace_query_param(proxima, 'inicial', 1)
+
+        return Response({
+            'revisao': revisao,
+            'next': proxima,
+            'results': resultados,
+        })
+
+
+# Versões assíncronas das leituras, para servidores ASGI. Respostas em
+# cache são dadas sem sair do event loop.
+receitas_assincronas = visao_assincrona(
+    ReceitaViewSet, {'get': 'list'}, ler_do_cache, basename='receita'
+)
+receita_assincrona = visao_assincrona(
+    ReceitaViewSet, {'get': 'retrieve'}, ler_do_cache, basename='receita',
+    detail=True,
+)
+categorias_assincronas = visao_assincrona(
+    CategoriaViewSet, {'get': 'list'}, ler_do_cache, basename='categoria'
+)
+ingredientes_assincronos = visao_assincrona(
+    IngredienteViewSet, {'get': 'list'}, ler_do_cache,
+    basename='ingrediente',
+)
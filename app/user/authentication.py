@@ -0,0 +1,235 @@
+"""
+Autenticação por token com cache para a API.
+"""
+from collections import OrderedDict
+import copy
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from core.assincrono import no_banco
+from core.instrumentacao import etapa
+from core.metricas import registro
+
+
+class _CacheTokens:
+    """Cache LRU em memória dos tokens, com validade por entrada.
+
+    Guarda, para cada chave de token, o token e o usuário autenticado.
+    Quando AUTH_TOKEN_CACHE_ALIAS é informado, usa também esse cache do
+    Django como segundo nível, compartilhado entre processos, com
+    validade própria (AUTH_TOKEN_CACHE_COMPARTILHADO_TIMEOUT).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._metricas = {
+            'acertos': 0,
+            'acertos_compartilhados': 0,
+            'falhas': 0,
+            'tempo_acertos': 0.0,
+            'tempo_falhas': 0.0,
+        }
+
+    @property
+    def timeout(self):
+        return settings.AUTH_TOKEN_CACHE_TIMEOUT
+
+    @property
+    def timeout_compartilhado(self):
+        return settings.AUTH_TOKEN_CACHE_COMPARTILHADO_TIMEOUT
+
+    @property
+    def max_entradas(self):
+        return settings.AUTH_TOKEN_CACHE_MAX_ENTRIES
+
+    def _compartilhado(self):
+        alias = settings.AUTH_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _chave_compartilhada(self, key):
+        # O token não é gravado em claro no cache compartilhado.
+        return 'auth-token:%s' % hashlib.sha256(key.encode()).hexdigest()
+
+    def obter_local(self, key):
+        """Retorna (user, token) do cache em memória ou None."""
+        with self._lock:
+            entrada = self._entradas.get(key)
+            if entrada is not None:
+                valor, expira = entrada
+                if expira > time.monotonic():
+                    self._entradas.move_to_end(key)
+                    return valor
+                del self._entradas[key]
+
+        return None
+
+    def obter(self, key):
+        """Retorna (user, token) do cache ou None."""
+        valor = self.obter_local(key)
+        if valor is not None:
+            return valor
+
+        compartilhado = self._compartilhado()
+        if compartilhado is None:
+            return None
+
+        valor = compartilhado.get(self._chave_compartilhada(key))
+        if valor is not None:
+            self._guardar_local(key, valor)
+            with self._lock:
+                self._metricas['acertos_compartilhados'] += 1
+
+        return valor
+
+    def _guardar_local(self, key, valor):
+        if self.timeout <= 0:
+            return
+
+        with self._lock:
+            self._entradas[key] = (valor, time.monotonic() + self.timeout)
+            self._entradas.move_to_end(key)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def guardar(self, key, valor):
+        """Guarda (user, token) nos caches local e compartilhado."""
+        self._guardar_local(key, valor)
+        compartilhado = self._compartilhado()
+        if compartilhado is not None and self.timeout_compartilhado > 0:
+            compartilhado.set(
+                self._chave_compartilhada(key), valor,
+                self.timeout_compartilhado,
+            )
+
+    def invalidar(self, *keys):
+        """Remove os tokens dos caches."""
+        with self._lock:
+            for key in keys:
+                self._entradas.pop(key, None)
+
+        compartilhado = self._compartilhado()
+        if compartilhado is not None and keys:
+            compartilhado.delete_many(
+                [self._chave_compartilhada(key) for key in keys]
+            )
+
+    def registrar(self, acerto, duracao):
+        """Contabiliza uma autenticação e sua duração em segundos."""
+        with self._lock:
+            if acerto:
+                self._metricas['acertos'] += 1
+                self._metricas['tempo_acertos'] += duracao
+            else:
+                self._metricas['falhas'] += 1
+                self._metricas['tempo_falhas'] += duracao
+
+    def metricas(self):
+        """Retorna a taxa de acerto e a latência economizada pelo cache."""
+        with self._lock:
+            dados = dict(self._metricas)
+            entradas = len(self._entradas)
+
+        acertos, falhas = dados['acertos'], dados['falhas']
+        total = acertos + falhas
+        latencia_acerto = dados['tempo_acertos'] / acertos if acertos else 0
+        latencia_falha = dados['tempo_falhas'] / falhas if falhas else 0
+
+        return {
+            'entradas': entradas,
+            'acertos': acertos,
+            'acertos_compartilhados': dados['acertos_compartilhados'],
+            'falhas': falhas,
+            'taxa_acerto': acertos / total if total else 0.0,
+            'latencia_acerto_ms': latencia_acerto * 1000,
+            'latencia_falha_ms': latencia_falha * 1000,
+            # Estimativa: cada acerto evitou uma consulta com a
+            # latência média das falhas.
+            'tempo_economizado_ms': max(
+                acertos * (latencia_falha - latencia_acerto), 0
+            ) * 1000,
+        }
+
+    def limpar(self):
+        """Esvazia o cache local e zera as métricas."""
+        with self._lock:
+            self._entradas.clear()
+            for nome in self._metricas:
+                self._metricas[nome] = 0
+
+
+cache_tokens = _CacheTokens()
+
+
+@registro.coletor
+def _metricas_cache_tokens():
+    dados = cache_tokens.metricas()
+    for resultado, campo in (('acerto', 'acertos'), ('falha', 'falhas')):
+        yield (
+            'api_cache_requisicoes_total',
+            {'cache': 'tokens', 'resultado': resultado},
+            dados[campo],
+        )
+    yield (
+        'api_cache_tokens_acertos_compartilhados_total', {},
+        dados['acertos_compartilhados'],
+    )
+    yield 'api_cache_entradas', {'cache': 'tokens'}, dados['entradas']
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Autenticação por token que evita a consulta ao banco a cada
+    requisição.
+
+    O par (user, token) fica em cache e é invalidado quando o token é
+    removido ou o usuário é salvo (desativação, troca de senha). Com
+    vários processos, o cache local dos outros processos só deixa de
+    aceitar o token quando a entrada expira, em até
+    AUTH_TOKEN_CACHE_TIMEOUT segundos.
+    """
+
+    def authenticate(self, request):
+        with etapa('autenticacao'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        inicio = time.perf_counter()
+        valor = cache_tokens.obter(key)
+        acerto = valor is not None
+
+        if not acerto:
+            valor = super().authenticate_credentials(key)
+            cache_tokens.guardar(key, valor)
+        cache_tokens.registrar(acerto, time.perf_counter() - inicio)
+
+        # Cópias, para que alterações feitas durante a requisição não
+        # cheguem às próximas.
+        user, token = copy.copy(valor[0]), copy.copy(valor[1])
+        token.user = user
+
+        return user, token
+
+    async def autenticar_assincrono(self, request):
+        """Autentica a requisição a partir de uma view assíncrona.
+
+        Com o token no cache em memória, autentica sem sair do event
+        loop; caso contrário, consulta o cache compartilhado e o banco
+        em uma thread.
+        """
+        auth = get_authorization_header(request).split()
+        palavra = self.keyword.lower().encode()
+        if (len(auth) == 2 and auth[0].lower() == palavra
+                and cache_tokens.obter_local(auth[1].decode(
+                    errors='replace')) is not None):
+            return self.authenticate(request)
+
+        return await no_banco(self.authenticate, request)
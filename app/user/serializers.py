@@ -9,8 +9,10 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.instrumentacao import SerializacaoMedidaMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SerializacaoMedidaMixin, serializers.ModelSerializer):
     """Serializer para o objeto User"""
 
     class Meta:
@@ -0,0 +1,32 @@
+"""
+Sinais da API de usuários.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+)
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import cache_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidar_token_removido(sender, instance, **kwargs):
+    """Remove do cache de autenticação um token apagado."""
+    cache_tokens.invalidar(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidar_tokens_usuario(sender, instance, created, **kwargs):
+    """Remove do cache os tokens de um usuário alterado.
+
+    Cobre a desativação do usuário e a troca de senha.
+    """
+    if created:
+        return
+
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    cache_tokens.invalidar(*keys)
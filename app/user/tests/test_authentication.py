@@ -0,0 +1,171 @@
+"""
+Testes para a autenticação por token com cache.
+"""
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    CachedTokenAuthentication,
+    cache_tokens,
+)
+
+
+ME_URL = reverse('user:me')
+ASYNC_ME_URL = reverse('user:async-me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Testa o cache da autenticação por token."""
+
+    def setUp(self):
+        cache_tokens.limpar()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='senhateste123',
+            name='Nome Teste',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _consultas(self):
+        """Faz uma requisição autenticada e retorna as consultas feitas."""
+        with CaptureQueriesContext(connection) as consultas:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(consultas)
+
+    def test_token_em_cache(self):
+        """Testa se o token só é consultado no banco na primeira vez."""
+        self.assertEqual(self._consultas(), 1)
+        self.assertEqual(self._consultas(), 0)
+
+        metricas = cache_tokens.metricas()
+        self.assertEqual(metricas['acertos'], 1)
+        self.assertEqual(metricas['falhas'], 1)
+        self.assertEqual(metricas['taxa_acerto'], 0.5)
+
+    def test_token_removido(self):
+        """Testa se um token removido deixa de autenticar."""
+        self._consultas()
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_usuario_desativado(self):
+        """Testa se um usuário desativado deixa de autenticar."""
+        self._consultas()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_troca_de_senha(self):
+        """Testa se a troca de senha invalida o token em cache."""
+        self._consultas()
+
+        res = self.client.patch(ME_URL, {'password': 'novasenha123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self._consultas(), 1)
+
+    def test_usuario_em_cache_copiado(self):
+        """Testa se alterações no usuário autenticado não vão ao cache."""
+        autenticacao = CachedTokenAuthentication()
+        user, _ = autenticacao.authenticate_credentials(self.token.key)
+        user.name = 'Alterado na requisição'
+
+        user, token = autenticacao.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, 'Nome Teste')
+        self.assertIs(token.user, user)
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='default')
+    def test_cache_compartilhado(self):
+        """Testa se o token é lido do cache compartilhado."""
+        self._consultas()
+        cache_tokens.limpar()
+
+        self.assertEqual(self._consultas(), 0)
+        self.assertEqual(cache_tokens.metricas()['acertos_compartilhados'], 1)
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='default')
+    def test_token_removido_por_outro_processo(self):
+        """Testa o prazo para outro processo deixar de aceitar o token."""
+        self._consultas()
+        key = self.token.key
+        entrada = cache_tokens.obter_local(key)
+        self.token.delete()
+        # O cache local deste processo não soube da remoção.
+        cache_tokens._guardar_local(key, entrada)
+
+        self.assertEqual(self._consultas(), 0)
+
+        depois = time.monotonic() + settings.AUTH_TOKEN_CACHE_TIMEOUT + 1
+        with patch('user.authentication.time.monotonic', return_value=depois):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(ASYNC_DB_THREADS=0)
+class AutenticacaoAssincronaTests(TestCase):
+    """Testa a autenticação por token na view assíncrona de /me/."""
+
+    def setUp(self):
+        cache_tokens.limpar()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='senhateste123',
+            name='Nome Teste',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_usuario_sem_consultas(self):
+        """Testa se, com o token em cache, /me/ não sai do event loop."""
+        primeira = self.client.get(ASYNC_ME_URL)
+
+        with patch('core.assincrono.no_banco') as no_banco:
+            with CaptureQueriesContext(connection) as consultas:
+                res = self.client.get(ASYNC_ME_URL)
+
+        no_banco.assert_not_called()
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, primeira.content)
+        self.assertEqual(res.content, self.client.get(ME_URL).content)
+
+    def test_token_invalido(self):
+        """Testa a recusa de um token inexistente."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token inexistente')
+
+        res = self.client.get(ASYNC_ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json(), self.client.get(ME_URL).json())
+
+    def test_apenas_leitura(self):
+        """Testa se a view assíncrona não aceita alterações."""
+        res = self.client.patch(ASYNC_ME_URL, {'name': 'Outro'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -8,6 +8,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.testing import orcamento
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -82,7 +84,8 @@ class PublicUserTests(TestCase):
             'password': user_details['password'],
         }
 
-        res = self.client.post(TOKEN_URL, payload)
+        with orcamento(consultas=5):
+            res = self.client.post(TOKEN_URL, payload)
 
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -144,6 +147,13 @@ class PrivateUserTests(TestCase):
             'email': self.user.email
         })
 
+    @orcamento(consultas=0, tempo_ms=200)
+    def test_recuperar_perfil_orcamento(self):
+        """Testa se o perfil é lido sem consultar o banco."""
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_post_falha(self):
         """Testa se o método POST falha na url Me."""
         res = self.client.post(ME_URL, {})
@@ -1,10 +1,12 @@
 """
 Views para a API de Usuários.
 """
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.assincrono import visao_assincrona
+from user.authentication import CachedTokenAuthentication
 from user.serializers import (
     UserSerializer,
     TokenSerializer
@@ -25,9 +27,22 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Administrar o usuário logado."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Recupera e retorna o usuário autenticado."""
         return self.request.user
+
+
+def _usuario_sem_banco(view, request, *args, **kwargs):
+    """Responde com o usuário autenticado, que não exige consultas."""
+    return view.retrieve(request, *args, **kwargs)
+
+
+# Versão assíncrona de GET /me/, para servidores ASGI. Com o token em
+# cache, responde sem sair do event loop.
+usuario_assincrono = visao_assincrona(
+    ManageUserView, no_loop=_usuario_sem_banco,
+    http_method_names=['get', 'head', 'options'],
+)